@@ -0,0 +1,226 @@
+"""
+Batch so'rovlar - bir nechta API chaqiruvini bitta HTTP round-trip'da bajarish (bot oqimlari uchun).
+
+POST /api/batch/
+{
+    "atomic": false,
+    "requests": [
+        {"id": "auth", "method": "POST", "path": "/api/users/telegram_auth/", "body": {"telegram_id": 1}},
+        {"method": "GET", "path": "/api/results/?user={auth.body.user.id}&fields=id,is_passed"}
+    ]
+}
+
+- So'rovlar ketma-ket, shu jarayon ichida (URL resolver -> view) bajariladi: har biri o'z
+  permission/validatsiyasidan o'tadi, autentifikatsiya esa tashqi so'rovdan olinadi.
+- Oldingi natijaga havola: "{<id>.status}" yoki "{<id>.body.<kalit>.<kalit>}" - path'da va body
+  satrlarida. Satr to'liq havoladan iborat bo'lsa qiymat turi saqlanadi (int, dict, ...).
+- atomic=true - hammasi bitta tranzaksiyada; birinchi xatoda (status >= 400) hammasi bekor
+  qilinadi, qolganlari bajarilmaydi (424).
+- Javob: {"atomic": ..., "rolled_back": ..., "results": [{"id", "status", "body"}, ...]}
+"""
+import io
+import json
+import logging
+import re
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import Resolver404, resolve, reverse
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+REFERENCE_RE = re.compile(r'\{([A-Za-z_][\w-]*)\.(status|body)((?:\.[\w-]+)*)\}')
+
+# Tashqi so'rovdan sub-so'rovlarga o'tkazilmaydigan sarlavhalar (body va conditional GET o'ziga xos)
+SKIPPED_META_PREFIXES = ('HTTP_IF_', 'HTTP_CONTENT_', 'CONTENT_', 'HTTP_ACCEPT_ENCODING')
+
+
+class BatchError(Exception):
+    """Batch so'rovining o'zi noto'g'ri (400)"""
+
+
+class DependencyError(Exception):
+    """Havola qilingan natija yo'q yoki muvaffaqiyatsiz (424)"""
+
+
+class Rollback(Exception):
+    """atomic rejimda tranzaksiyani bekor qilish uchun"""
+
+
+class BatchView(APIView):
+    """Bir nechta API so'rovini ketma-ket bajarish (ixtiyoriy - bitta tranzaksiyada)"""
+    permission_classes = [AllowAny]  # Har bir sub-so'rov o'z permission'larini tekshiradi
+
+    def post(self, request):
+        try:
+            items = self.parse_items(request.data)
+        except BatchError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        atomic = bool(request.data.get('atomic', False))
+        results, rolled_back = [], False
+        if atomic:
+            try:
+                with transaction.atomic():
+                    self.run(request, items, results, stop_on_error=True)
+            except Rollback:
+                rolled_back = True
+        else:
+            self.run(request, items, results, stop_on_error=False)
+
+        return Response({'atomic': atomic, 'rolled_back': rolled_back, 'results': results})
+
+    def parse_items(self, data):
+        items = data.get('requests') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            raise BatchError("'requests' ro'yxati kerak")
+        if len(items) > settings.API_BATCH_MAX_REQUESTS:
+            raise BatchError(f"Bitta batch'da ko'pi bilan {settings.API_BATCH_MAX_REQUESTS} ta so'rov bo'lishi mumkin")
+
+        batch_path = reverse('batch')
+        seen_ids = set()
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                raise BatchError(f"requests[{index}] obyekt bo'lishi kerak")
+            method = str(item.get('method', 'GET')).upper()
+            path = item.get('path')
+            if method not in ALLOWED_METHODS:
+                raise BatchError(f"requests[{index}]: {method} metodi qo'llab-quvvatlanmaydi")
+            if not isinstance(path, str) or not path.startswith('/api/'):
+                raise BatchError(f"requests[{index}]: path '/api/' bilan boshlanishi kerak")
+            if urlsplit(path).path == batch_path:
+                raise BatchError(f"requests[{index}]: ichma-ich batch mumkin emas")
+            item_id = item.get('id')
+            if item_id is not None:
+                if not isinstance(item_id, str) or not re.fullmatch(r'[A-Za-z_][\w-]*', item_id):
+                    raise BatchError(f"requests[{index}]: id harf/raqam/_ dan iborat bo'lishi kerak")
+                if item_id in seen_ids:
+                    raise BatchError(f"requests[{index}]: '{item_id}' id takrorlangan")
+                seen_ids.add(item_id)
+            item['method'] = method
+        return items
+
+    def run(self, request, items, results, stop_on_error):
+        completed = {}
+        failed = False
+        for item in items:
+            item_id = item.get('id')
+            if failed:
+                results.append({'id': item_id, 'status': status.HTTP_424_FAILED_DEPENDENCY,
+                                'body': {'error': "Oldingi so'rov xatosi sababli bajarilmadi"}})
+                continue
+            try:
+                path = resolve_references(item['path'], completed, in_path=True)
+                body = resolve_references(item.get('body'), completed)
+                status_code, data = self.execute(request, item['method'], path, body)
+            except DependencyError as e:
+                status_code, data = status.HTTP_424_FAILED_DEPENDENCY, {'error': str(e)}
+
+            results.append({'id': item_id, 'status': status_code, 'body': data})
+            if item_id:
+                completed[item_id] = {'status': status_code, 'body': data}
+            if stop_on_error and status_code >= 400:
+                failed = True
+
+        if failed:
+            raise Rollback()
+
+    def execute(self, request, method, path, body):
+        """Bitta sub-so'rovni view orqali bajarish -> (status, data)"""
+        split = urlsplit(path)
+        try:
+            match = resolve(split.path)
+        except Resolver404:
+            return status.HTTP_404_NOT_FOUND, {'error': f'{split.path} topilmadi'}
+
+        sub_request = self.build_request(request, method, split.path, split.query, body)
+        sub_request.resolver_match = match
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+        except Exception as e:
+            logger.error(f"Batch sub-request {method} {path} failed: {e}", exc_info=True)
+            return status.HTTP_500_INTERNAL_SERVER_ERROR, {'error': 'Internal server error'}
+
+        if getattr(response, 'streaming', False):
+            return response.status_code, None
+        if hasattr(response, 'data'):
+            return response.status_code, response.data
+        content_type = response.get('Content-Type', '')
+        if content_type.startswith('application/json') and response.content:
+            return response.status_code, json.loads(response.content)
+        return response.status_code, None
+
+    def build_request(self, request, method, path, query_string, body):
+        payload = json.dumps(body).encode() if body is not None else b''
+        environ = {
+            key: value for key, value in request._request.META.items()
+            if not key.startswith(SKIPPED_META_PREFIXES)
+        }
+        environ.update({
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'SCRIPT_NAME': '',
+            'QUERY_STRING': query_string,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(payload)),
+            'wsgi.input': io.BytesIO(payload),
+        })
+        sub_request = WSGIRequest(environ)
+        # Tashqi so'rov autentifikatsiyadan (va CSRF tekshiruvidan) o'tgan - JWT qayta tekshirilmaydi
+        if request.user and request.user.is_authenticated:
+            sub_request._force_auth_user = request.user
+            sub_request._force_auth_token = request.auth
+        sub_request._dont_enforce_csrf_checks = True
+        return sub_request
+
+
+def lookup_reference(completed, item_id, part, keys):
+    if item_id not in completed:
+        raise DependencyError(f"'{item_id}' natijasi mavjud emas")
+    result = completed[item_id]
+    if part == 'status':
+        return result['status']
+    if result['status'] >= 400:
+        raise DependencyError(f"'{item_id}' so'rovi muvaffaqiyatsiz ({result['status']})")
+    value = result['body']
+    for key in keys:
+        if isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        elif isinstance(value, dict) and key in value:
+            value = value[key]
+        else:
+            raise DependencyError(f"'{item_id}.body' da '{key}' topilmadi")
+    return value
+
+
+def resolve_references(value, completed, in_path=False):
+    """Satrlardagi {id.body.a.b} havolalarini oldingi natijalar bilan almashtirish"""
+    if isinstance(value, dict):
+        return {key: resolve_references(item, completed) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, completed) for item in value]
+    if not isinstance(value, str) or '{' not in value:
+        return value
+
+    def replace(match):
+        item_id, part, keys = match.group(1), match.group(2), match.group(3)
+        resolved = lookup_reference(completed, item_id, part, [key for key in keys.split('.') if key])
+        text = resolved if isinstance(resolved, str) else json.dumps(resolved)
+        return quote_path(text) if in_path else text
+
+    full = REFERENCE_RE.fullmatch(value)
+    if full and not in_path:
+        keys = [key for key in full.group(3).split('.') if key]
+        return lookup_reference(completed, full.group(1), full.group(2), keys)
+    return REFERENCE_RE.sub(replace, value)
+
+
+def quote_path(text):
+    return quote(text, safe='')
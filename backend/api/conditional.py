@@ -0,0 +1,73 @@
+"""
+Conditional GET (ETag / Last-Modified) - faqat HR tahrirlaganda o'zgaradigan ma'lumotlar uchun
+(lavozimlar, testlar, savollar banki).
+
+Versiya belgisi (stamp) - jadvallar bo'yicha (soni, MAX(updated_at)) agregatlari: yangi, o'zgargan
+va o'chirilgan yozuvlar belgini o'zgartiradi. updated_at'i yo'q jadvallar (M2M through) uchun
+(soni, MAX(id)) - qatorlar faqat qo'shiladi/o'chiriladi, id'lar qayta ishlatilmaydi. Belgi mos kelsa 304 Not Modified qaytariladi -
+asosiy queryset bajarilmaydi va serializer ishlamaydi.
+"""
+import hashlib
+from datetime import datetime
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.http import http_date
+
+
+def table_stamp(queryset, field='updated_at'):
+    """(soni, oxirgi o'zgarish vaqti yoki field='id' bo'lsa oxirgi id) - bitta agregat so'rov"""
+    stamp = queryset.order_by().aggregate(total=Count('pk'), last=Max(field))
+    return stamp['total'], stamp['last']
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet uchun - conditional_actions'dagi action'lar ETag/Last-Modified bilan javob beradi.
+    get_content_stamps() - (soni, oxirgi o'zgarish) juftliklari ro'yxati (table_stamp natijalari).
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_content_stamps(self):
+        raise NotImplementedError
+
+    def conditional_validators(self, stamps):
+        request = self.request
+        # Last-Modified - faqat vaqt belgilaridan (id belgilari faqat ETag'ga kiradi)
+        last_modified = max((last for _, last in stamps if isinstance(last, datetime)), default=None)
+        # Bir xil URL turli foydalanuvchilarga turlicha javob berishi mumkin (superuser, format)
+        source = repr((
+            stamps,
+            request.get_full_path(),
+            bool(request.user and request.user.is_superuser),
+            getattr(request, 'accepted_media_type', None),
+        ))
+        return quote_etag(hashlib.md5(source.encode()).hexdigest()), last_modified
+
+    def conditional(self, handler, *args, **kwargs):
+        """handler() ni faqat klientdagi nusxa eskirgan bo'lsa chaqirish"""
+        etag, last_modified = self.conditional_validators(self.get_content_stamps())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(self.request, etag=etag, last_modified=timestamp)
+        if not_modified is not None:
+            response = not_modified
+        else:
+            response = handler(*args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(timestamp)
+        # Har safar revalidatsiya (no-cache) - HR o'zgarishi darhol ko'rinadi
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if 'list' not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'retrieve' not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional(super().retrieve, request, *args, **kwargs)
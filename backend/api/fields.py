@@ -0,0 +1,54 @@
+"""
+Sparse fieldsets - ?fields=id,score,is_passed / ?omit=answers,user
+
+Faqat GET so'rovlarida va faqat ildiz (root) serializer maydonlariga qo'llanadi:
+- SparseFieldsMixin so'ralmagan maydonlarni serializer'dan olib tashlaydi
+  (SerializerMethodField'lar ham hisoblanmaydi);
+- SparseFieldsViewSetMixin.wants_field() orqali viewset select_related/prefetch_related
+  va annotatsiyalarni faqat kerakli maydonlar uchun qo'shadi.
+"""
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def parse_field_list(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def requested_fields(request):
+    """(fields - set yoki None (hammasi), omit - set)"""
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None, set()
+    fields = parse_field_list(request.query_params.get(FIELDS_PARAM)) or None
+    return fields, parse_field_list(request.query_params.get(OMIT_PARAM))
+
+
+class SparseFieldsMixin:
+    """ModelSerializer uchun - ?fields= / ?omit= bo'yicha maydonlarni qisqartirish"""
+
+    def is_root_serializer(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_root_serializer():
+            return fields
+        only, omit = requested_fields(self.context.get('request'))
+        for name in list(fields):
+            if (only is not None and name not in only) or name in omit:
+                fields.pop(name)
+        return fields
+
+
+class SparseFieldsViewSetMixin:
+    """ViewSet uchun - queryset optimizatsiyalarini so'ralgan maydonlarga qarab qo'shish"""
+
+    def wants_field(self, *names):
+        """Berilgan maydonlardan birortasi javobda bo'ladimi"""
+        only, omit = requested_fields(getattr(self, 'request', None))
+        return any((only is None or name in only) and name not in omit for name in names)
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Gzip - faqat klient Accept-Encoding: gzip yuborganda (GZipMiddleware), va faqat:
+    - API_COMPRESSION_MIN_LENGTH baytdan katta javoblar (kichik javoblarda siqish foyda bermaydi);
+    - matnli content-type'lar (JSON, HTML, ...) - PDF/rasm/zip allaqachon siqilgan;
+    - oqimli (streaming) javoblar siqilmaydi: SSE (text/event-stream) har bir event darhol
+      yetib borishi kerak, fayl yuklab olishlar esa allaqachon siqilgan.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+        if len(response.content) < settings.API_COMPRESSION_MIN_LENGTH:
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,187 @@
+import json
+from base64 import b64decode, b64encode
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Cursor pagination (id bo'yicha) - katta ro'yxatlar uchun OFFSET/COUNT so'rovlarisiz.
+    GET ...?cursor=<next/previous havoladan>&page_size=50
+    """
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class LatestIdCursorPagination(IdCursorPagination):
+    """Eng yangi yozuvlar birinchi (masalan, notification xatoliklari)"""
+    ordering = '-id'
+
+
+class StandardPageNumberPagination(PageNumberPagination):
+    """Sahifa raqami bo'yicha (jami soni bilan) - dashboard jadvallari uchun"""
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination - (tartiblash maydoni, id) juftligi bo'yicha WHERE ... ORDER BY ... LIMIT.
+
+    - COUNT(*) va OFFSET yo'q: chuqur sahifalar ham birinchi sahifa narxida;
+    - id tie-breaker: yangi yozuvlar qo'shilganda sahifalar siljimaydi va takrorlanmaydi;
+    - tartiblash view'ning ordering / ?ordering= qiymatidan olinadi (birinchi maydon);
+    - NULL qiymatlar eng katta qiymat sifatida tartiblanadi (PostgreSQL indeks tartibi, SQLite'da ham bir xil);
+    - ?page=N yuborilsa - StandardPageNumberPagination (count bilan, dashboard uchun).
+
+    Javob: {"next": url|null, "previous": url|null, "results": [...]}
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_query_param = 'page'
+    page_number_class = StandardPageNumberPagination
+    invalid_cursor_message = 'Invalid cursor'
+    page_number = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_number = None
+        if self.page_query_param in request.query_params:
+            self.page_number = self.page_number_class()
+            return self.page_number.paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.field, descending = self.get_ordering(queryset)
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor['r'])
+
+        queryset = queryset.order_by(*self.order_terms(descending != self.reverse))
+        if cursor:
+            queryset = queryset.filter(self.after(cursor['v'], cursor['id'], descending != self.reverse))
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        # Oldinga: keyingi sahifa - ortiqcha qator bo'lsa, oldingi - cursor bilan kelingan bo'lsa
+        has_next, has_previous = (True, has_more) if self.reverse else (has_more, cursor is not None)
+        self.next_cursor = self.position(rows[-1], reverse=False) if has_next and rows else None
+        self.previous_cursor = self.position(rows[0], reverse=True) if has_previous and rows else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def get_ordering(self, queryset):
+        """(maydon nomi yoki None - faqat id, kamayish tartibidami)"""
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        term = ordering[0] if ordering else '-id'
+        if not isinstance(term, str):
+            return None, True
+        descending = term.startswith('-')
+        name = term.lstrip('-')
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None, descending
+        if name in ('id', 'pk') or field.primary_key or not field.concrete or field.is_relation:
+            return None, descending
+        return field, descending
+
+    def order_terms(self, descending):
+        if descending:
+            terms = [F(self.field.attname).desc(nulls_first=True if self.field.null else None)] if self.field else []
+            return terms + [F('pk').desc()]
+        terms = [F(self.field.attname).asc(nulls_last=True if self.field.null else None)] if self.field else []
+        return terms + [F('pk').asc()]
+
+    def after(self, value, pk, descending):
+        """Cursor (value, pk) dan keyin keladigan qatorlar sharti (NULL - eng katta qiymat)"""
+        beyond = 'lt' if descending else 'gt'
+        after_pk = Q(**{f'pk__{beyond}': pk})
+        if self.field is None:
+            return after_pk
+        name = self.field.attname
+        if value is None:
+            same = Q(**{f'{name}__isnull': True}) & after_pk
+            return (same | Q(**{f'{name}__isnull': False})) if descending else same
+        condition = Q(**{f'{name}__{beyond}': value}) | (Q(**{name: value}) & after_pk)
+        if self.field.null and not descending:
+            condition |= Q(**{f'{name}__isnull': True})
+        return condition
+
+    def position(self, instance, reverse):
+        value = getattr(instance, self.field.attname) if self.field else None
+        return {'v': value, 'id': instance.pk, 'r': reverse}
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            value = data['v']
+            if value is not None and self.field is not None:
+                value = self.field.to_python(value)
+            return {'v': value, 'id': int(data['id']), 'r': bool(data.get('r'))}
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        if cursor is None:
+            return None
+        # default=str - datetime mikrosekundlari bilan (DjangoJSONEncoder millisekundgacha qisqartiradi)
+        encoded = b64encode(json.dumps(cursor, default=str).encode('utf-8')).decode('ascii')
+        scheme, netloc, path, params, query, fragment = urlparse(self.base_url)
+        query_dict = parse_qs(query, keep_blank_values=True)
+        query_dict[self.cursor_query_param] = [encoded]
+        return urlunparse((scheme, netloc, path, params, urlencode(query_dict, doseq=True), fragment))
+
+    def get_paginated_response(self, data):
+        if self.page_number is not None:
+            return self.page_number.get_paginated_response(data)
+        return Response({
+            'next': self.encode_cursor(self.next_cursor),
+            'previous': self.encode_cursor(self.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        if self.page_number is not None:
+            return self.page_number.get_paginated_response_schema(schema)
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_html_context(self):
+        if self.page_number is not None:
+            return self.page_number.get_html_context()
+        return {
+            'previous_url': self.encode_cursor(self.previous_cursor),
+            'next_url': self.encode_cursor(self.next_cursor),
+        }
+
+    def to_html(self):
+        if self.page_number is not None:
+            return self.page_number.to_html()
+        return ''
@@ -0,0 +1,80 @@
+"""
+Tezkor JSON renderer/parser - orjson o'rnatilgan bo'lsa u ishlatiladi, aks holda DRF standart (json) yo'li.
+
+DRF JSONEncoder bilan bir xil natija:
+- datetime/date/time - ISO 8601 (UTC uchun 'Z'), Decimal - float, lazy tarjima satrlari - str,
+  UUID, timedelta, QuerySet va boshqa turlar - DRF encoder.default orqali;
+- indent so'ralganda (browsable API, ?format=json; indent=4) yoki orjson qabul qilmaydigan
+  qiymatlarda (64-bitdan katta butun sonlar) standart renderer'ga qaytadi;
+- NaN/Infinity: orjson ularni jimgina null qiladi, DRF esa ValueError beradi ("Out of range float
+  values are not JSON compliant") - natijada null bo'lsa ma'lumot tekshiriladi va bunday qiymat
+  topilsa standart renderer ishlatiladi (xato yashirinmaydi).
+"""
+import codecs
+import math
+from decimal import Decimal
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - ixtiyoriy bog'liqlik
+    orjson = None
+
+_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+def _has_non_finite(value):
+    """Ma'lumot ichida NaN/Infinity (float yoki Decimal) bormi"""
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, Decimal):
+        return not value.is_finite()
+    if isinstance(value, dict):
+        return any(_has_non_finite(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(item) for item in value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """orjson bilan JSON renderer (DRF JSONRenderer o'rniga)"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson.JSONEncodeError (TypeError) - masalan, 64-bitdan katta int
+            return super().render(data, accepted_media_type, renderer_context)
+        # NaN/Infinity orjson'da null bo'ladi - null bo'lmasa tekshirish shart emas
+        if b'null' in content and _has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        return content
+
+
+class FastJSONParser(JSONParser):
+    """orjson bilan JSON parser (DRF JSONParser o'rniga)"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read() if stream is not None else b''
+            if codecs.lookup(encoding).name != 'utf-8':
+                body = body.decode(encoding).encode('utf-8')
+            return orjson.loads(body)
+        except (ValueError, LookupError, UnicodeError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -1,19 +1,43 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from users.models import CV, Position, TelegramProfile, Notification, NotificationError
+from django.db import transaction
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from users.models import CV, CVText, Position, TelegramProfile, Notification, NotificationError
+from users.cv_storage import acquire_blob, release_blob
+from users.services import get_notification_recipients
 from tests.models import Test, Question, AnswerOption, TestResult, UserAnswer
+from .fields import SparseFieldsMixin
 
 User = get_user_model()
 
 
-class PositionSerializer(serializers.ModelSerializer):
+def annotated_count(obj, attr, related):
+    """Annotatsiya qilingan son (bo'lmasa - bitta COUNT so'rovi, masalan create/update javobida)"""
+    value = getattr(obj, attr, None)
+    return getattr(obj, related).count() if value is None else value
+
+
+class PositionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Position serializer"""
-    tests_count = serializers.IntegerField(source='tests.count', read_only=True)
+    tests_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Position
         fields = ['id', 'name', 'description', 'is_open', 'tests_count', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
+    
+    @staticmethod
+    def annotate_queryset(queryset):
+        # Subquery - Prefetch('positions', ...) ichida ham to'g'ri (JOIN prefetch filtri bilan aralashmaydi)
+        tests = Test.positions.through.objects.filter(position=OuterRef('pk')).order_by().values('position')
+        return queryset.annotate(
+            tests_count=Coalesce(Subquery(tests.annotate(total=Count('test')).values('total')), 0)
+        )
+    
+    def get_tests_count(self, obj):
+        return annotated_count(obj, 'tests_count', 'tests')
 
 
 class AnswerOptionSerializer(serializers.ModelSerializer):
@@ -75,9 +99,20 @@ class QuestionSerializer(serializers.ModelSerializer):
         return instance
 
 
-class TestSerializer(serializers.ModelSerializer):
+def annotate_tests_queryset(queryset, questions_count=True, positions=True):
+    """Test ro'yxati/tafsilotlari uchun: questions_count va positions (tests_count bilan) - sahifa boshiga o'zgarmas so'rovlar soni"""
+    if questions_count:
+        queryset = queryset.annotate(questions_count=Count('questions', distinct=True))
+    if positions:
+        queryset = queryset.prefetch_related(
+            Prefetch('positions', queryset=PositionSerializer.annotate_queryset(Position.objects.all()))
+        )
+    return queryset
+
+
+class TestSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
-    questions_count = serializers.IntegerField(source='questions.count', read_only=True)
+    questions_count = serializers.SerializerMethodField()
     positions = PositionSerializer(many=True, read_only=True)
     position_ids = serializers.ListField(
         child=serializers.IntegerField(),
@@ -95,6 +130,9 @@ class TestSerializer(serializers.ModelSerializer):
                   'questions', 'questions_count', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
     
+    def get_questions_count(self, obj):
+        return annotated_count(obj, 'questions_count', 'questions')
+    
     def create(self, validated_data):
         """Create test with positions"""
         position_ids = validated_data.pop('position_ids', None)
@@ -145,8 +183,8 @@ class TestSerializer(serializers.ModelSerializer):
         return data
 
 
-class TestListSerializer(serializers.ModelSerializer):
-    questions_count = serializers.IntegerField(source='questions.count', read_only=True)
+class TestListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    questions_count = serializers.SerializerMethodField()
     positions = PositionSerializer(many=True, read_only=True)
 
     class Meta:
@@ -154,6 +192,25 @@ class TestListSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'positions', 'time_limit', 'passing_score', 
                   'test_mode', 'max_attempts', 'random_questions_count', 'show_answers_immediately',
                   'trial_questions_count', 'is_active', 'questions_count', 'created_at']
+    
+    def get_questions_count(self, obj):
+        return annotated_count(obj, 'questions_count', 'questions')
+
+
+class TestDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Test tafsilotlari - faqat metadata (savollar banki kiritilmaydi).
+    questions_count - queryset annotatsiyasi (TestViewSet.get_queryset)
+    """
+    questions_count = serializers.IntegerField(read_only=True)
+    positions = PositionSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Test
+        fields = ['id', 'title', 'description', 'positions', 'time_limit', 'passing_score',
+                  'test_mode', 'random_questions_count', 'show_answers_immediately',
+                  'trial_questions_count', 'max_attempts', 'max_trial_attempts', 'is_active',
+                  'questions_count', 'created_at', 'updated_at']
 
 
 class TelegramProfileSerializer(serializers.ModelSerializer):
@@ -166,12 +223,9 @@ class TelegramProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     position = PositionSerializer(read_only=True)
     position_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
-    tests_passed_count = serializers.SerializerMethodField()
-    tests_total_count = serializers.SerializerMethodField()
-    best_score = serializers.SerializerMethodField()
     telegram_profile = TelegramProfileSerializer(read_only=True)
 
     class Meta:
@@ -180,39 +234,26 @@ class UserSerializer(serializers.ModelSerializer):
                   'position', 'position_id', 'telegram_id', 'telegram_profile',
                   'notification_enabled', 'is_blocked', 'blocked_reason', 
                   'trial_tests_taken', 'tests_passed_count', 'tests_total_count', 
-                  'best_score', 'created_at']
-        read_only_fields = ['created_at', 'is_blocked', 'blocked_reason', 'blocked_at']
-    
-    def get_tests_passed_count(self, obj):
-        """Jami o'tgan testlar soni"""
-        from tests.models import TestResult
-        from django.db.models import F
-        # is_passed property: score >= test.passing_score
-        return TestResult.objects.filter(
-            user=obj,
-            is_completed=True
-        ).annotate(
-            passing_score=F('test__passing_score')
-        ).filter(
-            score__gte=F('passing_score')
-        ).count()
+                  'best_score', 'last_test_at', 'created_at']
+        read_only_fields = ['created_at', 'is_blocked', 'blocked_reason', 'blocked_at',
+                            'tests_passed_count', 'tests_total_count', 'best_score', 'last_test_at']
     
-    def get_tests_total_count(self, obj):
-        """Jami ishlangan testlar soni"""
-        from tests.models import TestResult
-        return TestResult.objects.filter(
-            user=obj,
-            is_completed=True
-        ).count()
-    
-    def get_best_score(self, obj):
-        """Eng yaxshi ball"""
-        from tests.models import TestResult
-        best_result = TestResult.objects.filter(
-            user=obj,
-            is_completed=True
-        ).order_by('-score').first()
-        return best_result.score if best_result else None
+    @staticmethod
+    def annotate_queryset(queryset, prefix='', telegram_profile=True, position=True):
+        """
+        Ro'yxat/nested foydalanish uchun: telegram_profile JOIN, position (tests_count bilan) - bitta prefetch.
+        Natijalar xulosasi User maydonlarida (users/result_summary.py) - qo'shimcha so'rov yo'q.
+        prefix - nested relation uchun (masalan 'user__')
+        """
+        if prefix:
+            queryset = queryset.select_related(prefix[:-2])
+        if telegram_profile:
+            queryset = queryset.select_related(f'{prefix}telegram_profile')
+        if position:
+            queryset = queryset.prefetch_related(
+                Prefetch(f'{prefix}position', queryset=PositionSerializer.annotate_queryset(Position.objects.all()))
+            )
+        return queryset
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -247,19 +288,63 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
-class CVSerializer(serializers.ModelSerializer):
+class CVSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    # Fayl faqat yuklash uchun - o'qishda to'g'ridan-to'g'ri /media/ URL emas, himoyalangan download_url
+    file = serializers.FileField(write_only=True)
+    download_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
+    snippet = serializers.SerializerMethodField()
 
     class Meta:
         model = CV
-        fields = ['id', 'user', 'file', 'file_name', 'file_size', 'uploaded_at']
+        fields = ['id', 'user', 'file', 'download_url', 'file_name', 'file_size', 'uploaded_at', 'preview_url', 'snippet']
         read_only_fields = ['file_name', 'file_size', 'uploaded_at']
 
+    def _absolute_url(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_download_url(self, obj):
+        """Autentifikatsiyali yuklab olish (/cvs/{id}/download/) - ruxsat backend'da tekshiriladi"""
+        return self._absolute_url(reverse('cv-download', args=[obj.pk]))
+
+    def get_preview_url(self, obj):
+        """Ro'yxat uchun kichik PNG thumbnail (to'liq fayl yuklanmaydi) - download bilan bir xil ruxsat"""
+        if not obj.blob_id or not obj.blob.preview:
+            return None
+        return self._absolute_url(reverse('cv-preview', args=[obj.pk]))
+
+    def get_snippet(self, obj):
+        try:
+            return obj.text.snippet
+        except CVText.DoesNotExist:
+            return None
+
     def create(self, validated_data):
         file = validated_data['file']
         validated_data['file_name'] = file.name
         validated_data['file_size'] = file.size
-        return super().create(validated_data)
+        # Bir xil kontent qayta yozilmaydi - CV mavjud blob'ga ishora qiladi.
+        # Blob (va fayl) tranzaksiyadan oldin; CV yaratilmasa havola qaytariladi (0 bo'lsa fayl o'chadi)
+        blob = acquire_blob(file, file.name)
+        validated_data['blob'] = blob
+        validated_data['file'] = blob.file.name
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except Exception:
+            release_blob(blob.pk)
+            raise
+
+
+class CVSearchResultSerializer(CVSerializer):
+    """CV full-text qidiruv natijasi"""
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+    snippet = serializers.CharField(source='search_snippet', read_only=True)
+
+    class Meta(CVSerializer.Meta):
+        fields = CVSerializer.Meta.fields + ['rank', 'snippet']
 
 
 class UserAnswerSerializer(serializers.ModelSerializer):
@@ -273,7 +358,7 @@ class UserAnswerSerializer(serializers.ModelSerializer):
         read_only_fields = ['is_correct']
 
 
-class TestResultSerializer(serializers.ModelSerializer):
+class TestResultSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     test = TestListSerializer(read_only=True)
     answers = UserAnswerSerializer(many=True, read_only=True)
@@ -534,9 +619,16 @@ class TestResultCreateSerializer(serializers.Serializer):
         return result
 
 
+class UserBriefSerializer(serializers.ModelSerializer):
+    """Ixcham user - nested ro'yxatlar uchun (natijalar, position va profilsiz)"""
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'telegram_id']
+
+
 class NotificationErrorSerializer(serializers.ModelSerializer):
     """NotificationError serializer"""
-    user = UserSerializer(read_only=True)
+    user = UserBriefSerializer(read_only=True)
     
     class Meta:
         model = NotificationError
@@ -545,31 +637,47 @@ class NotificationErrorSerializer(serializers.ModelSerializer):
 
 
 class NotificationSerializer(serializers.ModelSerializer):
-    """Notification serializer"""
-    created_by = UserSerializer(read_only=True)
-    recipients = UserSerializer(many=True, read_only=True)
+    """
+    Notification serializer - faqat sonlar va qisqa preview'lar.
+    To'liq ro'yxatlar: /notifications/{id}/recipients/ va /notifications/{id}/errors/ (cursor pagination)
+    """
+    PREVIEW_SIZE = 5
+    
+    created_by = UserBriefSerializer(read_only=True)
     recipients_count = serializers.SerializerMethodField()
-    errors_count = serializers.SerializerMethodField()
-    errors = NotificationErrorSerializer(many=True, read_only=True)
+    recipients_preview = UserBriefSerializer(source='recipients_preview_list', many=True, read_only=True)
+    errors_preview = NotificationErrorSerializer(source='errors_preview_list', many=True, read_only=True)
     
     class Meta:
         model = Notification
         fields = [
-            'id', 'title', 'message', 'recipients', 'recipients_count',
-            'send_to_all', 'sent_at', 'created_by', 'created_at', 'updated_at',
+            'id', 'title', 'message', 'recipients_count', 'recipients_preview',
+            'send_to_all', 'template_test', 'sent_at', 'scheduled_at', 'delivery_window_minutes', 'created_by', 'created_at', 'updated_at',
             'total_recipients', 'successful_sends', 'failed_sends',
-            'errors_count', 'errors'
+            'errors_count', 'errors_preview'
         ]
         read_only_fields = ['created_at', 'updated_at', 'sent_at', 'total_recipients', 
-                           'successful_sends', 'failed_sends']
+                           'successful_sends', 'failed_sends', 'errors_count']
+    
+    @classmethod
+    def annotate_queryset(cls, queryset):
+        """recipients soni + har bir notification uchun PREVIEW_SIZE ta recipient/xatolik (sliced prefetch)"""
+        return queryset.select_related('created_by').annotate(
+            recipients_total=Count('recipients', distinct=True)
+        ).prefetch_related(
+            Prefetch('recipients', queryset=User.objects.order_by('id')[:cls.PREVIEW_SIZE], to_attr='recipients_preview_list'),
+            Prefetch(
+                'errors',
+                queryset=NotificationError.objects.select_related('user').order_by('-id')[:cls.PREVIEW_SIZE],
+                to_attr='errors_preview_list'
+            ),
+        )
     
     def get_recipients_count(self, obj):
         """Get recipients count"""
         if obj.send_to_all:
-            return User.objects.filter(telegram_id__isnull=False).count()
-        return obj.recipients.count()
-    
-    def get_errors_count(self, obj):
-        """Get errors count"""
-        return obj.errors.count()
-
+            # Barcha notification'lar uchun bir xil (yuborishdagi filtr bilan) - serializer boshiga bitta so'rov
+            if not hasattr(self, '_all_recipients_count'):
+                self._all_recipients_count = get_notification_recipients(obj).count()
+            return self._all_recipients_count
+        return annotated_count(obj, 'recipients_total', 'recipients')
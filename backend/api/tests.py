@@ -0,0 +1,395 @@
+"""
+api ilovasi testlari. Ro'yxat endpoint'lari uchun SQL so'rovlar soni sahifa hajmiga bog'liq
+bo'lmasligi kerak (N+1 regressiyalari shu yerda ushlanadi).
+
+    python manage.py test api
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api.batch import resolve_references
+from api.renderers import FastJSONRenderer
+from tests.models import AnswerOption, Question, Test, TestResult
+from users.models import Notification, Position, TelegramProfile
+from users.notification_progress import POLL_SECONDS, iter_progress_events
+
+User = get_user_model()
+
+SMALL_PAGE, LARGE_PAGE = 5, 20
+
+
+class ListQueryCountTests(APITestCase):
+    """positions, tests, notifications va users ro'yxatlari - ikki xil sahifa hajmida bir xil so'rovlar soni"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='admin', email='admin@example.com')
+        cls.positions = [Position.objects.create(name=f'Position {index}') for index in range(LARGE_PAGE)]
+        for index in range(LARGE_PAGE + 5):
+            user = User.objects.create_user(
+                username=f'user{index}',
+                telegram_id=1000 + index,
+                first_name=f'Ism{index}',
+                position=cls.positions[index % len(cls.positions)],
+            )
+            TelegramProfile.objects.create(user=user, telegram_id=user.telegram_id, telegram_username=f'tg{index}')
+        cls.candidates = list(User.objects.filter(telegram_id__isnull=False))
+
+    def create_tests(self, count):
+        for index in range(Test.objects.count(), count):
+            test = Test.objects.create(title=f'Test {index}')
+            test.positions.set(self.positions[index:index + 2])
+            for number in range(3):
+                question = Question.objects.create(test=test, text=f'Savol {number}', order=number)
+                AnswerOption.objects.create(question=question, text='Ha', is_correct=True)
+                AnswerOption.objects.create(question=question, text="Yo'q", is_correct=False)
+            user = self.candidates[index % len(self.candidates)]
+            TestResult.objects.create(
+                user=user, test=test, score=80, total_questions=3, correct_answers=2,
+                time_taken=60, is_completed=True
+            )
+
+    def create_notifications(self, count):
+        for index in range(Notification.objects.count(), count):
+            notification = Notification.objects.create(
+                title=f'Xabar {index}',
+                message='Salom',
+                send_to_all=index % 3 == 0,
+                created_by=self.admin,
+            )
+            notification.recipients.set(self.candidates[index:index + 3])
+
+    def get_list(self, url, page_size=None, user=None):
+        self.client.force_authenticate(user or self.admin)
+        params = {'page_size': page_size} if page_size else {}
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['results']
+
+    def assertListQueries(self, num, url, page_size, expected_rows, user=None):
+        with self.assertNumQueries(num):
+            results = self.get_list(url, page_size, user)
+        self.assertEqual(len(results), expected_rows)
+
+    def test_positions_list(self):
+        # PageNumberPagination (PAGE_SIZE=20) - sahifa hajmi ochiq lavozimlar soni bilan o'zgartiriladi
+        candidate = self.candidates[0]
+        Position.objects.filter(name__in=[position.name for position in self.positions[SMALL_PAGE:]]).update(is_open=False)
+        self.create_tests(SMALL_PAGE)
+        self.assertListQueries(5, '/api/positions/', None, SMALL_PAGE, candidate)
+        Position.objects.update(is_open=True)
+        self.create_tests(LARGE_PAGE)
+        self.assertListQueries(5, '/api/positions/', None, LARGE_PAGE, candidate)
+
+    def test_tests_list(self):
+        self.create_tests(SMALL_PAGE)
+        self.assertListQueries(7, '/api/tests/', None, SMALL_PAGE)
+        self.create_tests(LARGE_PAGE)
+        self.assertListQueries(7, '/api/tests/', None, LARGE_PAGE)
+
+    def test_notifications_list(self):
+        self.create_notifications(LARGE_PAGE + 5)
+        self.assertListQueries(4, '/api/notifications/', SMALL_PAGE, SMALL_PAGE)
+        self.assertListQueries(4, '/api/notifications/', LARGE_PAGE, LARGE_PAGE)
+
+    def test_users_list(self):
+        self.create_tests(LARGE_PAGE)
+        self.assertListQueries(2, '/api/users/', SMALL_PAGE, SMALL_PAGE)
+        self.assertListQueries(2, '/api/users/', LARGE_PAGE, LARGE_PAGE)
+
+
+class NotificationProgressTests(APITestCase):
+    """/api/notifications/{id}/progress/ - JSON short-poll va SSE oqimining yakuni"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='admin', email='admin@example.com')
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def create_notification(self, **fields):
+        defaults = {'title': 'Xabar', 'message': 'Salom', 'created_by': self.admin, 'sent_at': timezone.now()}
+        defaults.update(fields)
+        return Notification.objects.create(**defaults)
+
+    def test_json_snapshot(self):
+        notification = self.create_notification(total_recipients=10, successful_sends=4, failed_sends=1)
+        response = self.client.get(f'/api/notifications/{notification.id}/progress/', {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['state'], 'sending')
+        self.assertEqual(response.data['pending'], 5)
+        self.assertEqual(response.data['poll_after'], POLL_SECONDS)
+
+    def test_json_snapshot_done_stops_polling(self):
+        notification = self.create_notification(total_recipients=2, successful_sends=2)
+        response = self.client.get(f'/api/notifications/{notification.id}/progress/', {'format': 'json'})
+        self.assertEqual(response.data['state'], 'done')
+        self.assertIsNone(response.data['poll_after'])
+
+    def test_json_snapshot_scheduled_polls_until_scheduled_at(self):
+        notification = self.create_notification(total_recipients=2, scheduled_at=timezone.now() + timedelta(seconds=60))
+        response = self.client.get(f'/api/notifications/{notification.id}/progress/', {'format': 'json'})
+        self.assertEqual(response.data['state'], 'scheduled')
+        self.assertTrue(55 <= response.data['poll_after'] <= 60)
+
+    def test_json_snapshot_not_found(self):
+        response = self.client.get('/api/notifications/999999/progress/', {'format': 'json'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_stream_ends_for_scheduled(self):
+        notification = self.create_notification(total_recipients=2, scheduled_at=timezone.now() + timedelta(hours=1))
+        frames = list(iter_progress_events(notification.id, interval=0.01, duration=5))
+        self.assertTrue(frames[-1].startswith('event: scheduled\n'))
+
+
+class KeysetPaginationTests(APITestCase):
+    """KeysetPagination - NULL va teng qiymatli tartiblash maydoni bo'ylab oldinga/orqaga yurish"""
+
+    URL = '/api/results/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='admin', email='admin@example.com')
+        user = User.objects.create_user(username='candidate', telegram_id=5000)
+        test = Test.objects.create(title='Test')
+        base = timezone.now().replace(microsecond=0)
+        # 5 ta NULL, qolganlari uchtadan bir xil completed_at (ties) - jami 23 ta
+        moments = [None] * 5 + [base - timedelta(minutes=index // 3) for index in range(18)]
+        cls.ids = []
+        for moment in moments:
+            result = TestResult.objects.create(
+                user=user, test=test, score=50, total_questions=2, correct_answers=1, time_taken=10, is_completed=True
+            )
+            TestResult.objects.filter(pk=result.pk).update(completed_at=moment)
+            cls.ids.append(result.pk)
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def walk(self, ordering):
+        """Oldinga (next) oxirigacha, keyin orqaga (previous) boshigacha - sahifalar ro'yxati"""
+        forward = [self.get(self.URL, {'ordering': ordering, 'page_size': 4, 'fields': 'id'})]
+        while forward[-1]['next']:
+            forward.append(self.get(forward[-1]['next']))
+        backward = [forward[-1]]
+        while backward[-1]['previous']:
+            backward.append(self.get(backward[-1]['previous']))
+        return [[row['id'] for row in page['results']] for page in forward], \
+            [[row['id'] for row in page['results']] for page in backward]
+
+    def assertWalk(self, ordering, expected_order):
+        forward, backward = self.walk(ordering)
+        rows = [pk for page in forward for pk in page]
+        self.assertEqual(rows, expected_order)
+        self.assertEqual(len(rows), len(set(rows)))
+        # Orqaga yurish xuddi shu sahifalarni teskari tartibda qaytaradi
+        self.assertEqual(backward, forward[::-1])
+
+    def test_walk_descending_with_nulls_and_ties(self):
+        expected = list(TestResult.objects.order_by(F('completed_at').desc(nulls_first=True), '-pk').values_list('pk', flat=True))
+        self.assertEqual(sorted(expected), sorted(self.ids))
+        self.assertWalk('-completed_at', expected)
+
+    def test_walk_ascending_with_nulls_and_ties(self):
+        expected = list(TestResult.objects.order_by(F('completed_at').asc(nulls_last=True), 'pk').values_list('pk', flat=True))
+        self.assertWalk('completed_at', expected)
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-base64!', 'eyJ2IjogMX0=', 'eyJ2IjogIng7IiwgImlkIjogMX0='):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.URL, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_page_number_has_count(self):
+        data = self.get(self.URL, {'page': 2, 'page_size': 10})
+        self.assertEqual(data['count'], len(self.ids))
+        self.assertEqual(len(data['results']), 10)
+
+    def test_deep_page_query_count(self):
+        params = {'page_size': 4, 'fields': 'id,score'}
+        with CaptureQueriesContext(connection) as first_page:
+            page = self.get(self.URL, params)
+        # request_started so'rovlar logini tozalaydi - sonini darhol olamiz
+        first_page_queries = len(first_page)
+        for _ in range(3):
+            page = self.get(page['next'])
+        with self.assertNumQueries(first_page_queries):
+            deep = self.get(page['next'])
+        self.assertEqual(len(deep['results']), 4)
+
+
+class TelegramAuthTests(APITestCase):
+    """/api/users/telegram_auth/ - takroriy chaqiruvlar yozuvsiz, o'zgarish faqat update_fields bilan"""
+
+    URL = '/api/users/telegram_auth/'
+    PAYLOAD = {
+        'telegram_id': 777,
+        'first_name': 'Ali',
+        'last_name': 'Valiyev',
+        'telegram_username': 'ali',
+        'telegram_language_code': 'uz',
+        'telegram_is_premium': False,
+        'issue_tokens': False,
+    }
+
+    def post(self, **changes):
+        response = self.client.post(self.URL, {**self.PAYLOAD, **changes}, format='json')
+        self.assertIn(response.status_code, (200, 201), response.data)
+        return response
+
+    def test_first_call_creates_user_and_profile(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 201)
+        profile = TelegramProfile.objects.get(telegram_id=777)
+        self.assertEqual(profile.telegram_first_name, 'Ali')
+        self.assertEqual(profile.user.first_name, '')
+
+    def test_repeat_call_is_single_query(self):
+        self.post()
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertNumQueries(1):
+                response = self.post()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+
+    def test_changed_name_updates_only_changed_fields(self):
+        self.post()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(first_name='Vali')
+        self.assertEqual(response.status_code, 200)
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"telegram_first_name"', updates[0])
+        self.assertNotIn('"telegram_username"', updates[0])
+        self.assertEqual(TelegramProfile.objects.get(telegram_id=777).telegram_first_name, 'Vali')
+
+    def test_issue_tokens(self):
+        response = self.post(issue_tokens=False)
+        self.assertNotIn('access', response.data)
+        self.assertNotIn('refresh', response.data)
+        response = self.post(issue_tokens=True)
+        self.assertIn('access', response.data)
+        self.assertIn('refresh', response.data)
+        self.assertEqual(response.data['user']['telegram_id'], 777)
+
+    def test_invalid_telegram_id(self):
+        for telegram_id in ('abc', '12.5', [1]):
+            with self.subTest(telegram_id=telegram_id):
+                response = self.client.post(self.URL, {'telegram_id': telegram_id}, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.data)
+        self.assertFalse(User.objects.filter(username__startswith='user_').exists())
+
+
+class BatchViewTests(APITestCase):
+    """/api/batch/ - havolalar, 424, atomic rollback va autentifikatsiya chegarasi"""
+
+    URL = '/api/batch/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='admin', email='admin@example.com')
+
+    def batch(self, requests, atomic=False, user=None):
+        if user is not None:
+            self.client.force_authenticate(user)
+        response = self.client.post(self.URL, {'atomic': atomic, 'requests': requests}, format='json')
+        return response
+
+    def results(self, requests, atomic=False, user=None):
+        response = self.batch(requests, atomic, user)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data, [(result['id'], result['status']) for result in response.data['results']]
+
+    def test_references_in_path_and_body(self):
+        data, statuses = self.results([
+            {'id': 'position', 'method': 'POST', 'path': '/api/positions/', 'body': {'name': 'Backend'}},
+            {'id': 'detail', 'method': 'GET', 'path': '/api/positions/{position.body.id}/'},
+            {'id': 'copy', 'method': 'POST', 'path': '/api/positions/',
+             'body': {'name': '{detail.body.name} copy', 'is_open': '{detail.body.is_open}'}},
+        ], user=self.admin)
+        self.assertEqual(statuses, [('position', 201), ('detail', 200), ('copy', 201)])
+        self.assertEqual(data['results'][1]['body']['id'], data['results'][0]['body']['id'])
+        self.assertEqual(data['results'][2]['body']['name'], 'Backend copy')
+        self.assertIs(data['results'][2]['body']['is_open'], True)
+
+    def test_full_string_reference_keeps_type(self):
+        completed = {'auth': {'status': 200, 'body': {'user': {'id': 5, 'tags': ['a']}, 'name': 'x y'}}}
+        resolved = resolve_references(
+            {'id': '{auth.body.user.id}', 'tags': '{auth.body.user.tags}', 'text': 'id={auth.body.user.id}',
+             'status': '{auth.status}'},
+            completed,
+        )
+        self.assertEqual(resolved, {'id': 5, 'tags': ['a'], 'text': 'id=5', 'status': 200})
+        self.assertEqual(resolve_references('/api/x/?q={auth.body.name}', completed, in_path=True), '/api/x/?q=x%20y')
+
+    def test_failed_and_missing_reference_return_424(self):
+        data, statuses = self.results([
+            {'id': 'missing', 'method': 'GET', 'path': '/api/positions/999999/'},
+            {'id': 'after_failed', 'method': 'GET', 'path': '/api/positions/{missing.body.id}/'},
+            {'id': 'unknown', 'method': 'GET', 'path': '/api/positions/{nope.body.id}/'},
+            {'id': 'status_only', 'method': 'GET', 'path': '/api/positions/?is_open={missing.status}'},
+        ], user=self.admin)
+        self.assertEqual(statuses, [('missing', 404), ('after_failed', 424), ('unknown', 424), ('status_only', 200)])
+        self.assertFalse(data['rolled_back'])
+
+    def test_atomic_rollback(self):
+        data, statuses = self.results([
+            {'id': 'created', 'method': 'POST', 'path': '/api/positions/', 'body': {'name': 'Vaqtinchalik'}},
+            {'id': 'missing', 'method': 'GET', 'path': '/api/positions/999999/'},
+            {'id': 'skipped', 'method': 'POST', 'path': '/api/positions/', 'body': {'name': 'Bajarilmaydi'}},
+        ], atomic=True, user=self.admin)
+        self.assertEqual(statuses, [('created', 201), ('missing', 404), ('skipped', 424)])
+        self.assertTrue(data['rolled_back'])
+        self.assertFalse(Position.objects.exists())
+
+    def test_rejected_paths(self):
+        self.client.force_authenticate(self.admin)
+        for path in ('/api/batch/', '/api/batch/?x=1', '/admin/', 'api/positions/', '/media/cvs/a.pdf'):
+            with self.subTest(path=path):
+                response = self.batch([{'method': 'GET', 'path': path}])
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.data)
+
+    def test_anonymous_outer_request_stays_anonymous(self):
+        data, statuses = self.results([
+            {'id': 'notifications', 'method': 'GET', 'path': '/api/notifications/'},
+            {'id': 'me', 'method': 'GET', 'path': '/api/users/me/'},
+        ])
+        self.assertEqual([code in (401, 403) for _, code in statuses], [True, True])
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """FastJSONRenderer - DRF JSONRenderer bilan bir xil natija (NaN/Infinity'da ham)"""
+
+    def assertSameAsDRF(self, data):
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_same_output(self):
+        self.assertSameAsDRF({
+            'id': 1, 'name': "Ism 'ali'", 'score': 72.5, 'empty': None, 'tags': ['a', 'b'],
+            'created_at': timezone.now(), 'ratio': Decimal('0.25'),
+        })
+
+    def test_non_finite_values_raise_like_drf(self):
+        for data in ({'rate': float('nan')}, {'rows': [{'value': float('inf')}, None]}, [None, Decimal('NaN')]):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render(data)
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render(data)
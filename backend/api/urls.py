@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .batch import BatchView
 from .views import (
     TestViewSet, QuestionViewSet, UserViewSet,
     CVViewSet, TestResultViewSet, StatisticsView, PositionViewSet,
@@ -22,5 +23,6 @@ urlpatterns = [
     path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('statistics/', StatisticsView.as_view(), name='statistics'),
     path('notifications/send/', NotificationView.as_view(), name='send_notification'),
+    path('batch/', BatchView.as_view(), name='batch'),
 ]
 
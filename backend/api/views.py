@@ -3,8 +3,12 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
+from rest_framework.renderers import BaseRenderer
+from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.contrib.auth import get_user_model
-from django.db.models import Q, Count, Avg, F
+from django.db.models import Q, Count, Avg, F, Prefetch
+from django.db.models.functions import Coalesce
 from django.db import models
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
@@ -13,28 +17,43 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from django.utils import timezone
 from datetime import timedelta
 from django.http import HttpResponse
+from django.urls import reverse
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from openpyxl import Workbook, load_workbook
 from openpyxl.styles import Font, PatternFill, Alignment
+import json
 import random
 import logging
-import asyncio
 
 logger = logging.getLogger(__name__)
 
-from users.models import CV, Position, TelegramProfile, Notification
-from users.services import send_telegram_message_async, send_notification_to_users
+from users.models import CV, CVUpload, Position, Notification, NotificationError
+from users.services import get_notification_recipients, send_telegram_message_async
+from users.outbox import enqueue_notification
+from users.cv_storage import hashing_upload_handlers
+from users.cv_text import schedule_cv_text_extraction
+from users.cv_search import search_cvs
+from users.cv_uploads import UploadError, init_upload, append_chunk, complete_upload
+from users.cv_downloads import build_cv_file_response, build_cv_preview_response, build_cv_zip_response
+from users.notification_progress import build_progress_response, progress_snapshot
+from users.telegram_identity import get_or_create_telegram_user
 from tests.models import Test, Question, AnswerOption, TestResult
 from .serializers import (
-    TestSerializer, TestListSerializer, QuestionSerializer,
-    UserSerializer, UserCreateSerializer, CVSerializer,
+    TestSerializer, TestListSerializer, TestDetailSerializer, QuestionSerializer,
+    UserSerializer, UserCreateSerializer, CVSerializer, CVSearchResultSerializer,
     TestResultSerializer, TestResultCreateSerializer, PositionSerializer,
-    NotificationSerializer, NotificationErrorSerializer
+    NotificationSerializer, NotificationErrorSerializer, UserBriefSerializer, annotate_tests_queryset
 )
+from .conditional import ConditionalGetMixin, table_stamp
+from .fields import SparseFieldsViewSetMixin
+from .renderers import FastJSONRenderer
+from .pagination import IdCursorPagination, KeysetPagination, LatestIdCursorPagination, StandardPageNumberPagination
 
 User = get_user_model()
 
 
-class PositionViewSet(viewsets.ModelViewSet):
+class PositionViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     """Position viewset - superuser uchun to'liq CRUD, boshqalar uchun faqat ochiq positionlar"""
     serializer_class = PositionSerializer
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -45,9 +64,20 @@ class PositionViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Superuser uchun barcha positionlar, boshqalar uchun faqat ochiq positionlar"""
+        queryset = Position.objects.all()
+        if self.wants_field('tests_count'):
+            queryset = PositionSerializer.annotate_queryset(queryset)
         if self.request.user.is_authenticated and self.request.user.is_superuser:
-            return Position.objects.all()
-        return Position.objects.filter(is_open=True)
+            return queryset
+        return queryset.filter(is_open=True)
+    
+    def get_content_stamps(self):
+        """Lavozimlar va (tests_count uchun) testlar hamda test-lavozim bog'lanishlari versiyasi"""
+        return [
+            table_stamp(Position.objects.all()),
+            table_stamp(Test.objects.all()),
+            table_stamp(Test.positions.through.objects.all(), field='id'),
+        ]
     
     def get_permissions(self):
         """AllowAny for list/retrieve, IsAuthenticated + is_superuser for create/update/delete"""
@@ -83,8 +113,8 @@ class PositionViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class TestViewSet(viewsets.ModelViewSet):
-    queryset = Test.objects.all().prefetch_related('questions__options', 'positions')
+class TestViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
+    queryset = Test.objects.all()
     permission_classes = [AllowAny]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['is_active', 'positions']
@@ -95,8 +125,49 @@ class TestViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'list':
             return TestListSerializer
+        if self.action == 'retrieve' and not self.include_questions():
+            return TestDetailSerializer
         return TestSerializer
     
+    def include_questions(self):
+        """Savollar banki faqat superuser ?include=questions so'raganda qaytariladi (is_correct bilan)"""
+        include = self.request.query_params.get('include', '')
+        return 'questions' in include.split(',') and self.request.user.is_authenticated and self.request.user.is_superuser
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'retrieve' and self.include_questions():
+            context['admin_view'] = True
+        return context
+    
+    def get_content_stamps(self):
+        """Testlar, savollar va javob variantlari (questions_count / savollar banki), lavozimlar va ularning bog'lanishlari versiyasi"""
+        stamps = [table_stamp(Position.objects.all())]
+        test_positions = Test.positions.through.objects.all()
+        pk = self.kwargs.get('pk')
+        if pk is None:
+            stamps += [
+                table_stamp(Test.objects.all()),
+                table_stamp(Question.objects.all()),
+                table_stamp(test_positions, field='id'),
+            ]
+            # ?telegram_id= - urinishlari tugagan testlar chiqarib tashlanadi: nomzod natijalari xulosasi
+            telegram_id = self.request.query_params.get('telegram_id')
+            if telegram_id:
+                summary = User.objects.filter(telegram_id=telegram_id).values_list('tests_total_count', 'last_test_at').first()
+                stamps.append(summary or (0, None))
+            return stamps
+        try:
+            return stamps + [
+                table_stamp(Test.objects.filter(pk=pk)),
+                table_stamp(Question.objects.filter(test_id=pk)),
+                table_stamp(AnswerOption.objects.filter(question__test_id=pk)),
+                table_stamp(test_positions.filter(test_id=pk), field='id'),
+            ]
+        except (ValueError, TypeError):
+            # Noto'g'ri pk - get_object() 404 qaytaradi
+            return stamps
+    
     def get_permissions(self):
         """
         AllowAny for list/retrieve, IsAuthenticated + is_superuser for create/update/delete
@@ -156,46 +227,40 @@ class TestViewSet(viewsets.ModelViewSet):
         # Filter out tests where user has used all attempts
         telegram_id = self.request.query_params.get('telegram_id')
         if telegram_id and self.action == 'list':
-            try:
-                user = User.objects.get(telegram_id=telegram_id)
-                # Get tests where user has completed all attempts
-                from tests.models import TestResult
-                
-                # Get test IDs where user has completed max_attempts (for real tests only)
-                completed_tests = []
-                for test in queryset:
-                    # Check real test attempts (not trial)
-                    completed_count = TestResult.objects.filter(
-                        user=user,
-                        test=test,
-                        is_trial=False,
-                        is_completed=True
-                    ).count()
-                    if completed_count >= test.max_attempts:
-                        completed_tests.append(test.id)
-                
-                # Exclude tests where all attempts are used
-                if completed_tests:
-                    queryset = queryset.exclude(id__in=completed_tests)
-            except User.DoesNotExist:
-                pass
-        
-        if self.action == 'retrieve':
-            return queryset.prefetch_related('questions__options', 'positions')
-        return queryset.prefetch_related('positions')
+            user = User.objects.filter(telegram_id=telegram_id).first()
+            if user:
+                # Real (trial emas) yakunlangan urinishlar soni - testlar bo'yicha bitta subquery
+                attempts = TestResult.objects.filter(
+                    user=user, test=models.OuterRef('pk'), is_trial=False, is_completed=True
+                ).order_by().values('test').annotate(total=Count('id')).values('total')
+                queryset = queryset.annotate(
+                    used_attempts=Coalesce(models.Subquery(attempts), 0)
+                ).filter(used_attempts__lt=F('max_attempts'))
+        
+        # Sanoqlar annotatsiya orqali - sahifadagi testlar sonidan qat'i nazar o'zgarmas so'rovlar soni
+        queryset = annotate_tests_queryset(
+            queryset,
+            questions_count=self.wants_field('questions_count'),
+            positions=self.wants_field('positions'),
+        )
+        if self.action == 'retrieve' and self.include_questions():
+            return queryset.prefetch_related('questions__options')
+        return queryset
     
     @action(detail=True, methods=['get'])
     def questions_list(self, request, pk=None):
         """Get all test questions with pagination (for superusers only)"""
-        from rest_framework.pagination import PageNumberPagination
-        from rest_framework.permissions import IsAdminUser
-        
         # Check if user is superuser
         if not request.user.is_authenticated or not request.user.is_superuser:
             return Response(
                 {'error': 'Permission denied. Superuser access required.'},
                 status=status.HTTP_403_FORBIDDEN
             )
+        # Savollar banki o'zgarmagan bo'lsa - 304 (ETag / Last-Modified)
+        return self.conditional(self.questions_page, request)
+    
+    def questions_page(self, request):
+        from rest_framework.pagination import PageNumberPagination
         
         test = self.get_object()
         questions = test.questions.all().prefetch_related('options').order_by('order', 'id')
@@ -1015,9 +1080,10 @@ class TestViewSet(viewsets.ModelViewSet):
         return response
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['position']
     search_fields = ['username', 'first_name', 'last_name', 'email', 'phone']
@@ -1029,6 +1095,13 @@ class UserViewSet(viewsets.ModelViewSet):
             return UserCreateSerializer
         return UserSerializer
 
+    def get_queryset(self):
+        return UserSerializer.annotate_queryset(
+            super().get_queryset(),
+            telegram_profile=self.wants_field('telegram_profile'),
+            position=self.wants_field('position'),
+        )
+
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def me(self, request):
         """Get current authenticated user"""
@@ -1037,100 +1110,28 @@ class UserViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def telegram_auth(self, request):
-        """Authenticate user by Telegram ID and update Telegram info"""
+        """
+        Authenticate user by Telegram ID and update Telegram info (idempotent).
+        TelegramProfile faqat o'zgargan maydonlar bo'yicha yoziladi. issue_tokens=false - JWT
+        yaratilmaydi (bot faqat foydalanuvchi ma'lumotini ishlatadi).
+        """
         telegram_id = request.data.get('telegram_id')
         if not telegram_id:
             return Response({'error': 'telegram_id is required'}, status=status.HTTP_400_BAD_REQUEST)
-
         try:
-            user = User.objects.get(telegram_id=telegram_id)
-            # Update TelegramProfile, not User's first_name/last_name
-            try:
-                telegram_profile = TelegramProfile.objects.get(telegram_id=telegram_id)
-                # Update existing profile
-                telegram_profile.user = user
-            except TelegramProfile.DoesNotExist:
-                # Create new profile
-                telegram_profile = TelegramProfile.objects.create(
-                    user=user,
-                    telegram_id=telegram_id,
-                    telegram_is_premium=False,
-                    telegram_is_bot=False
-                )
-            
-            # Update TelegramProfile info if provided
-            if 'telegram_username' in request.data:
-                telegram_profile.telegram_username = request.data.get('telegram_username')
-            if 'telegram_language_code' in request.data:
-                telegram_profile.telegram_language_code = request.data.get('telegram_language_code')
-            
-            # Always ensure telegram_is_premium is set (NOT NULL constraint)
-            # Set it explicitly to avoid None values
-            if 'telegram_is_premium' in request.data:
-                telegram_profile.telegram_is_premium = bool(request.data.get('telegram_is_premium', False))
-            else:
-                # If not provided, ensure it's set to False (not None)
-                telegram_profile.telegram_is_premium = False if telegram_profile.telegram_is_premium is None else bool(telegram_profile.telegram_is_premium)
-            
-            # Always ensure telegram_is_bot is set (NOT NULL constraint)
-            telegram_profile.telegram_is_bot = False if telegram_profile.telegram_is_bot is None else bool(telegram_profile.telegram_is_bot)
-            
-            # Update telegram first_name and last_name (NOT User's first_name/last_name)
-            if 'first_name' in request.data:
-                telegram_first_name = request.data.get('first_name', '')
-                telegram_profile.telegram_first_name = telegram_first_name if telegram_first_name is not None else ''
-            if 'last_name' in request.data:
-                telegram_last_name = request.data.get('last_name', '')
-                telegram_profile.telegram_last_name = telegram_last_name if telegram_last_name is not None else ''
-            
-            # Update user's telegram_id if not set
-            if not user.telegram_id:
-                user.telegram_id = telegram_id
-                user.save()
-            
-            telegram_profile.save()
-            
-            refresh = RefreshToken.for_user(user)
-            return Response({
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-                'user': UserSerializer(user).data
-            })
-        except User.DoesNotExist:
-            # Create user if not exists (without telegram first_name/last_name)
-            user = User.objects.create_user(
-                username=f'user_{telegram_id}',
-                telegram_id=telegram_id,
-                # Don't set first_name/last_name from telegram - user will fill it during registration
-                first_name='',
-                last_name=''
-            )
-            
-            # Create TelegramProfile with telegram info
-            telegram_first_name = request.data.get('first_name', '') or ''
-            telegram_last_name = request.data.get('last_name', '') or ''
-            if telegram_first_name is None:
-                telegram_first_name = ''
-            if telegram_last_name is None:
-                telegram_last_name = ''
-            
-            telegram_profile = TelegramProfile.objects.create(
-                user=user,
-                telegram_id=telegram_id,
-                telegram_first_name=telegram_first_name,
-                telegram_last_name=telegram_last_name,
-                telegram_username=request.data.get('telegram_username'),
-                telegram_language_code=request.data.get('telegram_language_code'),
-                telegram_is_premium=request.data.get('telegram_is_premium', False),
-                telegram_is_bot=False
-            )
-            
+            telegram_id = int(telegram_id)
+        except (TypeError, ValueError):
+            return Response({'error': 'telegram_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        user, created = get_or_create_telegram_user(
+            UserSerializer.annotate_queryset(User.objects.all()), telegram_id, request.data
+        )
+
+        data = {'user': UserSerializer(user).data}
+        if str(request.data.get('issue_tokens', True)).lower() not in ('false', '0'):
             refresh = RefreshToken.for_user(user)
-            return Response({
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-                'user': UserSerializer(user).data
-            }, status=status.HTTP_201_CREATED)
+            data = {'refresh': str(refresh), 'access': str(refresh.access_token), **data}
+        return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
     @action(detail=False, methods=['post'])
     def create_telegram_user(self, request):
@@ -1322,27 +1323,35 @@ class QuestionViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class CVViewSet(viewsets.ModelViewSet):
+class CVViewSet(SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     serializer_class = CVSerializer
     permission_classes = [AllowAny]  # Bot uchun ochiq qildik
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['user']
     ordering_fields = ['uploaded_at']
     ordering = ['-uploaded_at']
 
     def get_queryset(self):
+        # Preview va snippet uchun blob/text bitta query'da (to'liq matn yuklanmaydi)
+        queryset = CV.objects.select_related('blob')
+        if self.wants_field('snippet'):
+            queryset = queryset.select_related('text').defer('text__content')
+        if self.wants_field('user'):
+            queryset = UserSerializer.annotate_queryset(queryset, prefix='user__')
+
         # Staff uchun barcha CV'lar
         if self.request.user.is_authenticated and self.request.user.is_staff:
-            return CV.objects.all()
+            return queryset
         
         # Telegram ID bo'yicha filter (bot uchun)
         telegram_id = self.request.query_params.get('user__telegram_id')
         if telegram_id:
-            return CV.objects.filter(user__telegram_id=telegram_id)
+            return queryset.filter(user__telegram_id=telegram_id)
         
         # Authenticated user uchun faqat o'z CV'lari
         if self.request.user.is_authenticated:
-            return CV.objects.filter(user=self.request.user)
+            return queryset.filter(user=self.request.user)
         
         return CV.objects.none()
 
@@ -1352,7 +1361,7 @@ class CVViewSet(viewsets.ModelViewSet):
         if telegram_id:
             try:
                 user = User.objects.get(telegram_id=telegram_id)
-                serializer.save(user=user)
+                cv = serializer.save(user=user)
             except User.DoesNotExist:
                 from rest_framework import serializers as drf_serializers
                 raise drf_serializers.ValidationError("User not found")
@@ -1360,9 +1369,14 @@ class CVViewSet(viewsets.ModelViewSet):
             if not self.request.user.is_authenticated:
                 from rest_framework import serializers as drf_serializers
                 raise drf_serializers.ValidationError("Authentication required")
-            serializer.save(user=self.request.user)
+            cv = serializer.save(user=self.request.user)
+        
+        # Matnni ajratib olish - request'dan tashqarida, process pool'da
+        schedule_cv_text_extraction(cv)
     
     def create(self, request, *args, **kwargs):
+        # sha256 fayl qabul qilinayotganda hisoblanadi (request.data'dan oldin o'rnatilishi kerak)
+        request._request.upload_handlers = hashing_upload_handlers(request._request)
         response = super().create(request, *args, **kwargs)
         
         # CV yuklanganidan keyin xabar
@@ -1375,6 +1389,128 @@ class CVViewSet(viewsets.ModelViewSet):
         
         return response
     
+    def _upload_response(self, upload, status_code=status.HTTP_200_OK):
+        return Response({
+            'upload_id': str(upload.id),
+            'file_name': upload.file_name,
+            'file_size': upload.file_size,
+            'offset': upload.offset,
+            'chunk_size': settings.CV_UPLOAD_CHUNK_SIZE,
+            'status': upload.status,
+        }, status=status_code, headers={'Upload-Offset': str(upload.offset)})
+    
+    def _upload_error_response(self, error):
+        data = {'error': str(error)}
+        headers = {}
+        if error.offset is not None:
+            data['offset'] = error.offset
+            headers['Upload-Offset'] = str(error.offset)
+        return Response(data, status=error.status_code, headers=headers)
+    
+    def _get_owned_upload(self, request, upload_id):
+        """
+        Upload faqat uni boshlagan foydalanuvchiga tegishli: bot - Telegram-Id header yoki ?telegram_id=,
+        dashboard - o'sha user (yoki staff). Boshqalar uchun 404 (upload mavjudligi oshkor qilinmaydi).
+        """
+        try:
+            upload = CVUpload.objects.select_related('user').get(pk=upload_id)
+        except (CVUpload.DoesNotExist, ValueError, DjangoValidationError):
+            return None
+        if request.user.is_authenticated and (request.user.is_staff or request.user.pk == upload.user_id):
+            return upload
+        telegram_id = request.META.get('HTTP_TELEGRAM_ID') or request.query_params.get('telegram_id')
+        if telegram_id and upload.user.telegram_id and str(upload.user.telegram_id) == str(telegram_id).strip():
+            return upload
+        return None
+    
+    @action(detail=False, methods=['post'], url_path='uploads')
+    def upload_init(self, request):
+        """Start chunked CV upload session (bot uchun telegram_id orqali)"""
+        telegram_id = request.data.get('telegram_id')
+        if telegram_id:
+            try:
+                user = User.objects.get(telegram_id=telegram_id)
+            except User.DoesNotExist:
+                return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+        elif request.user.is_authenticated:
+            user = request.user
+        else:
+            return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        try:
+            upload = init_upload(user, request.data.get('file_name'), request.data.get('file_size'))
+        except UploadError as e:
+            return self._upload_error_response(e)
+        return self._upload_response(upload, status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['get', 'put'], url_path=r'uploads/(?P<upload_id>[0-9a-f-]+)')
+    def upload_chunk(self, request, upload_id=None):
+        """
+        GET - joriy offset (davom ettirish uchun)
+        PUT - raw chunk, Upload-Offset header (yoki ?offset=) bilan
+        """
+        upload = self._get_owned_upload(request, upload_id)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        if request.method == 'GET':
+            return self._upload_response(upload)
+        
+        offset = request.META.get('HTTP_UPLOAD_OFFSET', request.query_params.get('offset'))
+        try:
+            offset = int(offset)
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (TypeError, ValueError):
+            return Response({'error': 'Upload-Offset header is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # request.data'ga tegmaymiz - body parser'siz, stream'dan bo'lib o'qiladi
+        try:
+            upload = append_chunk(upload, request.stream, offset, content_length)
+        except UploadError as e:
+            return self._upload_error_response(e)
+        return self._upload_response(upload)
+    
+    @action(detail=False, methods=['post'], url_path=r'uploads/(?P<upload_id>[0-9a-f-]+)/complete')
+    def upload_complete(self, request, upload_id=None):
+        """Finish chunked upload and create CV"""
+        upload = self._get_owned_upload(request, upload_id)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            cv = complete_upload(upload.pk)
+        except UploadError as e:
+            return self._upload_error_response(e)
+        
+        response_data = CVSerializer(cv, context=self.get_serializer_context()).data
+        response_data['message'] = (
+            "✅ CV muvaffaqiyatli yuklandi!\n\n"
+            "Biz sizga tez orada aloqaga chiqamiz va siz bilan birinchi Zoom interview uchun maslahatlarimizni beramiz.\n\n"
+            "Rahmat!"
+        )
+        return Response(response_data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def search(self, request):
+        """Full-text search over extracted CV text - only for staff users"""
+        if not request.user.is_staff:
+            return Response(
+                {'error': 'Permission denied. Staff access required.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'q parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Relevance bo'yicha tartiblangan natijalar (queryset emas) - sahifa raqami bo'yicha
+        paginator = StandardPageNumberPagination()
+        page = paginator.paginate_queryset(search_cvs(query), request, view=self)
+        serializer = CVSearchResultSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+    
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def export_excel(self, request):
         """Export CVs to Excel - only for authenticated users"""
@@ -1427,15 +1563,41 @@ class CVViewSet(viewsets.ModelViewSet):
         wb.save(response)
         return response
     
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def download(self, request, pk=None):
+        """
+        CV faylni yuklab olish - ruxsat Django'da tekshiriladi.
+        nginx orqasida X-Accel-Redirect, aks holda Range qo'llab-quvvatlaydigan stream.
+        """
+        queryset = CV.objects.select_related('blob')
+        if not request.user.is_staff:
+            queryset = queryset.filter(user=request.user)
+        cv = queryset.filter(pk=pk).first()
+        if cv is None or not cv.file:
+            return Response(
+                {'error': 'CV topilmadi yoki ruxsat yo\'q'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return build_cv_file_response(request, cv)
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def preview(self, request, pk=None):
+        """CV birinchi sahifasi thumbnail'i - download bilan bir xil ruxsat"""
+        queryset = CV.objects.select_related('blob')
+        if not request.user.is_staff:
+            queryset = queryset.filter(user=request.user)
+        cv = queryset.filter(pk=pk).first()
+        if cv is None or not cv.blob_id or not cv.blob.preview:
+            return Response(
+                {'error': 'Preview topilmadi yoki ruxsat yo\'q'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return build_cv_preview_response(request, cv)
+
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def download_zip(self, request):
         """Download CV files as ZIP - only for authenticated users"""
-        import zipfile
-        import io
-        import os
-        from django.http import HttpResponse
         from django.utils import timezone
-        from django.core.files.storage import default_storage
         
         # Get CV IDs from request (can be list or single ID)
         cv_ids = request.data.get('cv_ids', [])
@@ -1466,46 +1628,14 @@ class CVViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Create ZIP file in memory
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for cv in queryset:
-                if cv.file and default_storage.exists(cv.file.name):
-                    try:
-                        # Get file content
-                        file_content = default_storage.open(cv.file.name).read()
-                        
-                        # Create filename: UserName_CV_ID_OriginalFileName
-                        user_name = f"{cv.user.first_name}_{cv.user.last_name}".strip() if cv.user else ''
-                        if not user_name and cv.user:
-                            user_name = cv.user.username
-                        if not user_name:
-                            user_name = 'Unknown'
-                        
-                        # Clean filename (remove invalid characters)
-                        user_name = "".join(c for c in user_name if c.isalnum() or c in (' ', '-', '_')).strip()
-                        user_name = user_name.replace(' ', '_')
-                        
-                        original_filename = cv.file.name.split('/')[-1]
-                        zip_filename = f"{user_name}_CV_{cv.id}_{original_filename}"
-                        
-                        # Add file to ZIP
-                        zip_file.writestr(zip_filename, file_content)
-                    except Exception as e:
-                        # Skip files that can't be read
-                        continue
-        
-        # Prepare response
-        zip_buffer.seek(0)
-        response = HttpResponse(zip_buffer.read(), content_type='application/zip')
+        # ZIP vaqtinchalik faylda yig'iladi va stream qilinadi (xotiraga yuklanmaydi)
         filename = f"cvs_{timezone.now().strftime('%Y%m%d_%H%M%S')}.zip"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
+        return build_cv_zip_response(queryset.select_related('user'), filename)
 
 
-class TestResultViewSet(viewsets.ModelViewSet):
+class TestResultViewSet(SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     permission_classes = [AllowAny]  # Bot uchun ochiq qildik, filter orqali cheklaymiz
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['test', 'user']
     search_fields = ['user__username', 'user__first_name', 'user__last_name', 'test__title']
@@ -1518,24 +1648,33 @@ class TestResultViewSet(viewsets.ModelViewSet):
         return TestResultSerializer
 
     def get_queryset(self):
+        # Nested user (telegram_profile, position), test va javoblar - har bir qator uchun qo'shimcha so'rovsiz,
+        # ?fields= / ?omit= bilan so'ralmaganlari yuklanmaydi
+        queryset = TestResult.objects.filter(is_completed=True)
+        if self.wants_field('user'):
+            queryset = UserSerializer.annotate_queryset(queryset, prefix='user__')
+        if self.wants_field('test'):
+            queryset = queryset.prefetch_related(Prefetch('test', queryset=annotate_tests_queryset(Test.objects.all())))
+        elif self.wants_field('is_passed'):
+            # is_passed - test.passing_score kerak
+            queryset = queryset.select_related('test').only(
+                *[field.attname for field in TestResult._meta.concrete_fields], 'test__id', 'test__passing_score'
+            )
+        if self.wants_field('answers'):
+            queryset = queryset.prefetch_related('answers__question__options', 'answers__selected_option')
+        
         # Staff uchun barcha natijalar
         if self.request.user.is_authenticated and self.request.user.is_staff:
-            return TestResult.objects.filter(is_completed=True).select_related('user', 'test')
+            return queryset
         
         # Telegram ID bo'yicha filter (bot uchun)
         telegram_id = self.request.query_params.get('user__telegram_id')
         if telegram_id:
-            return TestResult.objects.filter(
-                user__telegram_id=telegram_id,
-                is_completed=True
-            ).select_related('user', 'test')
+            return queryset.filter(user__telegram_id=telegram_id)
         
         # Authenticated user uchun faqat o'z natijalari
         if self.request.user.is_authenticated:
-            return TestResult.objects.filter(
-                user=self.request.user,
-                is_completed=True
-            ).select_related('user', 'test')
+            return queryset.filter(user=self.request.user)
         
         # Unauthenticated - bo'sh queryset
         return TestResult.objects.none()
@@ -1865,17 +2004,97 @@ class StatisticsView(APIView):
         })
 
 
+class EventStreamRenderer(BaseRenderer):
+    """text/event-stream - content negotiation uchun (javob StreamingHttpResponse sifatida qaytadi)"""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Xato javoblari (401/404) - SSE freymi sifatida
+        return f"event: error\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class QueryTokenJWTAuthentication(JWTAuthentication):
+    """
+    JWT ?token= query parametridan - EventSource Authorization header yubora olmaydi.
+    Faqat SSE endpoint'larida ishlatiladi (token access log'ga tushishi mumkin).
+    """
+
+    def authenticate(self, request):
+        raw_token = request.query_params.get('token')
+        if not raw_token:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return self.get_user(validated_token), validated_token
+
+
 class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     """Notification ViewSet - list, retrieve, filter, search"""
-    queryset = Notification.objects.all().prefetch_related('recipients', 'errors', 'created_by').order_by('-created_at')
+    queryset = NotificationSerializer.annotate_queryset(Notification.objects.all()).order_by('-created_at')
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['send_to_all', 'created_by']
     search_fields = ['title', 'message']
     ordering_fields = ['created_at', 'sent_at', 'title']
     ordering = ['-created_at']
 
+    @action(
+        detail=True,
+        methods=['get'],
+        renderer_classes=[EventStreamRenderer, FastJSONRenderer],
+        authentication_classes=[JWTAuthentication, QueryTokenJWTAuthentication, SessionAuthentication],
+    )
+    def progress(self, request, pk=None):
+        """
+        Broadcast progress (sent/failed/pending, msg/s, taxminiy tugash vaqti)
+        GET /api/notifications/{id}/progress/?format=json - bitta snapshot (short-poll, sync worker'lar uchun)
+        GET /api/notifications/{id}/progress/?token=<access_token> - server-sent events
+        """
+        if request.accepted_renderer.format == 'json':
+            snapshot = progress_snapshot(pk)
+            if snapshot is None:
+                return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(snapshot)
+        if not Notification.objects.filter(pk=pk).exists():
+            return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+        return build_progress_response(pk)
+
+    def paginated_subresource(self, queryset, serializer_class, pagination_class):
+        paginator = pagination_class()
+        # view=None - ViewSet'ning OrderingFilter/ordering'i emas, pagination'ning o'z (id) tartibi ishlatiladi
+        page = paginator.paginate_queryset(queryset, self.request, view=None)
+        serializer = serializer_class(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def recipients(self, request, pk=None):
+        """
+        Qabul qiluvchilar - cursor pagination
+        GET /api/notifications/{id}/recipients/?page_size=50&cursor=...
+        """
+        notification = Notification.objects.filter(pk=pk).only('id', 'send_to_all').first()
+        if notification is None:
+            return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+        if notification.send_to_all:
+            # Yuborishda ishlatiladigan filtr (ulanmagan, xabarlarni o'chirgan, yetib bo'lmaydiganlar chiqariladi)
+            queryset = get_notification_recipients(notification)
+        else:
+            queryset = notification.recipients.all()
+        return self.paginated_subresource(queryset, UserBriefSerializer, IdCursorPagination)
+
+    @action(detail=True, methods=['get'])
+    def errors(self, request, pk=None):
+        """
+        Yuborish xatoliklari (eng yangilari birinchi) - cursor pagination
+        GET /api/notifications/{id}/errors/?page_size=50&cursor=...
+        """
+        if not Notification.objects.filter(pk=pk).exists():
+            return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+        queryset = NotificationError.objects.filter(notification_id=pk).select_related('user')
+        return self.paginated_subresource(queryset, NotificationErrorSerializer, LatestIdCursorPagination)
+
 
 class NotificationView(APIView):
     """Send notification to selected users"""
@@ -1930,38 +2149,31 @@ class NotificationView(APIView):
                 # Tashakkur va rag'batlantirish uchun format
                 formatted_message = f"🙏 <b>Tashakkur</b>\n\n{message}"
             
-            # Create notification
+            # Create notification - sent_at (yuborish oynasining boshi) navbatga qo'yishdan oldin
             notification = Notification.objects.create(
                 title=title,
                 message=formatted_message,
                 send_to_all=False,
+                sent_at=timezone.now(),
                 created_by=request.user if request.user.is_authenticated else None
             )
             
             # Add recipients
             notification.recipients.set(users)
             
-            # Send notifications
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(send_notification_to_users(notification))
-            loop.close()
-            
-            # Update notification stats
-            notification.sent_at = timezone.now()
-            notification.total_recipients = result['total']
-            notification.successful_sends = result['successful']
-            notification.failed_sends = result['failed']
-            notification.save()
+            # Outbox'ga navbatga qo'yiladi - yuborishni worker bajaradi (python manage.py send_notifications),
+            # holatini /api/notifications/{id}/progress/ (JSON short-poll yoki SSE) ko'rsatadi
+            queued = enqueue_notification(notification)
+            notification.refresh_from_db(fields=['total_recipients'])
             
             return Response({
                 'success': True,
-                'message': 'Notification sent successfully',
-                'total': result['total'],
-                'successful': result['successful'],
-                'failed': result['failed'],
-                'notification_id': notification.id
-            })
+                'message': 'Notification queued',
+                'notification_id': notification.id,
+                'total': notification.total_recipients,
+                'queued': queued,
+                'progress_url': reverse('notification-progress', args=[notification.id]),
+            }, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
             logger.error(f"Error sending notification: {e}", exc_info=True)
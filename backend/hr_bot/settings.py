@@ -63,6 +63,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -191,6 +192,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    # orjson o'rnatilgan bo'lsa tezkor yo'l, aks holda DRF standart json (api/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': (
@@ -243,11 +254,57 @@ CSRF_TRUSTED_ORIGINS = env.list(
 # Telegram Bot settings
 TELEGRAM_BOT_TOKEN = env('TELEGRAM_BOT_TOKEN', default='')
 TELEGRAM_WEBAPP_URL = env('TELEGRAM_WEBAPP_URL', default='https://unfunereal-matilda-frenular.ngrok-free.dev/webapp')
+TELEGRAM_API_BASE = env('TELEGRAM_API_BASE', default='https://api.telegram.org')
+
+# Broadcast (ommaviy xabar) limitlari - Telegram: ~30 msg/s global, ~1 msg/s bitta chat uchun
+TELEGRAM_BROADCAST_CONCURRENCY = env.int('TELEGRAM_BROADCAST_CONCURRENCY', default=20)
+TELEGRAM_BROADCAST_RATE = env.float('TELEGRAM_BROADCAST_RATE', default=28.0)
+TELEGRAM_BROADCAST_CHAT_RATE = env.float('TELEGRAM_BROADCAST_CHAT_RATE', default=1.0)
+TELEGRAM_BROADCAST_MAX_RETRIES = env.int('TELEGRAM_BROADCAST_MAX_RETRIES', default=3)
+# Ommaviy yuborish uchun ishlatilmaydigan ulush - interaktiv bot trafigi (test ishlayotgan nomzodlar) uchun zaxira
+TELEGRAM_BROADCAST_HEADROOM = env.float('TELEGRAM_BROADCAST_HEADROOM', default=0.2)
+
+# Sync Django kodidan Telegram chaqiruvlari - jarayon bo'yicha bitta fon event loop (users.dispatcher)
+TELEGRAM_DISPATCHER_POOL_SIZE = env.int('TELEGRAM_DISPATCHER_POOL_SIZE', default=10)
+TELEGRAM_DISPATCHER_TIMEOUT = env.float('TELEGRAM_DISPATCHER_TIMEOUT', default=15.0)
+
+# Notification outbox worker (python manage.py send_notifications)
+NOTIFICATION_DELIVERY_BATCH_SIZE = env.int('NOTIFICATION_DELIVERY_BATCH_SIZE', default=200)
+NOTIFICATION_DELIVERY_LEASE_SECONDS = env.int('NOTIFICATION_DELIVERY_LEASE_SECONDS', default=600)
+NOTIFICATION_DELIVERY_MAX_ATTEMPTS = env.int('NOTIFICATION_DELIVERY_MAX_ATTEMPTS', default=3)
+# Natijalar buferi - shuncha natija yoki shuncha soniyada bir marta DB'ga yoziladi.
+# Worker flush'dan oldin to'xtasa buferdagi yuborilgan xabarlar qayta yuboriladi - shuning uchun kichik (ko'pi bilan 100)
+NOTIFICATION_STATS_FLUSH_SIZE = env.int('NOTIFICATION_STATS_FLUSH_SIZE', default=50)
+NOTIFICATION_STATS_FLUSH_INTERVAL = env.float('NOTIFICATION_STATS_FLUSH_INTERVAL', default=2.0)
+# Progress SSE oqimi - hisoblagichlarni o'qish oralig'i va bitta ulanish davomiyligi (gunicorn timeout'idan kichik)
+# (dashboard va admin sync worker'larda ?format=json short-poll ishlatadi - SSE async/gthread worker'lar uchun)
+NOTIFICATION_PROGRESS_INTERVAL = env.float('NOTIFICATION_PROGRESS_INTERVAL', default=1.0)
+NOTIFICATION_PROGRESS_STREAM_SECONDS = env.int('NOTIFICATION_PROGRESS_STREAM_SECONDS', default=25)
+
+# Javoblarni gzip bilan siqish (api.middleware.CompressionMiddleware) - shundan kichik javoblar siqilmaydi
+API_COMPRESSION_MIN_LENGTH = env.int('API_COMPRESSION_MIN_LENGTH', default=1024)
+
+# /api/batch/ - bitta batch'dagi sub-so'rovlar soni chegarasi
+API_BATCH_MAX_REQUESTS = env.int('API_BATCH_MAX_REQUESTS', default=20)
 
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 
+# Chunked CV upload (bot -> backend), har bir chunk alohida so'rovda keladi
+CV_UPLOAD_CHUNK_SIZE = env.int('CV_UPLOAD_CHUNK_SIZE', default=512 * 1024)  # 512KB
+CV_UPLOAD_MAX_SIZE = env.int('CV_UPLOAD_MAX_SIZE', default=20 * 1024 * 1024)  # 20MB (Telegram bot limiti)
+CV_UPLOAD_TEMP_DIR = env('CV_UPLOAD_TEMP_DIR', default=str(BASE_DIR / 'tmp' / 'cv_uploads'))
+
+# Protected CV download - nginx orqasida X-Accel-Redirect (internal location /protected-media/ -> MEDIA_ROOT)
+CV_DOWNLOAD_ACCEL = env.bool('CV_DOWNLOAD_ACCEL', default=False)
+CV_DOWNLOAD_ACCEL_PREFIX = env('CV_DOWNLOAD_ACCEL_PREFIX', default='/protected-media/')
+CV_DOWNLOAD_MAX_AGE = env.int('CV_DOWNLOAD_MAX_AGE', default=3600)
+
+# CV text extraction (process pool) va full-text qidiruv
+CV_TEXT_EXTRACTION_WORKERS = env.int('CV_TEXT_EXTRACTION_WORKERS', default=2)
+CV_TEXT_MAX_CHARS = env.int('CV_TEXT_MAX_CHARS', default=200000)
+
 # Logging configuration
 LOGGING = {
     'version': 1,
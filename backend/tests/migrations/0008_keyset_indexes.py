@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0007_test_max_trial_attempts_alter_test_max_attempts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testresult',
+            index=models.Index(fields=['completed_at', 'id'], name='tests_testr_complet_3cbb6c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testresult',
+            index=models.Index(fields=['score', 'id'], name='tests_testr_score_2d1202_idx'),
+        ),
+    ]
@@ -41,6 +41,7 @@ class Question(models.Model):
     text = models.TextField(verbose_name=_('Question Text'))
     order = models.IntegerField(default=0, verbose_name=_('Order'))
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated at'))
 
     class Meta:
         verbose_name = _('Question')
@@ -57,6 +58,7 @@ class AnswerOption(models.Model):
     text = models.CharField(max_length=500, verbose_name=_('Answer Text'))
     is_correct = models.BooleanField(default=False, verbose_name=_('Is Correct'))
     order = models.IntegerField(default=0, verbose_name=_('Order'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated at'))
 
     class Meta:
         verbose_name = _('Answer Option')
@@ -85,6 +87,10 @@ class TestResult(models.Model):
         verbose_name = _('Test Result')
         verbose_name_plural = _('Test Results')
         ordering = ['-completed_at']
+        indexes = [
+            models.Index(fields=['completed_at', 'id']),
+            models.Index(fields=['score', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.test.title} - {self.score}%"
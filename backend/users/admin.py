@@ -7,10 +7,13 @@ from django.http import HttpResponseRedirect
 from django.urls import reverse, path
 from django.shortcuts import get_object_or_404, redirect, render
 from django import forms
-import asyncio
+from django.db import transaction
+from django.db.models import Count, F
 import logging
-from .models import User, CV, Position, TelegramProfile, Notification, NotificationError
-from .services import send_notification_to_users, send_telegram_message_async
+from .models import User, CV, CVBlob, CVText, Position, TelegramProfile, Notification, NotificationError, NotificationDelivery
+from .services import send_telegram_message_sync
+from .outbox import enqueue_notification, projected_completion
+from .notification_templates import PLACEHOLDERS
 from tests.models import Test, TestResult
 
 logger = logging.getLogger(__name__)
@@ -37,20 +40,58 @@ class TelegramProfileAdmin(admin.ModelAdmin):
     raw_id_fields = ['user']
 
 
+class TelegramReachableFilter(admin.SimpleListFilter):
+    title = 'Telegram yetkazish'
+    parameter_name = 'telegram_reachable'
+    
+    def lookups(self, request, model_admin):
+        return (
+            ('yes', 'Yetib boradi'),
+            ('no', 'Yetib bo\'lmaydi (bloklagan / chat topilmadi)'),
+        )
+    
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(telegram_unreachable_at__isnull=True)
+        if self.value() == 'no':
+            return queryset.filter(telegram_unreachable_at__isnull=False)
+        return queryset
+
+
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = ['username', 'first_name', 'last_name', 'email', 'phone', 'position', 'telegram_id', 'is_blocked', 'is_staff', 'created_at']
-    list_filter = ['is_staff', 'is_superuser', 'is_blocked', 'position', 'created_at']
+    list_filter = ['is_staff', 'is_superuser', 'is_blocked', TelegramReachableFilter, 'position', 'created_at']
     search_fields = ['username', 'first_name', 'last_name', 'email', 'phone', 'telegram_id']
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Additional Info', {'fields': ('telegram_id', 'phone', 'position')}),
         ('Block Status', {'fields': ('is_blocked', 'blocked_reason', 'blocked_at')}),
+        ('Telegram Delivery', {'fields': ('notification_enabled', 'telegram_unreachable_at', 'telegram_unreachable_reason')}),
         ('Trial Tests', {'fields': ('trial_tests_taken',)}),
+        ('Test Results', {'fields': ('tests_total_count', 'tests_passed_count', 'best_score', 'last_test_at')}),
     )
     add_fieldsets = BaseUserAdmin.add_fieldsets + (
         ('Additional Info', {'fields': ('telegram_id', 'phone', 'position')}),
     )
-    readonly_fields = ['blocked_at']
+    readonly_fields = ['blocked_at', 'telegram_unreachable_at', 'telegram_unreachable_reason',
+                       'tests_total_count', 'tests_passed_count', 'best_score', 'last_test_at']
+    actions = ['enable_telegram_delivery']
+    
+    @admin.action(description="Telegram xabarlarini qayta yoqish (yetib bo'lmaydi belgisini olib tashlash)")
+    def enable_telegram_delivery(self, request, queryset):
+        updated = queryset.filter(telegram_unreachable_at__isnull=False).update(
+            telegram_unreachable_at=None,
+            telegram_unreachable_reason=None
+        )
+        messages.success(request, f"✅ {updated} ta foydalanuvchi uchun Telegram xabarlari qayta yoqildi")
+
+
+class CVTextInline(admin.StackedInline):
+    model = CVText
+    extra = 0
+    can_delete = False
+    fields = ['status', 'extracted_at', 'error_message', 'snippet', 'content']
+    readonly_fields = ['status', 'extracted_at', 'error_message', 'snippet', 'content']
 
 
 @admin.register(CV)
@@ -58,7 +99,18 @@ class CVAdmin(admin.ModelAdmin):
     list_display = ['user', 'file_name', 'file_size', 'uploaded_at']
     list_filter = ['uploaded_at']
     search_fields = ['user__username', 'user__first_name', 'user__last_name', 'file_name']
-    readonly_fields = ['uploaded_at', 'file_size']
+    readonly_fields = ['uploaded_at', 'file_size', 'blob']
+    inlines = [CVTextInline]
+
+
+@admin.register(CVBlob)
+class CVBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'file', 'size', 'ref_count', 'created_at']
+    search_fields = ['sha256', 'file']
+    readonly_fields = ['sha256', 'file', 'size', 'ref_count', 'preview', 'created_at']
+    
+    def has_add_permission(self, request):
+        return False  # Blob'lar faqat CV yuklanganda yaratiladi
 
 
 @admin.register(NotificationError)
@@ -92,12 +144,37 @@ class NotificationErrorAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         return True  # Xatoliklarni o'chirish mumkin
+    
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, NotificationError.objects.filter(pk=obj.pk))
+    
+    def delete_queryset(self, request, queryset):
+        """O'chirilgan xatoliklar Notification.errors_count hisoblagichidan ham ayriladi"""
+        with transaction.atomic():
+            counts = queryset.order_by().values('notification_id').annotate(total=Count('id'))
+            for row in counts:
+                Notification.objects.filter(pk=row['notification_id']).update(
+                    errors_count=F('errors_count') - row['total']
+                )
+            queryset.delete()
+
+
+@admin.register(NotificationDelivery)
+class NotificationDeliveryAdmin(admin.ModelAdmin):
+    list_display = ['notification', 'user', 'telegram_id', 'status', 'attempts', 'sent_at', 'updated_at']
+    list_filter = ['status', 'notification']
+    search_fields = ['notification__title', 'user__username', 'user__first_name', 'user__last_name', 'telegram_id']
+    readonly_fields = ['notification', 'user', 'telegram_id', 'status', 'attempts', 'last_error', 'locked_at', 'sent_at', 'created_at', 'updated_at']
+    raw_id_fields = ['notification', 'user']
+    
+    def has_add_permission(self, request):
+        return False  # Yozuvlar faqat navbatga qo'yilganda yaratiladi
 
 
 class TestNotificationForm(forms.Form):
     """Form for sending test notification to a single user"""
     user = forms.ModelChoiceField(
-        queryset=User.objects.filter(telegram_id__isnull=False, notification_enabled=True, is_active=True).exclude(telegram_id=0),
+        queryset=User.objects.filter(telegram_id__isnull=False, telegram_unreachable_at__isnull=True, notification_enabled=True, is_active=True).exclude(telegram_id=0),
         label='Foydalanuvchi',
         help_text='Xabarni oladigan foydalanuvchi'
     )
@@ -122,26 +199,35 @@ class TestNotificationForm(forms.Form):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ['title', 'send_to_all_display', 'recipients_count', 'status_display', 'statistics_display', 'errors_count_display', 'created_at', 'created_by']
-    list_filter = ['send_to_all', 'sent_at', 'created_at']
+    list_display = ['title', 'send_to_all_display', 'recipients_count', 'status_display', 'statistics_display', 'errors_count_display', 'projected_completion_display', 'created_at', 'created_by']
+    list_filter = ['send_to_all', 'sent_at', 'scheduled_at', 'created_at']
     search_fields = ['title', 'message']
     
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
         extra_context['test_notification_url'] = reverse('admin:users_notification_send_test')
         return super().changelist_view(request, extra_context)
-    readonly_fields = ['sent_at', 'created_at', 'updated_at', 'total_recipients', 'successful_sends', 'failed_sends', 'statistics_display', 'errors_link']
+    readonly_fields = ['sent_at', 'created_at', 'updated_at', 'total_recipients', 'successful_sends', 'failed_sends', 'errors_count', 'statistics_display', 'projected_completion_display', 'errors_link']
     filter_horizontal = ['recipients']
     fieldsets = (
         ('Xabar Ma\'lumotlari', {
-            'fields': ('title', 'message')
+            'fields': ('title', 'message', 'template_test'),
+            'description': format_html(
+                'Sarlavha va matnda shaxsiy placeholder\'lar ishlatish mumkin: {}',
+                ', '.join(f'{{{{{name}}}}} - {label}' for name, label in PLACEHOLDERS.items())
+            )
         }),
         ('Yuborish Sozlamalari', {
             'fields': ('send_to_all', 'recipients'),
             'description': 'Barchaga yuborish yoki tanlangan foydalanuvchilarga yuborish'
         }),
+        ('Jadval', {
+            'fields': ('scheduled_at', 'delivery_window_minutes'),
+            'description': 'Yuborishni kechiktirish va/yoki xabarlarni vaqt oralig\'ida bir tekis tarqatish (masalan, 120 daqiqa). '
+                           'Navbatga qo\'yish uchun baribir "Xabarni Yuborish" tugmasini bosing.'
+        }),
         ('Statistika', {
-            'fields': ('sent_at', 'total_recipients', 'successful_sends', 'failed_sends', 'statistics_display', 'errors_link'),
+            'fields': ('sent_at', 'total_recipients', 'successful_sends', 'failed_sends', 'errors_count', 'statistics_display', 'projected_completion_display', 'errors_link'),
             'classes': ('collapse',)
         }),
         ('Qo\'shimcha', {
@@ -218,10 +304,7 @@ class NotificationAdmin(admin.ModelAdmin):
                 
                 # Send message
                 try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    result, error_type, error_message = loop.run_until_complete(send_telegram_message_async(user.telegram_id, telegram_message))
-                    loop.close()
+                    result, error_type, error_message = send_telegram_message_sync(user.telegram_id, telegram_message)
                     
                     if result:
                         messages.success(
@@ -259,43 +342,42 @@ class NotificationAdmin(admin.ModelAdmin):
         return render(request, 'admin/users/notification/send_test_notification.html', context)
     
     def send_notification(self, request, notification_id):
-        """Send notification manually"""
+        """
+        Send notification manually - xabar outbox'ga navbatga qo'yiladi,
+        yuborishni alohida worker bajaradi (python manage.py send_notifications)
+        """
         notification = get_object_or_404(Notification, pk=notification_id)
         
-        # Always allow sending (resending is allowed)
+        # Always allow sending (resending is allowed) - sent yozuvlar qayta yuborilmaydi
         try:
-            # Run async function in sync context
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(send_notification_to_users(notification))
-            loop.close()
-            
-            # Update sent_at (always update to latest send time)
+            # Update sent_at (always update to latest send time) - navbatga qo'yishdan oldin,
+            # worker yozuvlarni oynaning boshidan (sent_at) hisoblab chiqaradi
             notification.sent_at = timezone.now()
-            # Don't reset statistics - accumulate them
-            # Don't delete old errors - keep them for history
-            notification.save(update_fields=['sent_at', 'total_recipients', 'successful_sends', 'failed_sends'])
+            notification.save(update_fields=['sent_at'])
+            
+            queued = enqueue_notification(notification)
+            notification.refresh_from_db(fields=['total_recipients', 'successful_sends', 'failed_sends'])
             
+            schedule_info = ""
+            if notification.scheduled_at and notification.scheduled_at > timezone.now():
+                schedule_info += f"<br/>🕒 <strong>Boshlanadi:</strong> {timezone.localtime(notification.scheduled_at):%Y-%m-%d %H:%M}"
+            finish = projected_completion(notification)
+            if finish:
+                schedule_info += f"<br/>🏁 <strong>Taxminiy tugash:</strong> {timezone.localtime(finish):%Y-%m-%d %H:%M}"
             messages.success(
                 request,
-                f"✅ Xabar muvaffaqiyatli yuborildi!<br/>"
-                f"📊 <strong>Jami:</strong> {result['total']}<br/>"
-                f"✅ <strong>Muvaffaqiyatli:</strong> {result['successful']}<br/>"
-                f"❌ <strong>Xatolik:</strong> {result['failed']}"
+                f"✅ Xabar yuborish navbatiga qo'yildi!<br/>"
+                f"📊 <strong>Jami:</strong> {notification.total_recipients}<br/>"
+                f"⏳ <strong>Navbatda:</strong> {queued}<br/>"
+                f"✅ <strong>Oldin yuborilgan:</strong> {notification.successful_sends}"
+                f"{schedule_info}"
             )
-            
-            if result['failed'] > 0:
-                messages.warning(
-                    request,
-                    f"⚠️ {result['failed']} ta xatolik yuz berdi. "
-                    f"Xatoliklarni ko'rish uchun 'Xatoliklar' bo'limiga o'ting."
-                )
         except Exception as e:
             messages.error(
                 request,
-                f"❌ Xabar yuborishda xatolik yuz berdi: {str(e)}"
+                f"❌ Xabarni navbatga qo'yishda xatolik yuz berdi: {str(e)}"
             )
-            logger.error(f"Error sending notification {notification_id}: {e}", exc_info=True)
+            logger.error(f"Error queueing notification {notification_id}: {e}", exc_info=True)
         
         return redirect('admin:users_notification_change', notification_id)
     
@@ -307,13 +389,17 @@ class NotificationAdmin(admin.ModelAdmin):
     
     def recipients_count(self, obj):
         if obj.send_to_all:
-            from .models import User
-            count = User.objects.filter(telegram_id__isnull=False, notification_enabled=True, is_active=True).exclude(telegram_id=0).count()
+            from .services import get_notification_recipients
+            count = get_notification_recipients(obj).count()
             return f"Barcha ({count})"
         return f"{obj.recipients.count()} ta"
     recipients_count.short_description = 'Qabul qiluvchilar'
     
     def status_display(self, obj):
+        if obj.sent_at and obj.scheduled_at and obj.scheduled_at > timezone.now():
+            return format_html('<span style="color: #7a5c00;">🕒 Rejalashtirilgan</span>')
+        if obj.sent_at and (obj.successful_sends or 0) + (obj.failed_sends or 0) < (obj.total_recipients or 0):
+            return format_html('<span style="color: #417690;">📤 Yuborilmoqda</span>')
         if obj.sent_at:
             return format_html('<span style="color: green;">✓ Yuborilgan</span>')
         return format_html('<span style="color: orange;">⏳ Kutilmoqda</span>')
@@ -334,9 +420,16 @@ class NotificationAdmin(admin.ModelAdmin):
         return "Hali yuborilmagan"
     statistics_display.short_description = 'Statistika'
     
+    def projected_completion_display(self, obj):
+        finish = projected_completion(obj)
+        if finish is None:
+            return "-"
+        return timezone.localtime(finish).strftime('%Y-%m-%d %H:%M')
+    projected_completion_display.short_description = 'Taxminiy tugash'
+    
     def errors_count_display(self, obj):
         if obj.sent_at:
-            errors_count = obj.errors.count()
+            errors_count = obj.errors_count
             if errors_count > 0:
                 return format_html(
                     '<a href="{}" style="color: red; font-weight: bold;">{} ta xatolik</a>',
@@ -349,7 +442,7 @@ class NotificationAdmin(admin.ModelAdmin):
     
     def errors_link(self, obj):
         if obj and obj.sent_at:
-            errors_count = obj.errors.count()
+            errors_count = obj.errors_count
             if errors_count > 0:
                 return format_html(
                     '<a href="{}" class="button" style="background: #ba2121; color: white; padding: 10px 15px; text-decoration: none; border-radius: 4px; display: inline-block; margin-top: 10px;">'
@@ -6,3 +6,5 @@ class UsersConfig(AppConfig):
     name = 'users'
     verbose_name = 'Users'
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,182 @@
+"""
+Broadcast engine - ko'p foydalanuvchiga Telegram xabar yuborish.
+
+- Bitta aiohttp session (TCP/TLS ulanishlar qayta ishlatiladi)
+- Cheklangan parallellik (worker'lar soni)
+- Token bucket: global (~30 msg/s, interaktiv trafik uchun zaxira bilan) va har bir chat uchun alohida limit
+- 429 da Telegram bergan retry_after kutiladi, vaqtinchalik xatolar jitter bilan qayta yuboriladi
+"""
+import time
+import random
+import asyncio
+import logging
+from collections import Counter, OrderedDict
+
+import aiohttp
+from django.conf import settings
+
+from .services import TELEGRAM_BOT_TOKEN, post_telegram_message
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY = 0.5  # soniya
+RETRY_MAX_DELAY = 30
+
+
+def broadcast_rate():
+    """Ommaviy yuborish tezligi (msg/s) - global limitdan interaktiv trafik uchun zaxira ayirib tashlanadi"""
+    return settings.TELEGRAM_BROADCAST_RATE * (1 - settings.TELEGRAM_BROADCAST_HEADROOM)
+
+
+class TokenBucket:
+    """Asyncio token bucket - rate (token/soniya), capacity (burst)"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Lock ostida kutish - navbat FIFO tartibida
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def is_idle(self, now=None):
+        """
+        Hech kim kutmayapti, blok yo'q va bucket to'liq to'lgan - yangi bucket'dan farqi yo'q,
+        shuning uchun uni o'chirib yuborish limitlarni buzmaydi.
+        """
+        now = time.monotonic() if now is None else now
+        if self._lock.locked() or now < self._blocked_until:
+            return False
+        return self._tokens + (now - self._updated) * self.rate >= self.capacity
+
+    def block(self, seconds):
+        """429 dan keyin bucket'ni retry_after davomida to'xtatish"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+
+class BroadcastEngine:
+    """
+    Foydalanish:
+        async with BroadcastEngine() as engine:
+            await engine.run(recipients, handler)
+    """
+
+    def __init__(self, concurrency=None, rate=None, chat_rate=None, max_retries=None,
+                 api_base=None, token=None):
+        self.concurrency = concurrency or settings.TELEGRAM_BROADCAST_CONCURRENCY
+        self.max_retries = settings.TELEGRAM_BROADCAST_MAX_RETRIES if max_retries is None else max_retries
+        self.chat_rate = chat_rate or settings.TELEGRAM_BROADCAST_CHAT_RATE
+        self.global_bucket = TokenBucket(rate or broadcast_rate())
+        # LRU: bo'sh (to'liq to'lgan) bucket'lar chiqarib yuboriladi - xotira auditoriya hajmiga emas,
+        # oxirgi ~1/chat_rate soniyada xabar olgan chat'lar soniga bog'liq
+        self.chat_buckets = OrderedDict()
+        self.api_base = (api_base or settings.TELEGRAM_API_BASE).rstrip('/')
+        self.token = token if token is not None else TELEGRAM_BOT_TOKEN
+        self.session = None
+        self.stats = Counter()
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=10),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+
+    def _chat_bucket(self, telegram_id):
+        bucket = self.chat_buckets.get(telegram_id)
+        if bucket is None:
+            bucket = self.chat_buckets[telegram_id] = TokenBucket(self.chat_rate)
+        else:
+            self.chat_buckets.move_to_end(telegram_id)
+        self._evict_idle_buckets(keep=telegram_id)
+        return bucket
+
+    def _evict_idle_buckets(self, keep):
+        # Eng eski bucket'lardan boshlab - birinchi band bucket'da to'xtaymiz (amortizatsiyada O(1))
+        now = time.monotonic()
+        while self.chat_buckets:
+            telegram_id, bucket = next(iter(self.chat_buckets.items()))
+            if telegram_id == keep or not bucket.is_idle(now):
+                break
+            self.chat_buckets.popitem(last=False)
+
+    def _backoff(self, attempt):
+        # Full jitter - bir vaqtda xato olgan so'rovlar bir vaqtda qaytmasin
+        return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+    async def send(self, telegram_id, message_text, parse_mode='HTML'):
+        """
+        Bitta xabarni limitlar va retry bilan yuborish
+        Returns: (success: bool, error_type: str, error_message: str)
+        """
+        if not self.token:
+            self.stats['failed'] += 1
+            return False, "TELEGRAM_BOT_TOKEN_MISSING", "TELEGRAM_BOT_TOKEN is not set. Please set it in backend/.env file or environment variables."
+        if not telegram_id:
+            self.stats['failed'] += 1
+            return False, "INVALID_TELEGRAM_ID", f"Invalid telegram_id: {telegram_id}"
+
+        url = f"{self.api_base}/bot{self.token}/sendMessage"
+        chat_bucket = self._chat_bucket(telegram_id)
+        attempt = 0
+        while True:
+            # Avval chat limiti, keyin global - bitta chat kutayotganda global token behuda ketmaydi
+            await chat_bucket.acquire()
+            await self.global_bucket.acquire()
+            success, error_type, error_message, retry_after, transient = await post_telegram_message(
+                self.session, url, telegram_id, message_text, parse_mode
+            )
+            if success:
+                self.stats['sent'] += 1
+                return True, None, None
+            if attempt >= self.max_retries or not (retry_after or transient):
+                self.stats['failed'] += 1
+                return False, error_type, error_message
+
+            attempt += 1
+            self.stats['retries'] += 1
+            if retry_after:
+                # Flood limit butun bot uchun - global bucket ham to'xtatiladi
+                self.stats['rate_limited'] += 1
+                self.global_bucket.block(retry_after)
+                chat_bucket.block(retry_after)
+                logger.warning(f"Telegram 429 for telegram_id {telegram_id}, retry after {retry_after}s")
+            else:
+                await asyncio.sleep(self._backoff(attempt))
+
+    async def run(self, items, handler):
+        """
+        items'ni concurrency ta worker bilan qayta ishlash.
+        handler(engine, item) - coroutine; har bir item uchun alohida task yaratilmaydi.
+        """
+        iterator = iter(items)
+
+        async def worker():
+            # Bitta event loop - next() chaqiruvlari orasida poyga yo'q
+            for item in iterator:
+                try:
+                    await handler(self, item)
+                except Exception as e:
+                    logger.error(f"Broadcast handler error: {e}", exc_info=True)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return self.stats
@@ -0,0 +1,175 @@
+"""
+Protected CV download - ruxsat Django'da tekshiriladi, baytlarni nginx uzatadi.
+
+CV_DOWNLOAD_ACCEL yoqilgan bo'lsa javob faqat X-Accel-Redirect header'idan iborat
+(nginx internal location faylni o'zi yuboradi, Range'ni ham o'zi qo'llab-quvvatlaydi).
+nginx bo'lmasa (dev/runserver) fayl chunk'lab stream qilinadi, Range so'rovlari 206 bilan.
+"""
+import os
+import re
+import mimetypes
+import tempfile
+import zipfile
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+STREAM_CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _cv_etag(cv):
+    # Blob kontenti o'zgarmaydi - sha256 kuchli ETag sifatida ishlaydi
+    if cv.blob_id:
+        return quote_etag(cv.blob.sha256)
+    return quote_etag(f"cv-{cv.id}-{cv.file_size}")
+
+
+def _parse_range(header, size):
+    """
+    Bitta 'bytes=start-end' diapazonini parse qilish.
+    Returns: (start, end) yoki None (butun fayl); qanoatlantirib bo'lmasa ValueError
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None  # Ko'p diapazonli yoki noto'g'ri Range e'tiborsiz qoldiriladi
+    start, end = match.groups()
+    if start == '':
+        if end == '':
+            return None
+        length = int(end)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _iter_file(file_obj, start, length):
+    try:
+        file_obj.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = file_obj.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        file_obj.close()
+
+
+def _set_common_headers(response, cv, etag):
+    content_type, _ = mimetypes.guess_type(cv.file_name or cv.file.name)
+    response['Content-Type'] = content_type or 'application/octet-stream'
+    response['Content-Disposition'] = content_disposition_header(True, cv.file_name or os.path.basename(cv.file.name))
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(cv.uploaded_at.timestamp())
+    response['Cache-Control'] = f"private, max-age={settings.CV_DOWNLOAD_MAX_AGE}"
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def build_cv_file_response(request, cv):
+    """CV fayl javobi (ruxsat oldindan tekshirilgan bo'lishi kerak)"""
+    etag = _cv_etag(cv)
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')]:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    if settings.CV_DOWNLOAD_ACCEL:
+        response = HttpResponse()
+        _set_common_headers(response, cv, etag)
+        response['X-Accel-Redirect'] = settings.CV_DOWNLOAD_ACCEL_PREFIX + quote(cv.file.name)
+        return response
+
+    size = default_storage.size(cv.file.name)
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and if_range and if_range.strip() != etag:
+        range_header = None  # Fayl o'zgargan - butun fayl qaytadi
+
+    try:
+        byte_range = _parse_range(range_header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        response = FileResponse(default_storage.open(cv.file.name, 'rb'))
+        return _set_common_headers(response, cv, etag)
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        _iter_file(default_storage.open(cv.file.name, 'rb'), start, length),
+        status=206,
+    )
+    _set_common_headers(response, cv, etag)
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f"bytes {start}-{end}/{size}"
+    return response
+
+
+def build_cv_preview_response(request, cv):
+    """CV preview (PNG thumbnail) javobi - download bilan bir xil ruxsat, /media/ orqali ochiq emas"""
+    etag = quote_etag(f"{cv.blob.sha256}-preview")
+    if etag in [tag.strip() for tag in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    if settings.CV_DOWNLOAD_ACCEL:
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = settings.CV_DOWNLOAD_ACCEL_PREFIX + quote(cv.blob.preview.name)
+    else:
+        response = FileResponse(default_storage.open(cv.blob.preview.name, 'rb'))
+    response['Content-Type'] = 'image/png'
+    response['ETag'] = etag
+    response['Cache-Control'] = f"private, max-age={settings.CV_DOWNLOAD_MAX_AGE}"
+    return response
+
+
+def _zip_entry_name(cv):
+    user_name = f"{cv.user.first_name}_{cv.user.last_name}".strip('_ ') if cv.user else ''
+    if not user_name and cv.user:
+        user_name = cv.user.username
+    if not user_name:
+        user_name = 'Unknown'
+    # Clean filename (remove invalid characters)
+    user_name = "".join(c for c in user_name if c.isalnum() or c in (' ', '-', '_')).strip()
+    user_name = user_name.replace(' ', '_')
+    original_filename = os.path.basename(cv.file_name or cv.file.name)
+    return f"{user_name}_CV_{cv.id}_{original_filename}"
+
+
+def build_cv_zip_response(cvs, filename):
+    """
+    ZIP arxivni xotirada emas, vaqtinchalik faylda yig'ish va stream qilish.
+    Fayllar diskdan chunk'lab o'qiladi; vaqtinchalik fayl javob yopilganda o'chadi.
+    """
+    os.makedirs(settings.CV_UPLOAD_TEMP_DIR, exist_ok=True)
+    archive = tempfile.TemporaryFile(dir=settings.CV_UPLOAD_TEMP_DIR, suffix='.zip')
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for cv in cvs:
+            if not cv.file or not default_storage.exists(cv.file.name):
+                continue
+            try:
+                with default_storage.open(cv.file.name, 'rb') as source, \
+                        zip_file.open(_zip_entry_name(cv), 'w') as target:
+                    for chunk in iter(lambda: source.read(STREAM_CHUNK_SIZE), b''):
+                        target.write(chunk)
+            except Exception:
+                # Skip files that can't be read
+                continue
+    archive.seek(0)
+    return FileResponse(archive, as_attachment=True, filename=filename, content_type='application/zip')
@@ -0,0 +1,105 @@
+"""
+CV preview - birinchi sahifa uchun kichik PNG thumbnail (Pillow).
+
+PDF sahifani to'liq rasterlash uchun kutubxona yo'q, shuning uchun:
+- skan qilingan PDF (matnsiz) - birinchi sahifadagi eng katta rasm kichraytiriladi;
+- qolgan hollarda - CV matnining boshlanishi A4 proporsiyadagi kartaga chiziladi.
+Process pool ichida ishlaydi (Django ORM ishlatilmaydi).
+"""
+import io
+import os
+import logging
+import textwrap
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_WIDTH = 240
+PREVIEW_HEIGHT = 340
+PREVIEW_MARGIN = 14
+PREVIEW_FONT_SIZE = 10
+PREVIEW_MAX_LINES = 26
+SNIPPET_LENGTH = 300
+FONT_CANDIDATES = (
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/TTF/DejaVuSans.ttf',
+    'C:\\Windows\\Fonts\\arial.ttf',
+)
+
+
+def make_snippet(text):
+    text = ' '.join((text or '').split())
+    if len(text) <= SNIPPET_LENGTH:
+        return text
+    return text[:SNIPPET_LENGTH].rsplit(' ', 1)[0] + '…'
+
+
+def _load_font():
+    from PIL import ImageFont
+    for path in FONT_CANDIDATES:
+        if os.path.exists(path):
+            try:
+                return ImageFont.truetype(path, PREVIEW_FONT_SIZE)
+            except OSError:
+                continue
+    return ImageFont.load_default()
+
+
+def _first_page_image(path):
+    """PDF birinchi sahifasidagi eng katta rasm (skan qilingan CV'lar uchun)"""
+    from PIL import Image
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(path)
+    if not reader.pages:
+        return None
+    images = list(reader.pages[0].images)
+    if not images:
+        return None
+    largest = max(images, key=lambda image: len(image.data))
+    return Image.open(io.BytesIO(largest.data))
+
+
+def _render_text_card(text):
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGB', (PREVIEW_WIDTH, PREVIEW_HEIGHT), 'white')
+    draw = ImageDraw.Draw(image)
+    font = _load_font()
+    line_height = PREVIEW_FONT_SIZE + 3
+    chars_per_line = (PREVIEW_WIDTH - 2 * PREVIEW_MARGIN) // (PREVIEW_FONT_SIZE // 2 + 1)
+
+    lines = []
+    for paragraph in (text or '').splitlines():
+        lines.extend(textwrap.wrap(paragraph, chars_per_line) or [''])
+        if len(lines) >= PREVIEW_MAX_LINES:
+            break
+
+    y = PREVIEW_MARGIN
+    for index, line in enumerate(lines[:PREVIEW_MAX_LINES]):
+        # Birinchi qator (odatda ism) - to'qroq rangda
+        draw.text((PREVIEW_MARGIN, y), line, fill='#1A1A1A' if index == 0 else '#555555', font=font)
+        y += line_height
+    draw.rectangle([0, 0, PREVIEW_WIDTH - 1, PREVIEW_HEIGHT - 1], outline='#D0D0D0')
+    return image
+
+
+def render_preview(path, text):
+    """Returns: PNG bytes"""
+    from PIL import Image
+
+    image = None
+    if not (text or '').strip() and path.lower().endswith('.pdf'):
+        try:
+            image = _first_page_image(path)
+        except Exception as e:
+            logger.warning(f"Error reading PDF image for preview {path}: {e}")
+
+    if image is not None:
+        image = image.convert('RGB')
+        image.thumbnail((PREVIEW_WIDTH, PREVIEW_HEIGHT), Image.LANCZOS)
+    else:
+        image = _render_text_card(text)
+
+    output = io.BytesIO()
+    image.save(output, format='PNG', optimize=True)
+    return output.getvalue()
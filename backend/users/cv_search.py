@@ -0,0 +1,119 @@
+"""
+CV full-text search - PostgreSQL (tsvector + GIN) yoki SQLite (FTS5)
+"""
+import re
+from django.db import connection
+
+from .models import CV
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+SNIPPET_START = '«'
+SNIPPET_STOP = '»'
+
+POSTGRES_COUNT_SQL = (
+    "SELECT COUNT(*) FROM users_cvtext "
+    "WHERE to_tsvector('simple', content) @@ to_tsquery('simple', %s)"
+)
+POSTGRES_SEARCH_SQL = (
+    "SELECT cv_id, ts_rank(to_tsvector('simple', content), to_tsquery('simple', %s)) AS rank, "
+    "ts_headline('simple', content, to_tsquery('simple', %s), "
+    "'StartSel=" + SNIPPET_START + ", StopSel=" + SNIPPET_STOP + ", MaxWords=20, MinWords=8') AS snippet "
+    "FROM users_cvtext "
+    "WHERE to_tsvector('simple', content) @@ to_tsquery('simple', %s) "
+    "ORDER BY rank DESC, cv_id DESC LIMIT %s OFFSET %s"
+)
+SQLITE_COUNT_SQL = (
+    "SELECT COUNT(*) FROM users_cvtext_fts WHERE users_cvtext_fts MATCH %s"
+)
+SQLITE_SEARCH_SQL = (
+    "SELECT t.cv_id, -bm25(users_cvtext_fts) AS rank, "
+    "snippet(users_cvtext_fts, 0, '" + SNIPPET_START + "', '" + SNIPPET_STOP + "', '…', 16) AS snippet "
+    "FROM users_cvtext_fts JOIN users_cvtext t ON t.id = users_cvtext_fts.rowid "
+    "WHERE users_cvtext_fts MATCH %s "
+    "ORDER BY bm25(users_cvtext_fts), t.cv_id DESC LIMIT %s OFFSET %s"
+)
+
+
+def tokenize_query(query):
+    return TOKEN_RE.findall(query or '')[:20]
+
+
+def build_postgres_query(tokens):
+    # Har bir so'z AND bilan, oxirgisi prefix (yozilayotgan so'z uchun)
+    terms = [token.replace("'", '') for token in tokens]
+    terms[-1] = terms[-1] + ':*'
+    return ' & '.join(terms)
+
+
+def build_sqlite_query(tokens):
+    terms = ['"%s"' % token.replace('"', '""') for token in tokens]
+    terms[-1] = terms[-1] + '*'
+    return ' '.join(terms)
+
+
+class CVSearchResults:
+    """
+    Lazy ranked natijalar - Paginator faqat kerakli sahifani so'raydi
+    (count() + [offset:limit] slice), shuning uchun CV'lar soniga bog'liq emas.
+    """
+
+    def __init__(self, query):
+        self.tokens = tokenize_query(query)
+        self.vendor = connection.vendor
+        self._count = None
+
+    def _match_params(self):
+        if self.vendor == 'postgresql':
+            return build_postgres_query(self.tokens)
+        return build_sqlite_query(self.tokens)
+
+    def count(self):
+        if self._count is None:
+            if not self.tokens or self.vendor not in ('postgresql', 'sqlite'):
+                self._count = 0
+            else:
+                sql = POSTGRES_COUNT_SQL if self.vendor == 'postgresql' else SQLITE_COUNT_SQL
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, [self._match_params()])
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def _fetch(self, offset, limit):
+        if not self.tokens or limit <= 0 or self.vendor not in ('postgresql', 'sqlite'):
+            return []
+        match = self._match_params()
+        if self.vendor == 'postgresql':
+            sql, params = POSTGRES_SEARCH_SQL, [match, match, match, limit, offset]
+        else:
+            sql, params = SQLITE_SEARCH_SQL, [match, limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        cvs = CV.objects.select_related('user__position', 'user__telegram_profile', 'blob').in_bulk([row[0] for row in rows])
+        results = []
+        for cv_id, rank, snippet in rows:
+            cv = cvs.get(cv_id)
+            if cv is None:
+                continue
+            cv.search_rank = float(rank or 0)
+            cv.search_snippet = snippet
+            results.append(cv)
+        return results
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start = item.start or 0
+            stop = item.stop if item.stop is not None else self.count()
+            return self._fetch(start, stop - start)
+        results = self._fetch(item, 1)
+        if not results:
+            raise IndexError(item)
+        return results[0]
+
+
+def search_cvs(query):
+    return CVSearchResults(query)
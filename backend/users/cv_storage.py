@@ -0,0 +1,154 @@
+"""
+Content-addressed CV storage - bir xil fayl faqat bir marta saqlanadi.
+
+Har bir fayl sha256 bo'yicha CVBlob sifatida saqlanadi, CV yozuvlari esa
+blob'ga ishora qiladi (reference counting). Oxirgi CV o'chirilganda
+blob va fayl ham o'chiriladi.
+"""
+import os
+import hashlib
+import logging
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 64 * 1024
+BLOB_DIR = 'cvs/blobs'
+
+
+def hash_file(file_obj):
+    """
+    Faylni chunk'lab o'qib sha256 hisoblash (butun fayl xotiraga yuklanmaydi)
+    Returns: (hexdigest, size)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    if hasattr(file_obj, 'chunks'):
+        chunks = file_obj.chunks(HASH_CHUNK_SIZE)
+    else:
+        chunks = iter(lambda: file_obj.read(HASH_CHUNK_SIZE), b'')
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+    if hasattr(file_obj, 'seek'):
+        file_obj.seek(0)
+    return digest.hexdigest(), size
+
+
+class HashingUploadMixin:
+    """
+    Upload handler uchun - sha256 fayl oqim bilan kelayotganda hisoblanadi (keyin qayta o'qilmaydi).
+    Natija UploadedFile.sha256 da; acquire_blob uni ishlatadi.
+    """
+
+    def new_file(self, *args, **kwargs):
+        # super() StopFutureHandlers ko'tarishi mumkin (MemoryFileUploadHandler) - digest undan oldin
+        self.digest = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        result = super().receive_data_chunk(raw_data, start)
+        if result is None:
+            # Chunk shu handler'da saqlandi (keyingi handler'ga o'tmadi)
+            self.digest.update(raw_data)
+        return result
+
+    def file_complete(self, file_size):
+        file_obj = super().file_complete(file_size)
+        if file_obj is not None:
+            file_obj.sha256 = self.digest.hexdigest()
+        return file_obj
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def hashing_upload_handlers(request):
+    """CV yuklash so'rovi uchun handler'lar (settings.FILE_UPLOAD_HANDLERS tartibida: xotira, keyin temp fayl)"""
+    return [HashingMemoryFileUploadHandler(request), HashingTemporaryFileUploadHandler(request)]
+
+
+def blob_path(sha256, file_name):
+    ext = os.path.splitext(file_name or '')[1].lower()
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def acquire_blob(file_obj, file_name, sha256=None, size=None):
+    """
+    Fayl uchun CVBlob topish yoki yaratish va ref_count'ni oshirish.
+    sha256/size oldindan hisoblangan bo'lsa (chunked upload yoki hashing upload handler) qayta hisoblanmaydi.
+
+    Tashqi tranzaksiyadan tashqarida chaqirilishi kerak: fayl va blob qatori birga commit bo'ladi.
+    Keyingi qadam (CV yaratish) muvaffaqiyatsiz bo'lsa chaqiruvchi release_blob() qiladi - aks holda
+    rollback'dan keyin diskda egasiz fayl qolardi.
+    """
+    from .models import CVBlob
+
+    if sha256 is None:
+        sha256 = getattr(file_obj, 'sha256', None)
+        size = getattr(file_obj, 'size', None)
+    if sha256 is None or size is None:
+        sha256, size = hash_file(file_obj)
+
+    for _ in range(2):
+        with transaction.atomic():
+            blob = CVBlob.objects.select_for_update().filter(sha256=sha256).first()
+            if blob is not None:
+                CVBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+                blob.refresh_from_db(fields=['ref_count'])
+                return blob
+
+        # Yangi kontent - faylni yozamiz (deterministic path, allaqachon bor bo'lsa qayta yozmaymiz)
+        path = blob_path(sha256, file_name)
+        written = not default_storage.exists(path)
+        if written:
+            path = default_storage.save(path, file_obj)
+        try:
+            with transaction.atomic():
+                return CVBlob.objects.create(sha256=sha256, file=path, size=size, ref_count=1)
+        except IntegrityError:
+            # Parallel so'rov bir xil blob yaratdi (o'sha path) - qayta urinib ko'ramiz
+            continue
+        except Exception:
+            if written:
+                default_storage.delete(path)
+            raise
+    raise IntegrityError(f"Could not acquire CV blob {sha256}")
+
+
+def release_blob(blob_id):
+    """ref_count'ni kamaytirish; 0 ga tushsa blob va faylni o'chirish"""
+    from .models import CVBlob
+
+    with transaction.atomic():
+        blob = CVBlob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            CVBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+            return
+        if blob.cvs.exists():
+            # Hisob noto'g'ri bo'lib qolgan - haqiqiy havolalar soniga tenglashtiramiz
+            CVBlob.objects.filter(pk=blob.pk).update(ref_count=blob.cvs.count())
+            return
+        file_names = [blob.file.name, blob.preview.name if blob.preview else None]
+        blob.delete()
+
+    def delete_file():
+        for file_name in file_names:
+            try:
+                if file_name and default_storage.exists(file_name):
+                    default_storage.delete(file_name)
+            except Exception as e:
+                logger.error(f"Error deleting CV blob file {file_name}: {e}", exc_info=True)
+
+    transaction.on_commit(delete_file)
@@ -0,0 +1,210 @@
+"""
+CV text extraction - PDF/DOCX/DOC fayllardan matn ajratib olish.
+
+Extraction CPU-heavy (PyPDF2), shuning uchun request ichida emas,
+process pool'da bajariladi va natija CVText modeliga yoziladi.
+Shu ishning o'zida preview (thumbnail) ham tayyorlanadi va blob yonida saqlanadi.
+"""
+import os
+import re
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .cv_preview import make_snippet, render_preview
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# .doc (Word 97-2003) ichidagi UTF-16LE matn bo'laklari
+DOC_TEXT_RUN_RE = re.compile(rb'(?:[\x20-\x7e\xa0-\xff][\x00]|[\x00-\xff][\x04]|[\t\r\n][\x00]){4,}')
+WHITESPACE_RE = re.compile(r'[ \t\f\v]+')
+BLANK_LINES_RE = re.compile(r'\n\s*\n+')
+
+
+def _normalize_text(text):
+    text = text.replace('\x00', '')
+    text = WHITESPACE_RE.sub(' ', text)
+    text = BLANK_LINES_RE.sub('\n\n', text)
+    return text.strip()
+
+
+def _extract_pdf(path):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(path)
+    pages = []
+    for page in reader.pages:
+        try:
+            pages.append(page.extract_text() or '')
+        except Exception as e:
+            # Buzilgan sahifa butun CV'ni to'xtatmasin
+            logger.warning(f"Error extracting PDF page from {path}: {e}")
+    return '\n'.join(pages)
+
+
+def _extract_docx(path):
+    import docx
+    document = docx.Document(path)
+    parts = [paragraph.text for paragraph in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            parts.append(' | '.join(cell.text for cell in row.cells))
+    return '\n'.join(parts)
+
+
+def _extract_doc(path):
+    """Eski .doc formatidan UTF-16 matn bo'laklarini ajratib olish"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    runs = [match.group().decode('utf-16-le', errors='ignore') for match in DOC_TEXT_RUN_RE.finditer(data)]
+    return '\n'.join(runs)
+
+
+EXTRACTORS = {
+    '.pdf': _extract_pdf,
+    '.docx': _extract_docx,
+    '.doc': _extract_doc,
+}
+
+
+def extract_text_from_file(path, max_chars=None):
+    """
+    Fayldan matn ajratib olish (process pool ichida ishlaydi - Django ORM ishlatilmaydi)
+    Returns: extracted text (str)
+    """
+    ext = os.path.splitext(path)[1].lower()
+    extractor = EXTRACTORS.get(ext)
+    if extractor is None:
+        raise ValueError(f"Unsupported CV file type: {ext or 'unknown'}")
+    text = _normalize_text(extractor(path))
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars]
+    return text
+
+
+def process_cv_file(path, max_chars=None, with_preview=True):
+    """
+    Matn + preview bitta task'da (fayl bir marta o'qiladi)
+    Returns: {'text': str, 'preview': PNG bytes yoki None}
+    """
+    text = extract_text_from_file(path, max_chars)
+    preview = None
+    if with_preview:
+        try:
+            preview = render_preview(path, text)
+        except Exception as e:
+            # Preview bo'lmasa ham matn saqlanadi
+            logger.warning(f"Error rendering CV preview {path}: {e}")
+    return {'text': text, 'preview': preview}
+
+
+def get_executor():
+    """Process pool (lazy, process bo'yicha bitta)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.CV_TEXT_EXTRACTION_WORKERS)
+        return _executor
+
+
+def save_preview(blob_id, preview):
+    """Preview PNG'ni blob fayli yonida saqlash (allaqachon bor bo'lsa qayta yozmaymiz)"""
+    from .models import CVBlob
+
+    blob = CVBlob.objects.filter(pk=blob_id, preview__isnull=True).only('id', 'file').first()
+    if blob is None or not preview:
+        return
+    path = default_storage.save(f"{blob.file.name}.preview.png", ContentFile(preview))
+    updated = CVBlob.objects.filter(pk=blob_id, preview__isnull=True).update(preview=path)
+    if not updated:
+        # Parallel worker oldinroq saqladi
+        default_storage.delete(path)
+
+
+def save_extraction_result(cv_id, content=None, error=None, preview=None, blob_id=None):
+    """Extraction natijasini CVText ga (va preview'ni blob'ga) yozish"""
+    from .models import CVText
+    if error is None:
+        if blob_id and preview:
+            save_preview(blob_id, preview)
+        CVText.objects.filter(cv_id=cv_id).update(
+            content=content,
+            snippet=make_snippet(content),
+            status=CVText.STATUS_DONE,
+            error_message=None,
+            extracted_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+    else:
+        CVText.objects.filter(cv_id=cv_id).update(
+            status=CVText.STATUS_FAILED,
+            error_message=str(error)[:1000],
+            updated_at=timezone.now(),
+        )
+
+
+def _on_extraction_done(cv_id, blob_id, future):
+    # Callback executor thread'ida ishlaydi - DB connection'ni o'zimiz yopamiz
+    close_old_connections()
+    try:
+        error = future.exception()
+        if error is None:
+            result = future.result()
+            save_extraction_result(cv_id, content=result['text'], preview=result['preview'], blob_id=blob_id)
+            logger.info(f"CV text extracted: cv_id={cv_id}")
+        else:
+            logger.error(f"CV text extraction failed: cv_id={cv_id}, error={error}")
+            save_extraction_result(cv_id, error=error)
+    except Exception as e:
+        logger.error(f"Error saving CV text: cv_id={cv_id}, error={e}", exc_info=True)
+    finally:
+        close_old_connections()
+
+
+def schedule_cv_text_extraction(cv):
+    """
+    CV uchun pending CVText yaratish va extraction'ni process pool'ga topshirish.
+    Transaction commit bo'lgandan keyin ishga tushadi.
+    """
+    from .models import CVText
+
+    # Bir xil fayl (blob) allaqachon qayta ishlangan bo'lsa - matnni nusxalaymiz
+    if cv.blob_id:
+        existing = CVText.objects.filter(
+            cv__blob_id=cv.blob_id,
+            status=CVText.STATUS_DONE
+        ).exclude(cv_id=cv.id).values('content', 'snippet', 'extracted_at').first()
+        if existing:
+            CVText.objects.update_or_create(
+                cv=cv,
+                defaults={'status': CVText.STATUS_DONE, 'error_message': None, **existing}
+            )
+            return
+
+    CVText.objects.update_or_create(
+        cv=cv,
+        defaults={'status': CVText.STATUS_PENDING, 'error_message': None}
+    )
+
+    if not cv.file:
+        return
+    path = cv.file.path
+    cv_id = cv.id
+    blob_id = cv.blob_id
+
+    def submit():
+        try:
+            future = get_executor().submit(process_cv_file, path, settings.CV_TEXT_MAX_CHARS, bool(blob_id))
+            future.add_done_callback(lambda f: _on_extraction_done(cv_id, blob_id, f))
+        except Exception as e:
+            logger.error(f"Error scheduling CV text extraction: cv_id={cv_id}, error={e}", exc_info=True)
+
+    transaction.on_commit(submit)
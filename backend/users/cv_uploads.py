@@ -0,0 +1,167 @@
+"""
+Chunked, resumable CV upload.
+
+Protokol: init (fayl nomi va hajmi) -> chunk'larni offset bilan ketma-ket yuborish
+-> complete. Har bir chunk to'g'ridan-to'g'ri vaqtinchalik faylga yoziladi,
+shuning uchun xotira sarfi chunk hajmidan oshmaydi.
+"""
+import os
+import logging
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+
+from .cv_storage import acquire_blob, hash_file, release_blob
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_EXTENSIONS = ('.pdf', '.doc', '.docx')
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Upload protokol xatoligi - status_code bilan"""
+
+    def __init__(self, message, status_code=400, offset=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.offset = offset
+
+
+def part_path(upload):
+    return os.path.join(settings.CV_UPLOAD_TEMP_DIR, f"{upload.id}.part")
+
+
+def init_upload(user, file_name, file_size):
+    from .models import CVUpload
+
+    file_name = os.path.basename(file_name or '')
+    if not file_name.lower().endswith(ALLOWED_EXTENSIONS):
+        raise UploadError("Faqat PDF, DOC yoki DOCX fayllar qabul qilinadi")
+    try:
+        file_size = int(file_size)
+    except (TypeError, ValueError):
+        raise UploadError("file_size is required")
+    if file_size <= 0 or file_size > settings.CV_UPLOAD_MAX_SIZE:
+        raise UploadError(f"File size must be between 1 and {settings.CV_UPLOAD_MAX_SIZE} bytes", status_code=413)
+
+    os.makedirs(settings.CV_UPLOAD_TEMP_DIR, exist_ok=True)
+    upload = CVUpload.objects.create(user=user, file_name=file_name, file_size=file_size)
+    # Bo'sh part fayl - append har doim 'r+b' + seek bilan ishlaydi
+    open(part_path(upload), 'wb').close()
+    return upload
+
+
+def validate_chunk(upload, offset, content_length):
+    from .models import CVUpload
+
+    if upload.status != CVUpload.STATUS_UPLOADING:
+        raise UploadError("Upload already completed", status_code=409, offset=upload.offset)
+    if offset != upload.offset:
+        raise UploadError("Offset mismatch", status_code=409, offset=upload.offset)
+    if upload.offset + content_length > upload.file_size:
+        raise UploadError("Chunk exceeds declared file size", status_code=413, offset=upload.offset)
+
+
+def append_chunk(upload, stream, offset, content_length):
+    """
+    Chunk'ni offset bo'yicha yozish.
+    offset serverdagi offset'ga teng bo'lmasa 409 qaytadi (client GET bilan offset'ni so'rab davom ettiradi).
+
+    Chunk (ko'pi bilan CV_UPLOAD_CHUNK_SIZE) avval client'dan to'liq o'qiladi, qator qulfi (select_for_update)
+    faqat offset tekshiruvi va faylga yozish uchun olinadi - sekin client complete'ni va boshqa PUT'larni
+    to'sib qo'ymaydi.
+    """
+    from .models import CVUpload
+
+    if content_length is None or content_length <= 0:
+        raise UploadError("Empty chunk")
+    if content_length > settings.CV_UPLOAD_CHUNK_SIZE:
+        raise UploadError(f"Chunk size must not exceed {settings.CV_UPLOAD_CHUNK_SIZE} bytes", status_code=413)
+
+    # Qulfsiz oldindan tekshiruv - noto'g'ri offset'dagi chunk o'qilmaydi
+    validate_chunk(upload, offset, content_length)
+
+    chunk = bytearray()
+    while len(chunk) < content_length:
+        block = stream.read(min(READ_BLOCK_SIZE, content_length - len(chunk)))
+        if not block:
+            break
+        chunk.extend(block)
+    if len(chunk) != content_length:
+        # Yarim qolgan chunk hisobga olinmaydi - client shu offset'dan qayta yuboradi
+        raise UploadError("Incomplete chunk", offset=upload.offset)
+
+    with transaction.atomic():
+        upload = CVUpload.objects.select_for_update().get(pk=upload.pk)
+        validate_chunk(upload, offset, content_length)
+        with open(part_path(upload), 'r+b') as f:
+            f.seek(upload.offset)
+            f.write(chunk)
+            f.truncate(upload.offset + content_length)
+        upload.offset += content_length
+        upload.save(update_fields=['offset', 'updated_at'])
+    return upload
+
+
+def complete_upload(upload_id):
+    """Yuklash tugagach faylni blob sifatida saqlash va CV yaratish"""
+    from .models import CV, CVUpload
+    from .cv_text import schedule_cv_text_extraction
+
+    upload = CVUpload.objects.select_related('user', 'cv').get(pk=upload_id)
+    if upload.status == CVUpload.STATUS_COMPLETED and upload.cv_id:
+        # Takroriy complete (javob yo'qolgan bo'lsa) - o'sha CV qaytadi
+        return upload.cv
+    if upload.offset != upload.file_size:
+        raise UploadError("Upload is not finished", status_code=409, offset=upload.offset)
+
+    # Blob (va fayl) tranzaksiyadan tashqarida - rollback'da diskda egasiz fayl qolmasligi uchun
+    path = part_path(upload)
+    try:
+        with open(path, 'rb') as f:
+            sha256, size = hash_file(f)
+            blob = acquire_blob(File(f, name=upload.file_name), upload.file_name, sha256=sha256, size=size)
+    except FileNotFoundError:
+        # Parallel complete faylni allaqachon ko'chirib bo'lgan
+        upload.refresh_from_db()
+        if upload.status == CVUpload.STATUS_COMPLETED and upload.cv_id:
+            return upload.cv
+        raise
+
+    try:
+        with transaction.atomic():
+            upload = CVUpload.objects.select_for_update().select_related('user').get(pk=upload_id)
+            if upload.status == CVUpload.STATUS_COMPLETED and upload.cv_id:
+                release_blob(blob.pk)
+                return upload.cv
+            cv = CV.objects.create(
+                user=upload.user,
+                file=blob.file.name,
+                blob=blob,
+                file_name=upload.file_name,
+                file_size=size,
+            )
+            upload.status = CVUpload.STATUS_COMPLETED
+            upload.cv = cv
+            upload.save(update_fields=['status', 'cv', 'updated_at'])
+    except Exception:
+        release_blob(blob.pk)
+        raise
+
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.warning(f"Error removing upload part file {path}: {e}")
+
+    schedule_cv_text_extraction(cv)
+    return cv
+
+
+def discard_upload(upload):
+    try:
+        os.remove(part_path(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
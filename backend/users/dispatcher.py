@@ -0,0 +1,146 @@
+"""
+Telegram dispatcher - sync Django kodidan async Telegram chaqiruvlarini bajarish.
+
+Har bir so'rovda yangi event loop va yangi aiohttp session ochish o'rniga jarayon bo'yicha
+bitta fon thread'i bitta event loop va bitta pool'langan session'ni ushlab turadi:
+- DNS/TLS ulanishlari so'rovlar orasida qayta ishlatiladi;
+- sync kod coroutine'ni topshiradi va natijani timeout bilan kutadi;
+- jarayon tugaganda (atexit / gunicorn worker_exit) loop va session toza yopiladi;
+- stats() - bajarilayotgan (in-flight) va tugagan chaqiruvlar hisoblagichlari.
+
+Foydalanish:
+    from users.dispatcher import dispatcher
+    dispatcher.call(lambda session: send_telegram_message_async(telegram_id, text, session=session))
+"""
+import os
+import atexit
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from collections import Counter
+
+import aiohttp
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDispatcher:
+    """Fon thread'idagi event loop + pool'langan aiohttp session"""
+
+    def __init__(self, name='telegram-dispatcher'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._session = None
+        self._in_flight = 0
+        self.metrics = Counter()
+
+    def _ensure_started(self):
+        with self._lock:
+            # gunicorn preload_app: fork'dan keyin ota jarayon thread'i bolada mavjud emas
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            thread = threading.Thread(target=self._run, args=(loop, ready), name=self.name, daemon=True)
+            thread.start()
+            ready.wait()
+            self._loop, self._thread, self._pid, self._session = loop, thread, os.getpid(), None
+            return loop
+
+    def _run(self, loop, ready):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            # Tugallanmagan chaqiruvlarni bekor qilish va session'ni yopish
+            pending = [task for task in asyncio.all_tasks(loop) if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(self._close_session())
+            loop.close()
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=settings.TELEGRAM_DISPATCHER_POOL_SIZE, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=settings.TELEGRAM_DISPATCHER_TIMEOUT),
+            )
+        return self._session
+
+    async def _close_session(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _execute(self, factory):
+        self._in_flight += 1
+        self.metrics['submitted'] += 1
+        try:
+            result = await factory(await self._get_session())
+        except asyncio.CancelledError:
+            self.metrics['cancelled'] += 1
+            raise
+        except Exception:
+            self.metrics['failed'] += 1
+            raise
+        else:
+            self.metrics['completed'] += 1
+            return result
+        finally:
+            self._in_flight -= 1
+
+    def submit(self, factory):
+        """
+        factory(session) -> coroutine'ni fon loop'ida ishga tushirish
+        Returns: concurrent.futures.Future
+        """
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(self._execute(factory), loop)
+
+    def call(self, factory, timeout=None):
+        """
+        factory(session) -> coroutine'ni bajarib, natijani kutish.
+        timeout (soniya, default TELEGRAM_DISPATCHER_TIMEOUT, 0 - cheklovsiz) o'tsa chaqiruv bekor qilinadi
+        va TimeoutError ko'tariladi.
+        """
+        if timeout is None:
+            timeout = settings.TELEGRAM_DISPATCHER_TIMEOUT
+        future = self.submit(factory)
+        try:
+            return future.result(timeout=timeout or None)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            self.metrics['timeouts'] += 1
+            logger.warning(f"{self.name}: call timed out after {timeout}s")
+            raise TimeoutError(f"Telegram call timed out after {timeout}s")
+
+    def stats(self):
+        """Dispatcher hisoblagichlari (in_flight - hozir bajarilayotgan chaqiruvlar)"""
+        return {
+            'running': self._thread is not None and self._thread.is_alive() and self._pid == os.getpid(),
+            'in_flight': self._in_flight,
+            **{key: self.metrics[key] for key in ('submitted', 'completed', 'failed', 'cancelled', 'timeouts')},
+        }
+
+    def shutdown(self, timeout=5):
+        """Loop'ni to'xtatish va session'ni yopish (atexit / gunicorn worker_exit)"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if thread is None or not thread.is_alive() or self._pid != os.getpid():
+                return
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            self._loop = self._thread = None
+        logger.info(f"{self.name} stopped: {self.stats()}")
+
+
+dispatcher = AsyncDispatcher()
+atexit.register(dispatcher.shutdown)
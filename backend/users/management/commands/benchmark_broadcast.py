@@ -0,0 +1,119 @@
+import time
+import random
+import asyncio
+from collections import deque
+
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+from users.broadcast import BroadcastEngine
+
+
+class FakeBotAPI:
+    """
+    Lokal soxta Telegram Bot API - sendMessage'ga kechikish bilan javob beradi.
+    Global limitdan oshsa 429 (retry_after bilan), error_rate ulushida 502 qaytaradi.
+    """
+
+    def __init__(self, latency, limit, error_rate):
+        self.latency = latency
+        self.limit = limit
+        self.error_rate = error_rate
+        self.window = deque()
+        self.received = 0
+        self.rejected = 0
+
+    async def send_message(self, request):
+        payload = await request.json()
+        self.received += 1
+        await asyncio.sleep(self.latency)
+
+        now = time.monotonic()
+        while self.window and now - self.window[0] > 1:
+            self.window.popleft()
+        if len(self.window) >= self.limit:
+            self.rejected += 1
+            return web.json_response({
+                'ok': False,
+                'error_code': 429,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1},
+            }, status=429)
+        if random.random() < self.error_rate:
+            return web.Response(status=502, text='Bad Gateway')
+
+        self.window.append(now)
+        return web.json_response({'ok': True, 'result': {'message_id': self.received, 'chat': {'id': payload['chat_id']}}})
+
+
+class Command(BaseCommand):
+    help = "Broadcast engine throughput benchmark (lokal soxta Bot API server bilan, Telegram'ga so'rov yuborilmaydi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=300, help="Yuboriladigan xabarlar soni")
+        parser.add_argument('--concurrency', type=int, default=None)
+        parser.add_argument('--rate', type=float, default=None, help="Engine global limiti (msg/s)")
+        parser.add_argument('--server-limit', type=int, default=30, help="Soxta server global limiti (msg/s)")
+        parser.add_argument('--latency', type=float, default=50, help="Soxta server javob kechikishi (ms)")
+        parser.add_argument('--error-rate', type=float, default=0.01, help="Vaqtinchalik xatolar ulushi (0..1)")
+        parser.add_argument('--sequential', type=int, default=0,
+                            help="Taqqoslash uchun: shuncha xabarni eski usulda (ketma-ket, har biriga yangi session) yuborish")
+
+    def handle(self, *args, **options):
+        asyncio.run(self._run(options))
+
+    async def _run(self, options):
+        fake = FakeBotAPI(options['latency'] / 1000, options['server_limit'], options['error_rate'])
+        app = web.Application()
+        app.router.add_post('/bot{token}/sendMessage', fake.send_message)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        api_base = f"http://127.0.0.1:{port}"
+
+        try:
+            if options['sequential']:
+                await self._run_sequential(api_base, options['sequential'])
+
+            count = options['count']
+            engine = BroadcastEngine(
+                concurrency=options['concurrency'],
+                rate=options['rate'],
+                api_base=api_base,
+                token='benchmark',
+            )
+
+            async def handler(engine, chat_id):
+                await engine.send(chat_id, f"<b>Benchmark</b> xabar #{chat_id}")
+
+            started = time.monotonic()
+            async with engine:
+                stats = await engine.run(range(1, count + 1), handler)
+            elapsed = time.monotonic() - started
+        finally:
+            await runner.cleanup()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Engine: {count} ta xabar {elapsed:.2f}s da ({count / elapsed:.1f} msg/s) - "
+            f"yuborildi: {stats['sent']}, xatolik: {stats['failed']}, qayta urinish: {stats['retries']}, "
+            f"429: {stats['rate_limited']}"
+        ))
+        self.stdout.write(
+            f"Server: {fake.received} ta so'rov, {fake.rejected} ta 429; "
+            f"20000 ta xabar uchun taxminiy vaqt: {20000 / (count / elapsed) / 60:.1f} daqiqa"
+        )
+
+    async def _run_sequential(self, api_base, count):
+        """Eski usul: ketma-ket await, har bir xabar uchun yangi ClientSession"""
+        import aiohttp
+        from users.services import post_telegram_message
+
+        url = f"{api_base}/botbenchmark/sendMessage"
+        started = time.monotonic()
+        for chat_id in range(1, count + 1):
+            async with aiohttp.ClientSession() as session:
+                await post_telegram_message(session, url, chat_id, f"<b>Benchmark</b> xabar #{chat_id}")
+        elapsed = time.monotonic() - started
+        self.stdout.write(f"Ketma-ket: {count} ta xabar {elapsed:.2f}s da ({count / elapsed:.1f} msg/s)")
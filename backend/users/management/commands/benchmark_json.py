@@ -0,0 +1,80 @@
+import io
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.urls import resolve
+from django.utils.text import compress_string
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.renderers import FastJSONParser, FastJSONRenderer, orjson
+from tests.models import Test
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "JSON render/parse va gzip benchmark - eng katta real API javoblari bo'yicha (DRF json va api.renderers)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help="Har bir o'lchov uchun takrorlar soni")
+        parser.add_argument('--username', default=None, help="So'rovlar shu foydalanuvchi nomidan (default - birinchi superuser)")
+
+    def handle(self, *args, **options):
+        user = (
+            User.objects.filter(username=options['username']).first() if options['username']
+            else User.objects.filter(is_superuser=True).order_by('id').first()
+        )
+        if user is None:
+            raise CommandError("Foydalanuvchi topilmadi (--username yoki superuser yarating)")
+
+        largest_test = Test.objects.annotate(total=Count('questions')).order_by('-total').first()
+
+        paths = ['/api/results/?page_size=200', '/api/users/?page_size=200', '/api/questions/?page_size=200', '/api/statistics/']
+        if largest_test is not None:
+            paths.insert(0, f'/api/tests/{largest_test.pk}/questions/?page_size=100')
+
+        backend = f"orjson {orjson.__version__}" if orjson else "standart json (orjson o'rnatilmagan)"
+        self.stdout.write(f"Renderer: {backend}, iterations={options['iterations']}")
+        header = f"{'payload':<42}{'bytes':>9}{'gzip':>8}{'drf ms':>9}{'fast ms':>9}{'x':>6}{'parse drf':>11}{'parse fast':>11}{'gzip ms':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for path in paths:
+            data = self.fetch(path, user)
+            if data is None:
+                self.stdout.write(f"{path:<42}  o'tkazib yuborildi")
+                continue
+            self.report(path, data, options['iterations'])
+
+    def fetch(self, path, user):
+        """Real view orqali Response.data (render qilinmagan)"""
+        request = APIRequestFactory().get(path)
+        force_authenticate(request, user=user)
+        match = resolve(path.split('?')[0])
+        response = match.func(request, *match.args, **match.kwargs)
+        return response.data if response.status_code == 200 else None
+
+    def timeit(self, func, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - started) * 1000 / iterations
+
+    def report(self, path, data, iterations):
+        drf_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        body = drf_renderer.render(data)
+        compressed = compress_string(body)
+
+        drf_ms = self.timeit(lambda: drf_renderer.render(data), iterations)
+        fast_ms = self.timeit(lambda: fast_renderer.render(data), iterations)
+        parse_drf = self.timeit(lambda: JSONParser().parse(io.BytesIO(body)), iterations)
+        parse_fast = self.timeit(lambda: FastJSONParser().parse(io.BytesIO(body)), iterations)
+        gzip_ms = self.timeit(lambda: compress_string(body), max(iterations // 10, 1))
+
+        self.stdout.write(
+            f"{path[:41]:<42}{len(body):>9}{len(compressed):>8}{drf_ms:>9.3f}{fast_ms:>9.3f}"
+            f"{drf_ms / fast_ms if fast_ms else 0:>6.1f}{parse_drf:>11.3f}{parse_fast:>11.3f}{gzip_ms:>9.3f}"
+        )
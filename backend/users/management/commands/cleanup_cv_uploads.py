@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import CVUpload
+from users.cv_uploads import discard_upload
+
+
+class Command(BaseCommand):
+    help = "Tugallanmagan eski chunked CV upload'larni va ularning vaqtinchalik fayllarini o'chirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help="Shuncha soatdan beri yangilanmagan upload'lar")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = CVUpload.objects.filter(status=CVUpload.STATUS_UPLOADING, updated_at__lt=cutoff)
+        count = 0
+        for upload in stale.iterator():
+            discard_upload(upload)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"{count} ta eski upload o'chirildi"))
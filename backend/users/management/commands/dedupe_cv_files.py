@@ -0,0 +1,71 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from users.models import CV, CVBlob
+from users.cv_storage import hash_file
+
+
+class Command(BaseCommand):
+    help = "Mavjud CV fayllarni sha256 bo'yicha blob'larga birlashtirish va takror fayllarni o'chirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Hech narsani o'zgartirmasdan hisobot berish")
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        linked = duplicates = missing = 0
+        reclaimed_bytes = 0
+        seen = {}  # dry-run uchun: sha256 -> birinchi fayl yo'li
+        last_id = 0
+
+        while True:
+            batch = list(CV.objects.filter(blob__isnull=True, id__gt=last_id).order_by('id')[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            for cv in batch:
+                name = cv.file.name
+                if not name or not default_storage.exists(name):
+                    missing += 1
+                    self.stderr.write(f"CV {cv.id}: fayl topilmadi ({name})")
+                    continue
+
+                with default_storage.open(name, 'rb') as f:
+                    sha256, size = hash_file(f)
+
+                if dry_run:
+                    if sha256 in seen and seen[sha256] != name:
+                        duplicates += 1
+                        reclaimed_bytes += size
+                    else:
+                        seen.setdefault(sha256, name)
+                    linked += 1
+                    continue
+
+                with transaction.atomic():
+                    blob = CVBlob.objects.select_for_update().filter(sha256=sha256).first()
+                    if blob is None:
+                        # Birinchi nusxa - mavjud fayl blob fayliga aylanadi (ko'chirilmaydi)
+                        blob = CVBlob.objects.create(sha256=sha256, file=name, size=size, ref_count=1)
+                    else:
+                        CVBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+                    CV.objects.filter(pk=cv.pk).update(blob=blob, file=blob.file.name)
+
+                linked += 1
+                if blob.file.name != name:
+                    # Takror fayl - boshqa CV ishlatmasa o'chiramiz
+                    if not CV.objects.filter(file=name).exists():
+                        default_storage.delete(name)
+                        reclaimed_bytes += size
+                    duplicates += 1
+
+        prefix = "[dry-run] " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{linked} ta CV blob'ga bog'landi, {duplicates} ta takror fayl, "
+            f"{missing} ta fayl topilmadi, {reclaimed_bytes / (1024 * 1024):.2f} MB bo'shatildi"
+        ))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.db.models import Q
+
+from users.models import CV, CVText
+from users.cv_text import get_executor, process_cv_file, save_extraction_result
+
+
+class Command(BaseCommand):
+    help = "CV fayllardan matn va preview tayyorlash (yangi, pending, xatolik bilan tugagan yoki preview'siz CV'lar uchun)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Barcha CV'larni qayta ishlash")
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        queryset = CV.objects.order_by('id')
+        if not options['all']:
+            queryset = queryset.filter(
+                Q(text__isnull=True) | ~Q(text__status=CVText.STATUS_DONE) |
+                Q(blob__isnull=False, blob__preview__isnull=True)
+            )
+
+        executor = get_executor()
+        batch_size = options['batch_size']
+        done = failed = 0
+        last_id = 0
+        preview_blob_ids = set()  # bir blob uchun preview faqat bir marta chiziladi
+        while True:
+            batch = list(queryset.filter(id__gt=last_id).only('id', 'file', 'blob_id')[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            futures = []
+            for cv in batch:
+                CVText.objects.get_or_create(cv=cv)
+                if not cv.file:
+                    save_extraction_result(cv.id, error='CV file is missing')
+                    failed += 1
+                    continue
+                with_preview = bool(cv.blob_id) and cv.blob_id not in preview_blob_ids
+                if with_preview:
+                    preview_blob_ids.add(cv.blob_id)
+                future = executor.submit(process_cv_file, cv.file.path, settings.CV_TEXT_MAX_CHARS, with_preview)
+                futures.append((cv.id, cv.blob_id, future))
+
+            for cv_id, blob_id, future in futures:
+                try:
+                    result = future.result()
+                    save_extraction_result(cv_id, content=result['text'], preview=result['preview'], blob_id=blob_id)
+                    done += 1
+                except Exception as e:
+                    save_extraction_result(cv_id, error=e)
+                    failed += 1
+                    self.stderr.write(f"CV {cv_id}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Tayyor: {done} ta muvaffaqiyatli, {failed} ta xatolik"))
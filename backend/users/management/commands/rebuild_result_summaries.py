@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.result_summary import refresh_result_summaries
+
+
+class Command(BaseCommand):
+    help = "Foydalanuvchilar natijalari xulosasini (tests_total_count, tests_passed_count, best_score, last_test_at) qayta hisoblash"
+
+    def handle(self, *args, **options):
+        updated = refresh_result_summaries()
+        self.stdout.write(self.style.SUCCESS(f"{updated} ta foydalanuvchi xulosasi yangilandi"))
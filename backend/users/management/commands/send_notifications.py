@@ -0,0 +1,34 @@
+import time
+import asyncio
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from users.broadcast import BroadcastEngine
+from users.outbox import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Notification outbox worker - navbatdagi xabarlarni batch'lab yuborish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--notification', type=int, default=None, help="Faqat shu notification ID uchun")
+        parser.add_argument('--once', action='store_true', help="Navbat bo'shagach to'xtash")
+        parser.add_argument('--sleep', type=float, default=5, help="Navbat bo'sh bo'lganda kutish (soniya)")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Notification worker ishga tushdi")
+        while True:
+            processed = asyncio.run(self._drain(options))
+            close_old_connections()
+            if processed:
+                self.stdout.write(f"{processed} ta xabar qayta ishlandi")
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS("Navbat bo'sh"))
+
+    async def _drain(self, options):
+        async with BroadcastEngine() as engine:
+            return await process_outbox(engine, options['batch_size'], options['notification'])
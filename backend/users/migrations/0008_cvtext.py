@@ -0,0 +1,78 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Full-text index: PostgreSQL'da GIN (tsvector), SQLite'da FTS5 virtual table
+POSTGRES_FORWARD_SQL = [
+    "CREATE INDEX users_cvtext_content_fts ON users_cvtext USING GIN (to_tsvector('simple', content))",
+]
+POSTGRES_REVERSE_SQL = [
+    "DROP INDEX IF EXISTS users_cvtext_content_fts",
+]
+SQLITE_FORWARD_SQL = [
+    "CREATE VIRTUAL TABLE users_cvtext_fts USING fts5(content, content='users_cvtext', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER users_cvtext_fts_ai AFTER INSERT ON users_cvtext BEGIN "
+    "INSERT INTO users_cvtext_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER users_cvtext_fts_ad AFTER DELETE ON users_cvtext BEGIN "
+    "INSERT INTO users_cvtext_fts(users_cvtext_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER users_cvtext_fts_au AFTER UPDATE OF content ON users_cvtext BEGIN "
+    "INSERT INTO users_cvtext_fts(users_cvtext_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO users_cvtext_fts(rowid, content) VALUES (new.id, new.content); END",
+]
+SQLITE_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS users_cvtext_fts_au",
+    "DROP TRIGGER IF EXISTS users_cvtext_fts_ad",
+    "DROP TRIGGER IF EXISTS users_cvtext_fts_ai",
+    "DROP TABLE IF EXISTS users_cvtext_fts",
+]
+
+
+def _run_vendor_sql(schema_editor, postgres_sql, sqlite_sql):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        statements = postgres_sql
+    elif vendor == 'sqlite':
+        statements = sqlite_sql
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    _run_vendor_sql(schema_editor, POSTGRES_FORWARD_SQL, SQLITE_FORWARD_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    _run_vendor_sql(schema_editor, POSTGRES_REVERSE_SQL, SQLITE_REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_notificationerror'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField(blank=True, default='', help_text='CV fayldan ajratib olingan matn', verbose_name='Content')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10, verbose_name='Status')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='Error Message')),
+                ('extracted_at', models.DateTimeField(blank=True, null=True, verbose_name='Extracted at')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('cv', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='text', to='users.cv', verbose_name='CV')),
+            ],
+            options={
+                'verbose_name': 'CV Text',
+                'verbose_name_plural': 'CV Texts',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
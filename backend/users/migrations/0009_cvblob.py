@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_cvtext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('file', models.FileField(max_length=255, upload_to='cvs/blobs/', verbose_name='File')),
+                ('size', models.BigIntegerField(verbose_name='Size (bytes)')),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text="Shu faylga bog'langan CV'lar soni", verbose_name='Reference Count')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+            ],
+            options={
+                'verbose_name': 'CV Blob',
+                'verbose_name_plural': 'CV Blobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='cv',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='cvs', to='users.cvblob', verbose_name='Blob'),
+        ),
+    ]
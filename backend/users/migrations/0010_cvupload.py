@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_cvblob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255, verbose_name='File Name')),
+                ('file_size', models.BigIntegerField(verbose_name='File Size (bytes)')),
+                ('offset', models.BigIntegerField(default=0, help_text='Qabul qilingan baytlar soni', verbose_name='Offset')),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('completed', 'Completed')], default='uploading', max_length=10, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('cv', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload', to='users.cv', verbose_name='CV')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cv_uploads', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'CV Upload',
+                'verbose_name_plural': 'CV Uploads',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
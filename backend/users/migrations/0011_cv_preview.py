@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_cvupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cvblob',
+            name='preview',
+            field=models.FileField(blank=True, help_text='Birinchi sahifa PNG thumbnail', max_length=255, null=True, upload_to='cvs/blobs/', verbose_name='Preview'),
+        ),
+        migrations.AddField(
+            model_name='cvtext',
+            name='snippet',
+            field=models.CharField(blank=True, help_text="Ro'yxat uchun qisqa matn", max_length=500, null=True, verbose_name='Snippet'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_errors_count(apps, schema_editor):
+    Notification = apps.get_model('users', 'Notification')
+    NotificationError = apps.get_model('users', 'NotificationError')
+    errors = (
+        NotificationError.objects.filter(notification=OuterRef('pk'))
+        .order_by()
+        .values('notification')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Notification.objects.update(errors_count=Coalesce(Subquery(errors), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_notificationdelivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='errors_count',
+            field=models.IntegerField(default=0, help_text='Saqlangan xatoliklar soni (NotificationError)', verbose_name='Errors Count'),
+        ),
+        migrations.RunPython(backfill_errors_count, migrations.RunPython.noop),
+    ]
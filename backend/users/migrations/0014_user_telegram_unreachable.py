@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_notification_errors_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='telegram_unreachable_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Bot bloklangan yoki chat topilmagan vaqt - xabarlar yuborilmaydi', null=True, verbose_name='Telegram Unreachable At'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='telegram_unreachable_reason',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Telegram Unreachable Reason'),
+        ),
+    ]
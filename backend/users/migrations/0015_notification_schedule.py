@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_user_telegram_unreachable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='delivery_window_minutes',
+            field=models.PositiveIntegerField(blank=True, help_text="Xabarlarni shuncha daqiqa davomida bir tekis tarqatish (bo'sh - imkon qadar tez)", null=True, verbose_name='Delivery Window (minutes)'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='scheduled_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text="Yuborishni boshlash vaqti (bo'sh - navbatga qo'yilgach darhol)", null=True, verbose_name='Scheduled At'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0007_test_max_trial_attempts_alter_test_max_attempts'),
+        ('users', '0015_notification_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='template_test',
+            field=models.ForeignKey(blank=True, help_text="{{score}}, {{status}} va boshqa natija placeholder'lari shu test bo'yicha oxirgi natijadan olinadi", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to='tests.test', verbose_name='Template Test'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:10
+
+from django.db import migrations, models
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_result_summary(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    TestResult = apps.get_model('tests', 'TestResult')
+    completed = TestResult.objects.filter(user=OuterRef('pk'), is_completed=True).order_by().values('user')
+    passed = completed.filter(score__gte=F('test__passing_score'))
+    User.objects.update(
+        tests_total_count=Coalesce(Subquery(completed.annotate(total=Count('id')).values('total')), Value(0)),
+        tests_passed_count=Coalesce(Subquery(passed.annotate(total=Count('id')).values('total')), Value(0)),
+        best_score=Subquery(completed.annotate(best=Max('score')).values('best')),
+        last_test_at=Subquery(completed.annotate(last=Max('completed_at')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0007_test_max_trial_attempts_alter_test_max_attempts'),
+        ('users', '0016_notification_template_test'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='best_score',
+            field=models.IntegerField(blank=True, help_text='Eng yaxshi ball', null=True, verbose_name='Best Score'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_test_at',
+            field=models.DateTimeField(blank=True, help_text='Oxirgi yakunlangan test vaqti', null=True, verbose_name='Last Test At'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='tests_passed_count',
+            field=models.PositiveIntegerField(default=0, help_text="Jami o'tgan testlar soni", verbose_name='Tests Passed Count'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='tests_total_count',
+            field=models.PositiveIntegerField(default=0, help_text='Jami ishlangan testlar soni', verbose_name='Tests Total Count'),
+        ),
+        migrations.RunPython(backfill_result_summary, migrations.RunPython.noop),
+    ]
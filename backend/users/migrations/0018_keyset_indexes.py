@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0017_user_result_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cv',
+            index=models.Index(fields=['uploaded_at', 'id'], name='users_cv_uploade_8280c7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['created_at', 'id'], name='users_notif_created_7e54f2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at', 'id'], name='users_user_created_cead48_idx'),
+        ),
+    ]
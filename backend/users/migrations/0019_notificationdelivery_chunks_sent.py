@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0018_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationdelivery',
+            name='chunks_sent',
+            field=models.PositiveSmallIntegerField(default=0, help_text="Uzun xabarning yuborilgan bo'laklari soni - qayta urinish shu joydan davom etadi", verbose_name='Chunks sent'),
+        ),
+    ]
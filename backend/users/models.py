@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
@@ -31,6 +32,13 @@ class User(AbstractUser):
     blocked_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Blocked At'))
     trial_tests_taken = models.JSONField(default=list, blank=True, verbose_name=_('Trial Tests Taken'), help_text=_('Qaysi testlardan trial test olgan'))
     notification_enabled = models.BooleanField(default=True, verbose_name=_('Notification Enabled'), help_text=_('Telegram orqali bildirishnomalar yoqilganmi'))
+    telegram_unreachable_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name=_('Telegram Unreachable At'), help_text=_('Bot bloklangan yoki chat topilmagan vaqt - xabarlar yuborilmaydi'))
+    telegram_unreachable_reason = models.CharField(max_length=255, null=True, blank=True, verbose_name=_('Telegram Unreachable Reason'))
+    # Natijalar xulosasi - users/result_summary.py orqali yangilanadi
+    tests_total_count = models.PositiveIntegerField(default=0, verbose_name=_('Tests Total Count'), help_text=_('Jami ishlangan testlar soni'))
+    tests_passed_count = models.PositiveIntegerField(default=0, verbose_name=_('Tests Passed Count'), help_text=_('Jami o\'tgan testlar soni'))
+    best_score = models.IntegerField(null=True, blank=True, verbose_name=_('Best Score'), help_text=_('Eng yaxshi ball'))
+    last_test_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Last Test At'), help_text=_('Oxirgi yakunlangan test vaqti'))
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated at'))
 
@@ -38,6 +46,9 @@ class User(AbstractUser):
         verbose_name = _('User')
         verbose_name_plural = _('Users')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}" if self.first_name or self.last_name else self.username
@@ -72,6 +83,9 @@ class Notification(models.Model):
     recipients = models.ManyToManyField(User, verbose_name=_('Recipients'), help_text=_('Xabarni oladigan foydalanuvchilar'), blank=True)
     send_to_all = models.BooleanField(default=False, verbose_name=_('Send to All'), help_text=_('Barcha bot a\'zolariga yuborish'))
     sent_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Sent At'), help_text=_('Xabar yuborilgan vaqt'))
+    scheduled_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name=_('Scheduled At'), help_text=_('Yuborishni boshlash vaqti (bo\'sh - navbatga qo\'yilgach darhol)'))
+    delivery_window_minutes = models.PositiveIntegerField(null=True, blank=True, verbose_name=_('Delivery Window (minutes)'), help_text=_('Xabarlarni shuncha daqiqa davomida bir tekis tarqatish (bo\'sh - imkon qadar tez)'))
+    template_test = models.ForeignKey('tests.Test', on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications', verbose_name=_('Template Test'), help_text=_('{{score}}, {{status}} va boshqa natija placeholder\'lari shu test bo\'yicha oxirgi natijadan olinadi'))
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='notifications_created', verbose_name=_('Created By'))
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated at'))
@@ -80,11 +94,15 @@ class Notification(models.Model):
     total_recipients = models.IntegerField(default=0, verbose_name=_('Total Recipients'), help_text=_('Jami yuborilgan foydalanuvchilar soni'))
     successful_sends = models.IntegerField(default=0, verbose_name=_('Successful Sends'), help_text=_('Muvaffaqiyatli yuborilgan'))
     failed_sends = models.IntegerField(default=0, verbose_name=_('Failed Sends'), help_text=_('Xatolik bilan yuborilgan'))
+    errors_count = models.IntegerField(default=0, verbose_name=_('Errors Count'), help_text=_('Saqlangan xatoliklar soni (NotificationError)'))
 
     class Meta:
         verbose_name = _('Notification')
         verbose_name_plural = _('Notifications')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else 'Draft'}"
@@ -112,10 +130,70 @@ class NotificationError(models.Model):
         return f"{self.notification.title} - {self.user} - {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
 
 
+class NotificationDelivery(models.Model):
+    """Notification outbox - har bir qabul qiluvchi uchun bitta yozuv (kimga yuborilgani aniq bo'ladi)"""
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_SENDING, _('Sending')),
+        (STATUS_SENT, _('Sent')),
+        (STATUS_FAILED, _('Failed')),
+    ]
+
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='deliveries', verbose_name=_('Notification'))
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_deliveries', verbose_name=_('User'))
+    telegram_id = models.BigIntegerField(verbose_name=_('Telegram ID'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name=_('Status'))
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_('Attempts'))
+    chunks_sent = models.PositiveSmallIntegerField(default=0, verbose_name=_('Chunks sent'), help_text=_('Uzun xabarning yuborilgan bo\'laklari soni - qayta urinish shu joydan davom etadi'))
+    last_error = models.TextField(blank=True, null=True, verbose_name=_('Last Error'))
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Locked at'), help_text=_('Worker yozuvni olgan vaqt'))
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Sent At'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated at'))
+
+    class Meta:
+        verbose_name = _('Notification Delivery')
+        verbose_name_plural = _('Notification Deliveries')
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'user'], name='unique_notification_delivery'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'id']),
+            models.Index(fields=['notification', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.notification_id} -> {self.telegram_id} ({self.get_status_display()})"
+
+
+class CVBlob(models.Model):
+    """CV fayl kontenti - sha256 bo'yicha faqat bir marta saqlanadi"""
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name=_('SHA-256'))
+    file = models.FileField(upload_to='cvs/blobs/', max_length=255, verbose_name=_('File'))
+    size = models.BigIntegerField(verbose_name=_('Size (bytes)'))
+    ref_count = models.PositiveIntegerField(default=0, verbose_name=_('Reference Count'), help_text=_('Shu faylga bog\'langan CV\'lar soni'))
+    preview = models.FileField(upload_to='cvs/blobs/', max_length=255, null=True, blank=True, verbose_name=_('Preview'), help_text=_('Birinchi sahifa PNG thumbnail'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
+
+    class Meta:
+        verbose_name = _('CV Blob')
+        verbose_name_plural = _('CV Blobs')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count})"
+
+
 class CV(models.Model):
     """CV file model"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cvs', verbose_name=_('User'))
     file = models.FileField(upload_to='cvs/%Y/%m/%d/', verbose_name=_('CV File'))
+    blob = models.ForeignKey(CVBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='cvs', verbose_name=_('Blob'))
     file_name = models.CharField(max_length=255, verbose_name=_('File Name'))
     file_size = models.IntegerField(verbose_name=_('File Size (bytes)'))
     uploaded_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Uploaded at'))
@@ -124,6 +202,66 @@ class CV(models.Model):
         verbose_name = _('CV')
         verbose_name_plural = _('CVs')
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['uploaded_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.file_name}"
+
+
+class CVUpload(models.Model):
+    """Chunked (bo'lib-bo'lib) CV yuklash sessiyasi - offset bo'yicha davom ettirish mumkin"""
+    STATUS_UPLOADING = 'uploading'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, _('Uploading')),
+        (STATUS_COMPLETED, _('Completed')),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cv_uploads', verbose_name=_('User'))
+    file_name = models.CharField(max_length=255, verbose_name=_('File Name'))
+    file_size = models.BigIntegerField(verbose_name=_('File Size (bytes)'))
+    offset = models.BigIntegerField(default=0, verbose_name=_('Offset'), help_text=_('Qabul qilingan baytlar soni'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_UPLOADING, verbose_name=_('Status'))
+    cv = models.OneToOneField(CV, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload', verbose_name=_('CV'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated at'))
+
+    class Meta:
+        verbose_name = _('CV Upload')
+        verbose_name_plural = _('CV Uploads')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.file_name} ({self.offset}/{self.file_size})"
+
+
+class CVText(models.Model):
+    """CV fayldan ajratib olingan matn - full-text qidiruv uchun"""
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_DONE, _('Done')),
+        (STATUS_FAILED, _('Failed')),
+    ]
+
+    cv = models.OneToOneField(CV, on_delete=models.CASCADE, related_name='text', verbose_name=_('CV'))
+    content = models.TextField(blank=True, default='', verbose_name=_('Content'), help_text=_('CV fayldan ajratib olingan matn'))
+    snippet = models.CharField(max_length=500, null=True, blank=True, verbose_name=_('Snippet'), help_text=_('Ro\'yxat uchun qisqa matn'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True, verbose_name=_('Status'))
+    error_message = models.TextField(blank=True, null=True, verbose_name=_('Error Message'))
+    extracted_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Extracted at'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated at'))
+
+    class Meta:
+        verbose_name = _('CV Text')
+        verbose_name_plural = _('CV Texts')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.cv} - {self.get_status_display()}"
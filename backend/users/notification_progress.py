@@ -0,0 +1,137 @@
+"""
+Broadcast progress - server-sent events (SSE) oqimi.
+
+Worker'lar natijalarni xotirada buferlab, Notification hisoblagichlariga davriy yozadi (DeliveryRecorder).
+Oqim har interval'da faqat shu hisoblagichlarni o'qiydi (bitta PK so'rov) - har bir yuborilgan xabar
+uchun alohida so'rov yo'q.
+
+Ikki rejim:
+- JSON (Accept: application/json yoki ?format=json) - bitta snapshot, worker darhol bo'shaydi. Sync gunicorn
+  worker'larida (deployment/gunicorn_config.py) mijozlar shu rejimda snapshot['poll_after'] soniyada bir so'raydi;
+- SSE - async/gthread worker'lar uchun. Oqim qisqa muddatli (muddat tugagach yopiladi, EventSource `retry`
+  bo'yicha qayta ulanadi); 'done' yoki 'scheduled' freymidan keyin yopiladi - rejalashtirilgan xabar uchun
+  mijoz scheduled_at'gacha qayta ulanmaydi.
+"""
+import json
+import time
+from collections import deque
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .outbox import projected_completion
+
+RATE_WINDOW_SECONDS = 10
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+POLL_SECONDS = 3
+# Rejalashtirilgan xabar uchun keyingi so'rovgacha eng ko'p kutish (scheduled_at o'zgartirilishi mumkin)
+MAX_SCHEDULED_POLL_SECONDS = 300
+
+
+def progress_snapshot(notification_id):
+    """
+    Notification progress holati (bitta so'rov)
+    Returns: dict yoki None (notification topilmasa)
+    """
+    from .models import Notification
+
+    notification = Notification.objects.filter(pk=notification_id).only(
+        'sent_at', 'scheduled_at', 'delivery_window_minutes',
+        'total_recipients', 'successful_sends', 'failed_sends', 'errors_count'
+    ).first()
+    if notification is None:
+        return None
+
+    total = notification.total_recipients or 0
+    sent = notification.successful_sends or 0
+    failed = notification.failed_sends or 0
+    pending = max(0, total - sent - failed)
+    if notification.sent_at is None:
+        state = 'draft'
+    elif notification.scheduled_at and notification.scheduled_at > timezone.now():
+        state = 'scheduled'
+    elif pending:
+        state = 'sending'
+    else:
+        state = 'done'
+    finish = projected_completion(notification)
+    if state == 'sending':
+        poll_after = POLL_SECONDS
+    elif state == 'scheduled':
+        until = (notification.scheduled_at - timezone.now()).total_seconds()
+        poll_after = int(min(max(until, POLL_SECONDS), MAX_SCHEDULED_POLL_SECONDS))
+    else:
+        poll_after = None
+    return {
+        'id': notification.id,
+        'state': state,
+        'scheduled_at': notification.scheduled_at.isoformat() if notification.scheduled_at else None,
+        'poll_after': poll_after,
+        'total': total,
+        'sent': sent,
+        'failed': failed,
+        'pending': pending,
+        'errors': notification.errors_count or 0,
+        'projected_completion': finish.isoformat() if finish else None,
+    }
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def iter_progress_events(notification_id, interval=None, duration=None):
+    """
+    SSE freymlari: o'zgarish bo'lganda 'progress', oxirida 'done' yoki 'scheduled' (yoki muddat tugaganda yopiladi)
+    Throughput (msg/s) oxirgi RATE_WINDOW_SECONDS ichidagi hisoblagich o'zgarishidan hisoblanadi.
+    """
+    interval = interval or settings.NOTIFICATION_PROGRESS_INTERVAL
+    duration = duration or settings.NOTIFICATION_PROGRESS_STREAM_SECONDS
+    started = time.monotonic()
+    samples = deque()  # (vaqt, sent + failed)
+    last_payload = None
+    last_event_at = started
+
+    yield f"retry: {RETRY_MILLISECONDS}\n\n"
+    while True:
+        now = time.monotonic()
+        snapshot = progress_snapshot(notification_id)
+        if snapshot is None:
+            yield _event('error', {'error': 'Notification not found'})
+            return
+
+        processed = snapshot['sent'] + snapshot['failed']
+        samples.append((now, processed))
+        while len(samples) > 2 and now - samples[0][0] > RATE_WINDOW_SECONDS:
+            samples.popleft()
+        elapsed = now - samples[0][0]
+        snapshot['rate'] = round((processed - samples[0][1]) / elapsed, 1) if elapsed > 0 else 0.0
+
+        if snapshot['state'] in ('done', 'draft'):
+            yield _event('done', snapshot)
+            return
+        if snapshot['state'] == 'scheduled':
+            # Yuborish scheduled_at'da boshlanadi - ungacha ulanishni ochiq ushlab turmaymiz
+            yield _event('scheduled', snapshot)
+            return
+        if snapshot != last_payload:
+            yield _event('progress', snapshot)
+            last_payload, last_event_at = snapshot, now
+        elif now - last_event_at >= HEARTBEAT_SECONDS:
+            # Proxy ulanishni yopib qo'ymasligi uchun
+            yield ": heartbeat\n\n"
+            last_event_at = now
+
+        if now - started >= duration:
+            return
+        time.sleep(interval)
+
+
+def build_progress_response(notification_id):
+    response = StreamingHttpResponse(iter_progress_events(notification_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx javobni buferlamasin - freymlar darhol yetib borsin
+    response['X-Accel-Buffering'] = 'no'
+    return response
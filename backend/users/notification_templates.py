@@ -0,0 +1,123 @@
+"""
+Notification shablonlari - xabar matnidagi {{placeholder}}'lar har bir qabul qiluvchi uchun to'ldiriladi.
+
+Shablon bir marta kompilyatsiya qilinadi (Telegram HTML bo'laklari -> matn/placeholder qismlari;
+bo'laklash placeholder'ni ikkiga bo'lmaydi - telegram_html._split_point),
+qabul qiluvchilar ma'lumoti esa har bir batch uchun bitta annotatsiyalangan so'rov bilan olinadi.
+"""
+import re
+from functools import lru_cache
+from html import escape
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .telegram_html import TELEGRAM_MESSAGE_LIMIT, render_telegram_chunks
+
+PLACEHOLDER_RE = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+# placeholder -> tavsif (admin yordam matni uchun)
+PLACEHOLDERS = {
+    'first_name': 'Ism',
+    'last_name': 'Familiya',
+    'full_name': 'To\'liq ism',
+    'position': 'Lavozim',
+    'test': 'Shablon testi nomi',
+    'score': 'Oxirgi natija bali (%)',
+    'status': 'O\'tdi / O\'tmadi',
+    'correct_answers': 'To\'g\'ri javoblar soni',
+    'total_questions': 'Savollar soni',
+    'completed_at': 'Test yakunlangan vaqt',
+}
+RESULT_PLACEHOLDERS = {'score', 'status', 'correct_answers', 'total_questions', 'completed_at'}
+
+
+@lru_cache(maxsize=64)
+def compile_template(chunks):
+    """
+    Telegram HTML bo'laklari -> har bir bo'lak uchun qismlar ro'yxati.
+    Qismlar ro'yxatida juft indekslar - tayyor HTML, toq indekslar - placeholder nomi.
+    """
+    return tuple(PLACEHOLDER_RE.split(chunk) for chunk in chunks)
+
+
+def template_placeholders(compiled):
+    return {name for parts in compiled for name in parts[1::2]}
+
+
+def _context_value(context, name):
+    """None va noma'lum placeholder - bo'sh satr; 0 kabi falsy qiymatlar saqlanadi"""
+    value = context.get(name)
+    return '' if value is None else value
+
+
+def render_template(compiled, context):
+    """
+    Kompilyatsiya qilingan shablonni bitta qabul qiluvchi uchun to'ldirish
+    Noma'lum placeholder bo'sh qoladi, qiymatlar escape qilinadi.
+    Returns: Telegram HTML bo'laklari (har biri <= 4096 belgi)
+    """
+    messages = []
+    for parts in compiled:
+        values = [escape(str(_context_value(context, name)), quote=False) for name in parts[1::2]]
+        text = ''.join(
+            part if index % 2 == 0 else values[index // 2]
+            for index, part in enumerate(parts)
+        )
+        if len(text) > TELEGRAM_MESSAGE_LIMIT:
+            # Qiymatlar bo'lakni limitdan oshirib yuborgan (kamdan-kam) - qayta bo'lamiz
+            messages.extend(render_telegram_chunks(text))
+        else:
+            messages.append(text)
+    return messages
+
+
+def load_template_contexts(notification, user_ids, placeholders=None):
+    """
+    Qabul qiluvchilar uchun placeholder qiymatlari - bitta so'rov (oxirgi natija subquery annotatsiyalari bilan)
+    Returns: {user_id: {placeholder: value}}
+    """
+    from .models import User
+    from tests.models import TestResult
+
+    test = notification.template_test
+    placeholders = set(PLACEHOLDERS) if placeholders is None else placeholders
+    queryset = User.objects.filter(id__in=user_ids).values('id', 'first_name', 'last_name', 'username', 'position__name')
+
+    if test is not None and placeholders & RESULT_PLACEHOLDERS:
+        latest = TestResult.objects.filter(
+            user=OuterRef('pk'),
+            test=test,
+            is_completed=True
+        ).order_by('-completed_at')
+        queryset = queryset.annotate(
+            result_score=Subquery(latest.values('score')[:1]),
+            result_correct=Subquery(latest.values('correct_answers')[:1]),
+            result_total=Subquery(latest.values('total_questions')[:1]),
+            result_completed_at=Subquery(latest.values('completed_at')[:1]),
+        )
+
+    contexts = {}
+    for row in queryset:
+        full_name = f"{row['first_name'] or ''} {row['last_name'] or ''}".strip() or row['username']
+        context = {
+            'first_name': row['first_name'] or full_name,
+            'last_name': row['last_name'],
+            'full_name': full_name,
+            'position': row['position__name'],
+            'test': test.title if test else '',
+        }
+        score = row.get('result_score')
+        if score is not None:
+            completed_at = row['result_completed_at']
+            context.update({
+                'score': f"{score}%",
+                'status': "O'tdi" if TestResult(test=test, score=score).is_passed else "O'tmadi",
+                'correct_answers': row['result_correct'],
+                'total_questions': row['result_total'],
+                'completed_at': timezone.localtime(completed_at).strftime('%Y-%m-%d %H:%M') if completed_at else '',
+            })
+        elif test is not None:
+            context['status'] = "Ishlanmagan"
+        contexts[row['id']] = context
+    return contexts
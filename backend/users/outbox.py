@@ -0,0 +1,417 @@
+"""
+Notification outbox - xabarlar avval NotificationDelivery yozuvlariga navbatga qo'yiladi,
+keyin worker ularni batch'lab oladi (row lock) va yuboradi.
+
+Worker to'xtab qolsa, keyingi ishga tushishda aynan qolgan joydan davom etadi:
+- sent yozuvlar qayta yuborilmaydi;
+- 'sending' holatida qolib ketgan yozuvlar lease muddati o'tgach qayta olinadi.
+- uzun (bir necha bo'lakli) xabarda yuborilgan bo'laklar soni (chunks_sent) darhol yoziladi -
+  qayta urinish birinchi bo'lakni qayta yubormaydi, qolgan bo'lakdan davom etadi;
+- yuborilgan (sent) holati buferlab yoziladi: worker flush'dan oldin to'xtasa ko'pi bilan
+  flush_size (FLUSH_SIZE_LIMIT dan oshmaydi) yoki flush_interval soniyadagi xabarlar qayta yuboriladi.
+Notification statistikasi outbox aggregate'laridan hisoblanadi.
+
+Jadval (scheduled_at, delivery_window_minutes) ham faqat DB holatidan hisoblanadi:
+har bir claim'da notification uchun "hozirgacha chiqarilishi kerak bo'lgan" yozuvlar soni
+topiladi, shuning uchun worker qayta ishga tushganda jadval buzilmaydi.
+"""
+import math
+import time
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+ENQUEUE_BATCH_SIZE = 1000
+# Buferdagi natijalar soni chegarasi - crash'da qayta yuborilishi mumkin bo'lgan xabarlar shundan oshmaydi
+FLUSH_SIZE_LIMIT = 100
+
+
+def iter_enqueue_notification(notification):
+    """
+    Notification qabul qiluvchilari uchun delivery yozuvlarini batch'lab yaratish (bulk).
+    Har bir batch alohida commit qilinadi va yield qilinadi - worker birinchi batch'dan
+    boshlab yuborishni boshlaydi.
+    Qayta yuborishda faqat yuborilmagan va xatolik bilan tugaganlar navbatga qaytadi.
+    """
+    from .models import NotificationDelivery
+    from .services import iter_notification_recipients
+
+    NotificationDelivery.objects.filter(
+        notification=notification,
+        status=NotificationDelivery.STATUS_FAILED,
+        user__telegram_unreachable_at__isnull=True
+    ).update(status=NotificationDelivery.STATUS_PENDING, last_error=None, updated_at=timezone.now())
+
+    for batch in iter_notification_recipients(notification, ENQUEUE_BATCH_SIZE):
+        NotificationDelivery.objects.bulk_create(
+            [
+                NotificationDelivery(notification=notification, user_id=user_id, telegram_id=telegram_id)
+                for user_id, telegram_id in batch
+            ],
+            ignore_conflicts=True
+        )
+        yield len(batch)
+
+    refresh_notification_stats([notification.id])
+
+
+def enqueue_notification(notification):
+    """
+    Notification'ni to'liq navbatga qo'yish
+    Returns: navbatdagi (pending) yozuvlar soni
+    """
+    from .models import NotificationDelivery
+
+    for _ in iter_enqueue_notification(notification):
+        pass
+    return NotificationDelivery.objects.filter(
+        notification=notification,
+        status=NotificationDelivery.STATUS_PENDING
+    ).count()
+
+
+def delivery_start(notification):
+    """Yuborish boshlanadigan vaqt - scheduled_at, bo'lmasa navbatga qo'yilgan vaqt (sent_at)"""
+    return notification.scheduled_at or notification.sent_at
+
+
+def release_budget(notification, total, pending, now=None):
+    """
+    Notification'ning hozir yuborishga chiqarilishi mumkin bo'lgan pending yozuvlari soni.
+    Oyna (delivery_window_minutes) berilgan bo'lsa yozuvlar oyna davomida bir tekis chiqariladi:
+    t vaqtgacha jami total * t / window ta.
+    """
+    now = now or timezone.now()
+    if notification.scheduled_at and now < notification.scheduled_at:
+        return 0
+    if not notification.delivery_window_minutes:
+        return pending
+    # sent_at hali yozilmagan bo'lsa ham oyna saqlanadi - hammasi birdaniga chiqarilmaydi
+    start = delivery_start(notification) or notification.created_at or now
+    elapsed = (now - start).total_seconds()
+    allowed = math.ceil(total * min(1.0, max(0.0, elapsed) / (notification.delivery_window_minutes * 60)))
+    released = total - pending
+    return max(0, min(pending, allowed - released))
+
+
+def release_budgets(deliveries, now=None):
+    """
+    Pending yozuvlari bor notification'lar uchun budget'lar (notification_id tartibida)
+    Returns: {notification_id: budget}
+    """
+    from .models import Notification, NotificationDelivery
+
+    notification_ids = set(
+        deliveries.filter(status=NotificationDelivery.STATUS_PENDING)
+        .values_list('notification_id', flat=True).distinct()
+    )
+    if not notification_ids:
+        return {}
+    notifications = Notification.objects.only('scheduled_at', 'delivery_window_minutes', 'sent_at', 'created_at').in_bulk(notification_ids)
+    rows = (
+        NotificationDelivery.objects.filter(notification_id__in=notification_ids)
+        .values('notification_id')
+        .annotate(total=Count('id'), pending=Count('id', filter=Q(status=NotificationDelivery.STATUS_PENDING)))
+    )
+    return {
+        row['notification_id']: release_budget(notifications[row['notification_id']], row['total'], row['pending'], now)
+        for row in sorted(rows, key=lambda row: row['notification_id'])
+    }
+
+
+def projected_completion(notification, now=None):
+    """
+    Taxminiy tugash vaqti - qolgan xabarlar broadcast tezligida, oyna berilgan bo'lsa oyna oxiridan oldin emas
+    Returns: datetime yoki None (navbatga qo'yilmagan yoki hammasi yuborilgan)
+    """
+    from .broadcast import broadcast_rate
+
+    now = now or timezone.now()
+    start = delivery_start(notification)
+    remaining = (notification.total_recipients or 0) - (notification.successful_sends or 0) - (notification.failed_sends or 0)
+    if start is None or remaining <= 0:
+        return None
+    finish = max(now, start) + timezone.timedelta(seconds=remaining / broadcast_rate())
+    if notification.delivery_window_minutes:
+        finish = max(finish, start + timezone.timedelta(minutes=notification.delivery_window_minutes))
+    return finish
+
+
+def claim_deliveries(batch_size, notification_id=None):
+    """
+    Navbatdagi yozuvlarni olish - boshqa worker'lar olgan qatorlar o'tkazib yuboriladi (skip_locked).
+    Pending yozuvlar jadval bo'yicha (release_budget) chiqariladi.
+    Returns: NotificationDelivery list (status=sending)
+    """
+    from .models import NotificationDelivery
+
+    now = timezone.now()
+    stale_before = now - timezone.timedelta(seconds=settings.NOTIFICATION_DELIVERY_LEASE_SECONDS)
+    max_attempts = settings.NOTIFICATION_DELIVERY_MAX_ATTEMPTS
+
+    queryset = NotificationDelivery.objects.all()
+    if notification_id is not None:
+        queryset = queryset.filter(notification_id=notification_id)
+
+    with transaction.atomic():
+        # Lease muddati o'tgan va urinishlar tugagan yozuvlar - failed
+        expired = queryset.filter(
+            status=NotificationDelivery.STATUS_SENDING,
+            locked_at__lt=stale_before,
+            attempts__gte=max_attempts
+        )
+        expired_notification_ids = set(expired.values_list('notification_id', flat=True).distinct())
+        if expired_notification_ids:
+            expired.update(status=NotificationDelivery.STATUS_FAILED, last_error='Worker lease expired', locked_at=None, updated_at=now)
+            refresh_notification_stats(expired_notification_ids)
+
+        # Lease muddati o'tgan 'sending' yozuvlar allaqachon chiqarilgan - jadvalga bog'liq emas
+        ids = list(
+            queryset.select_for_update(skip_locked=True)
+            .filter(status=NotificationDelivery.STATUS_SENDING, locked_at__lt=stale_before)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        for budget_notification_id, budget in release_budgets(queryset, now).items():
+            limit = min(budget, batch_size - len(ids))
+            if limit <= 0:
+                continue
+            ids += queryset.select_for_update(skip_locked=True).filter(
+                notification_id=budget_notification_id,
+                status=NotificationDelivery.STATUS_PENDING
+            ).order_by('id').values_list('id', flat=True)[:limit]
+        if not ids:
+            return []
+        NotificationDelivery.objects.filter(id__in=ids).update(
+            status=NotificationDelivery.STATUS_SENDING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+            updated_at=now
+        )
+    return list(NotificationDelivery.objects.filter(id__in=ids).select_related('notification__template_test').order_by('id'))
+
+
+def save_chunk_progress(delivery_id, chunks_sent):
+    """Uzun xabarning yuborilgan bo'laklari sonini darhol yozish (bufer kutilmaydi)"""
+    from .models import NotificationDelivery
+
+    NotificationDelivery.objects.filter(pk=delivery_id).update(chunks_sent=chunks_sent)
+
+
+class DeliveryRecorder:
+    """
+    Yuborish natijalarini buferlab yozish: har bir flush'da
+    sent'lar bitta UPDATE, failed'lar bulk_update, xatoliklar bulk_create,
+    Notification hisoblagichlari esa notification boshiga bitta F() UPDATE bilan yoziladi.
+    Bufer FLUSH_SIZE_LIMIT dan katta bo'lmaydi - worker to'xtasa qayta yuboriladigan xabarlar soni shu bilan chegaralangan.
+    """
+
+    def __init__(self, flush_size=None, flush_interval=None):
+        self.flush_size = min(flush_size or settings.NOTIFICATION_STATS_FLUSH_SIZE, FLUSH_SIZE_LIMIT)
+        self.flush_interval = settings.NOTIFICATION_STATS_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.buffer = []
+        self._last_flush = time.monotonic()
+
+    def add(self, delivery, success, error_type=None, error_message=None):
+        self.buffer.append((delivery, success, error_type, error_message))
+
+    def flush_due(self):
+        return bool(self.buffer) and (
+            len(self.buffer) >= self.flush_size or
+            time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    def take(self):
+        results, self.buffer = self.buffer, []
+        self._last_flush = time.monotonic()
+        return results
+
+    @staticmethod
+    def write(results):
+        """results: [(delivery, success, error_type, error_message), ...]"""
+        from .models import Notification, NotificationDelivery, NotificationError, User
+        from .services import classify_unreachable_error
+
+        if not results:
+            return
+        now = timezone.now()
+        sent_ids = []
+        failed = []
+        unreachable = {}  # sabab -> user_id'lar
+        counters = {}  # notification_id -> [sent, failed]
+        for delivery, success, error_type, error_message in results:
+            counter = counters.setdefault(delivery.notification_id, [0, 0])
+            if success:
+                sent_ids.append(delivery.id)
+                counter[0] += 1
+            else:
+                delivery.status = NotificationDelivery.STATUS_FAILED
+                delivery.last_error = f"{error_type}: {error_message}"
+                delivery.locked_at = None
+                delivery.updated_at = now
+                failed.append((delivery, error_type, error_message))
+                counter[1] += 1
+                reason = classify_unreachable_error(error_type, error_message)
+                if reason:
+                    unreachable.setdefault(reason, []).append(delivery.user_id)
+
+        with transaction.atomic():
+            if sent_ids:
+                NotificationDelivery.objects.filter(id__in=sent_ids).update(
+                    status=NotificationDelivery.STATUS_SENT,
+                    sent_at=now,
+                    last_error=None,
+                    locked_at=None,
+                    updated_at=now
+                )
+            if failed:
+                NotificationDelivery.objects.bulk_update(
+                    [delivery for delivery, _, _ in failed],
+                    ['status', 'last_error', 'locked_at', 'updated_at'],
+                    batch_size=500
+                )
+                # Each failed attempt is saved separately (history)
+                NotificationError.objects.bulk_create([
+                    NotificationError(
+                        notification_id=delivery.notification_id,
+                        user_id=delivery.user_id,
+                        telegram_id=delivery.telegram_id,
+                        error_type=error_type,
+                        error_message=error_message
+                    )
+                    for delivery, error_type, error_message in failed
+                ], batch_size=500)
+            # Botni bloklagan / o'chirilgan foydalanuvchilar keyingi broadcast'lardan chiqariladi
+            for reason, user_ids in unreachable.items():
+                User.objects.filter(id__in=user_ids, telegram_unreachable_at__isnull=True).update(
+                    telegram_unreachable_at=now,
+                    telegram_unreachable_reason=reason
+                )
+            for notification_id, (sent_count, failed_count) in counters.items():
+                Notification.objects.filter(pk=notification_id).update(
+                    successful_sends=F('successful_sends') + sent_count,
+                    failed_sends=F('failed_sends') + failed_count,
+                    errors_count=F('errors_count') + failed_count,
+                )
+
+    async def flush(self):
+        results = self.take()
+        if results:
+            await sync_to_async(self.write)(results)
+
+
+def refresh_notification_stats(notification_ids):
+    """
+    Notification statistikasini outbox aggregate'laridan to'liq qayta hisoblash
+    (navbatga qo'yishda va lease muddati o'tganda; yuborish davomida DeliveryRecorder hisoblagichlari ishlaydi)
+    """
+    from .models import Notification, NotificationDelivery, NotificationError
+
+    notification_ids = list(notification_ids)
+    errors = dict(
+        NotificationError.objects.filter(notification_id__in=notification_ids)
+        .values('notification_id')
+        .annotate(total=Count('id'))
+        .values_list('notification_id', 'total')
+    )
+    rows = (
+        NotificationDelivery.objects.filter(notification_id__in=notification_ids)
+        .values('notification_id')
+        .annotate(
+            total=Count('id'),
+            sent=Count('id', filter=Q(status=NotificationDelivery.STATUS_SENT)),
+            failed=Count('id', filter=Q(status=NotificationDelivery.STATUS_FAILED)),
+        )
+    )
+    for row in rows:
+        Notification.objects.filter(pk=row['notification_id']).update(
+            total_recipients=row['total'],
+            successful_sends=row['sent'],
+            failed_sends=row['failed'],
+            errors_count=errors.get(row['notification_id'], 0),
+        )
+
+
+async def process_outbox(engine, batch_size=None, notification_id=None):
+    """
+    Navbat bo'shaguncha batch'larni olib yuborish.
+    Returns: qayta ishlangan yozuvlar soni
+    """
+    from .services import TELEGRAM_BOT_TOKEN, build_notification_messages
+    from .notification_templates import compile_template, load_template_contexts, render_template, template_placeholders
+
+    batch_size = batch_size or settings.NOTIFICATION_DELIVERY_BATCH_SIZE
+    messages = {}  # notification_id -> tayyor Telegram bo'laklari
+    templates = {}  # notification_id -> kompilyatsiya qilingan shablon (placeholder bo'lmasa None)
+    contexts = {}  # (notification_id, user_id) -> placeholder qiymatlari (joriy batch)
+    recorder = DeliveryRecorder()
+    processed = 0
+
+    def prepare(deliveries):
+        """Batch'dagi notification'lar uchun matn (bir marta) va shablon qiymatlari (notification boshiga bitta so'rov)"""
+        contexts.clear()
+        user_ids = {}
+        for delivery in deliveries:
+            notification = delivery.notification
+            if notification.id not in messages:
+                messages[notification.id] = build_notification_messages(notification)
+                compiled = compile_template(messages[notification.id])
+                templates[notification.id] = compiled if template_placeholders(compiled) else None
+            if templates[notification.id] is not None:
+                user_ids.setdefault(notification.id, (notification, []))[1].append(delivery.user_id)
+        for notification_id, (notification, ids) in user_ids.items():
+            compiled = templates[notification_id]
+            for user_id, context in load_template_contexts(notification, ids, template_placeholders(compiled)).items():
+                contexts[(notification_id, user_id)] = context
+
+    async def deliver(engine, delivery):
+        compiled = templates[delivery.notification_id]
+        if compiled is None:
+            message = messages[delivery.notification_id]
+        else:
+            message = render_template(compiled, contexts.get((delivery.notification_id, delivery.user_id), {}))
+        success, error_type, error_message = False, "Empty Message", "Xabar matni bo'sh"
+        if delivery.chunks_sent and delivery.chunks_sent >= len(message):
+            # Hamma bo'laklar oldingi urinishda yuborilgan, faqat holat yozilmay qolgan
+            success, error_type, error_message = True, None, None
+        try:
+            # Uzun xabar bir nechta ketma-ket xabar sifatida yuboriladi - oldingi urinishda yuborilgan bo'laklardan keyin
+            for index in range(delivery.chunks_sent, len(message)):
+                success, error_type, error_message = await engine.send(delivery.telegram_id, message[index])
+                if not success:
+                    break
+                if index + 1 < len(message):
+                    delivery.chunks_sent = index + 1
+                    await sync_to_async(save_chunk_progress)(delivery.id, delivery.chunks_sent)
+        except Exception as e:
+            logger.error(f"Error sending notification delivery {delivery.id}: {e}", exc_info=True)
+            success, error_type, error_message = False, type(e).__name__, str(e)
+        if not success:
+            error_type = error_type or "Send Failed"
+            if not error_message:
+                # Check if TELEGRAM_BOT_TOKEN is missing
+                if not TELEGRAM_BOT_TOKEN:
+                    error_message = "TELEGRAM_BOT_TOKEN o'rnatilmagan. Iltimos, backend/.env faylida TELEGRAM_BOT_TOKEN ni o'rnating."
+                else:
+                    error_message = "Xabar yuborish muvaffaqiyatsiz tugadi (Telegram API False qaytardi). Tafsilotlar log faylida."
+        recorder.add(delivery, success, error_type, error_message)
+        if recorder.flush_due():
+            await recorder.flush()
+
+    try:
+        while True:
+            deliveries = await sync_to_async(claim_deliveries)(batch_size, notification_id)
+            if not deliveries:
+                return processed
+            await sync_to_async(prepare)(deliveries)
+            await engine.run(deliveries, deliver)
+            processed += len(deliveries)
+    finally:
+        # Qolgan natijalar - batch oxirida bir marta
+        await recorder.flush()
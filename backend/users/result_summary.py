@@ -0,0 +1,42 @@
+"""
+Nomzod natijalari xulosasi - User'dagi denormalizatsiya qilingan maydonlar.
+
+tests_total_count, tests_passed_count, best_score va last_test_at TestResult yakunlanganda,
+o'chirilganda yoki test'ning o'tish bali o'zgarganda (users/signals.py) bitta UPDATE bilan
+qayta hisoblanadi. Shu sababli UserSerializer har bir foydalanuvchi uchun TestResult'ga
+alohida so'rov yubormaydi.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+User = get_user_model()
+
+
+def summary_expressions():
+    """User.objects.update(...) uchun xulosa maydonlari (korrelyatsiyalangan subquery'lar)"""
+    from tests.models import TestResult
+
+    completed = TestResult.objects.filter(user=OuterRef('pk'), is_completed=True).order_by().values('user')
+    passed = completed.filter(score__gte=F('test__passing_score'))
+    return {
+        'tests_total_count': Coalesce(Subquery(completed.annotate(total=Count('id')).values('total')), Value(0)),
+        'tests_passed_count': Coalesce(Subquery(passed.annotate(total=Count('id')).values('total')), Value(0)),
+        'best_score': Subquery(completed.annotate(best=Max('score')).values('best')),
+        'last_test_at': Subquery(completed.annotate(last=Max('completed_at')).values('last')),
+    }
+
+
+def refresh_result_summaries(users=None):
+    """
+    Xulosani qayta hisoblash.
+    users - User queryset yoki id'lar ro'yxati (None - barcha foydalanuvchilar)
+    Returns: yangilangan foydalanuvchilar soni
+    """
+    if users is None:
+        queryset = User.objects.all()
+    elif isinstance(users, (list, tuple, set)):
+        queryset = User.objects.filter(pk__in=users)
+    else:
+        queryset = users
+    return queryset.update(**summary_expressions())
@@ -8,11 +8,15 @@ import asyncio
 from django.conf import settings
 from django.utils.html import strip_tags
 from asgiref.sync import sync_to_async
-import re
+from functools import lru_cache
+from html import escape
+
+from .telegram_html import TELEGRAM_MESSAGE_LIMIT, html_to_plain_text, render_telegram_chunks, render_telegram_html
 
 logger = logging.getLogger(__name__)
 
 TELEGRAM_BOT_TOKEN = getattr(settings, 'TELEGRAM_BOT_TOKEN', os.getenv('TELEGRAM_BOT_TOKEN', ''))
+TELEGRAM_API_BASE = getattr(settings, 'TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
 
 
 def html_to_telegram_html(html_text):
@@ -20,84 +24,17 @@ def html_to_telegram_html(html_text):
     Convert HTML to Telegram HTML format
     Telegram supports: <b>bold</b>, <i>italic</i>, <u>underline</u>, <s>strikethrough</s>,
     <a href="URL">inline URL</a>, <code>inline fixed-width code</code>, <pre>pre-formatted fixed-width code block</pre>
+    Bitta o'tishli parser (telegram_html) - teglar whitelist bo'yicha, matn escape qilinadi, teglar doim yopiladi
     """
-    if not html_text:
-        return ""
-    
-    # First, handle line breaks properly
-    html_text = html_text.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
-    
-    # Replace <strong> and <b> with <b>
-    html_text = re.sub(r'<(strong|b)>', '<b>', html_text, flags=re.IGNORECASE)
-    html_text = re.sub(r'</(strong|b)>', '</b>', html_text, flags=re.IGNORECASE)
-    
-    # Replace <em> and <i> with <i>
-    html_text = re.sub(r'<(em|i)>', '<i>', html_text, flags=re.IGNORECASE)
-    html_text = re.sub(r'</(em|i)>', '</i>', html_text, flags=re.IGNORECASE)
-    
-    # Keep <u> for underline
-    html_text = re.sub(r'<u>', '<u>', html_text, flags=re.IGNORECASE)
-    html_text = re.sub(r'</u>', '</u>', html_text, flags=re.IGNORECASE)
-    
-    # Keep <s> for strikethrough
-    html_text = re.sub(r'<s>', '<s>', html_text, flags=re.IGNORECASE)
-    html_text = re.sub(r'</s>', '</s>', html_text, flags=re.IGNORECASE)
-    
-    # Keep <code> for inline code
-    html_text = re.sub(r'<code>', '<code>', html_text, flags=re.IGNORECASE)
-    html_text = re.sub(r'</code>', '</code>', html_text, flags=re.IGNORECASE)
-    
-    # Keep <pre> for code blocks
-    html_text = re.sub(r'<pre>', '<pre>', html_text, flags=re.IGNORECASE)
-    html_text = re.sub(r'</pre>', '</pre>', html_text, flags=re.IGNORECASE)
-    
-    # Convert <a href="..."> to Telegram format (must be exact format)
-    html_text = re.sub(r'<a\s+href=["\']([^"\']+)["\']\s*>([^<]+)</a>', r'<a href="\1">\2</a>', html_text, flags=re.IGNORECASE)
-    
-    # Convert list items to bullet points
-    html_text = re.sub(r'<li[^>]*>', '• ', html_text, flags=re.IGNORECASE)
-    html_text = re.sub(r'</li>', '\n', html_text, flags=re.IGNORECASE)
-    
-    # Remove unsupported tags but keep their content
-    # Remove opening and closing tags for p, div, span, h1-h6, ul, ol
-    html_text = re.sub(r'</?(p|div|span|h[1-6]|ul|ol)[^>]*>', '\n', html_text, flags=re.IGNORECASE)
-    
-    # Clean up multiple newlines (but keep double newlines for paragraphs)
-    html_text = re.sub(r'\n{3,}', '\n\n', html_text)
-    
-    # Escape special HTML characters that Telegram might interpret incorrectly
-    # But keep our Telegram HTML tags
-    html_text = html_text.replace('&nbsp;', ' ')
-    html_text = html_text.replace('&amp;', '&')
-    html_text = html_text.replace('&lt;', '<')
-    html_text = html_text.replace('&gt;', '>')
-    html_text = html_text.replace('&quot;', '"')
-    html_text = html_text.replace('&#39;', "'")
-    
-    return html_text.strip()
+    return render_telegram_html(html_text)
 
 
-async def send_telegram_message_async(telegram_id, message_text, parse_mode='HTML'):
+async def post_telegram_message(session, url, telegram_id, message_text, parse_mode='HTML'):
     """
-    Send message to Telegram user asynchronously
-    Returns: (success: bool, error_type: str, error_message: str)
+    sendMessage so'rovini berilgan session orqali yuborish (retry qilmaydi)
+    Returns: (success, error_type, error_message, retry_after, transient)
+    retry_after - 429 da Telegram ko'rsatgan kutish vaqti, transient - qayta urinish mumkin bo'lgan xato
     """
-    if not TELEGRAM_BOT_TOKEN:
-        error_msg = "TELEGRAM_BOT_TOKEN is not set. Please set it in backend/.env file or environment variables."
-        logger.error(error_msg)
-        return False, "TELEGRAM_BOT_TOKEN_MISSING", error_msg
-    
-    if not telegram_id:
-        error_msg = f"Invalid telegram_id: {telegram_id}"
-        logger.warning(error_msg)
-        return False, "INVALID_TELEGRAM_ID", error_msg
-    
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    
-    # Limit message length (Telegram allows max 4096 chars)
-    if len(message_text) > 4000:
-        message_text = message_text[:4000] + "... (xabar qisqartirildi)"
-    
     payload = {
         'chat_id': telegram_id,
         'text': message_text,
@@ -105,49 +42,95 @@ async def send_telegram_message_async(telegram_id, message_text, parse_mode='HTM
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    if result.get('ok'):
-                        logger.info(f"Message sent successfully to telegram_id: {telegram_id}")
-                        return True, None, None
-                    else:
-                        error_desc = result.get('description', 'Unknown error')
-                        error_code = result.get('error_code', 'N/A')
-                        logger.error(f"❌ Telegram API error for telegram_id {telegram_id}: [{error_code}] {error_desc}")
-                        # If HTML parse error, try sending as plain text
-                        if 'parse' in error_desc.lower() or 'html' in error_desc.lower():
-                            logger.info(f"🔄 Retrying as plain text for telegram_id: {telegram_id}")
-                            # Remove HTML tags and retry
-                            plain_text = re.sub(r'<[^>]+>', '', message_text)
-                            plain_payload = {
-                                'chat_id': telegram_id,
-                                'text': plain_text[:4000] if len(plain_text) > 4000 else plain_text,
-                                'parse_mode': None
-                            }
-                            async with session.post(url, json=plain_payload, timeout=aiohttp.ClientTimeout(total=10)) as retry_response:
-                                if retry_response.status == 200:
-                                    retry_result = await retry_response.json()
-                                    if retry_result.get('ok'):
-                                        logger.info(f"✅ Message sent as plain text to telegram_id: {telegram_id}")
-                                        return True, None, None
-                        # Return detailed error for logging
-                        error_type = f"Telegram API Error {error_code}"
-                        error_message = f"[{error_code}] {error_desc}"
-                        return False, error_type, error_message
-                else:
-                    error_text = await response.text()
-                    logger.error(f"❌ HTTP {response.status} error sending message to telegram_id {telegram_id}: {error_text}")
-                    return False, f"HTTP {response.status}", error_text
+        async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            try:
+                result = await response.json(content_type=None)
+            except ValueError:
+                result = None
+            
+            if result is None:
+                error_text = await response.text()
+                logger.error(f"❌ HTTP {response.status} error sending message to telegram_id {telegram_id}: {error_text}")
+                return False, f"HTTP {response.status}", error_text, None, response.status >= 500
+            
+            if result.get('ok'):
+                logger.info(f"Message sent successfully to telegram_id: {telegram_id}")
+                return True, None, None, None, False
+            
+            error_desc = result.get('description', 'Unknown error')
+            error_code = result.get('error_code', response.status)
+            retry_after = (result.get('parameters') or {}).get('retry_after')
+            logger.error(f"❌ Telegram API error for telegram_id {telegram_id}: [{error_code}] {error_desc}")
+            
+            # If HTML parse error, try sending as plain text
+            if error_code == 400 and ('parse' in error_desc.lower() or 'html' in error_desc.lower()):
+                logger.info(f"🔄 Retrying as plain text for telegram_id: {telegram_id}")
+                # Remove HTML tags and retry
+                plain_payload = {
+                    'chat_id': telegram_id,
+                    'text': html_to_plain_text(message_text)[:TELEGRAM_MESSAGE_LIMIT],
+                }
+                async with session.post(url, json=plain_payload, timeout=aiohttp.ClientTimeout(total=10)) as retry_response:
+                    if retry_response.status == 200:
+                        retry_result = await retry_response.json(content_type=None)
+                        if retry_result.get('ok'):
+                            logger.info(f"✅ Message sent as plain text to telegram_id: {telegram_id}")
+                            return True, None, None, None, False
+            
+            # Return detailed error for logging
+            error_type = f"Telegram API Error {error_code}"
+            error_message = f"[{error_code}] {error_desc}"
+            return False, error_type, error_message, retry_after, response.status >= 500
     except asyncio.TimeoutError:
         error_msg = f"Timeout sending message to telegram_id: {telegram_id}"
         logger.error(error_msg)
-        return False, "TimeoutError", error_msg
+        return False, "TimeoutError", error_msg, None, True
+    except aiohttp.ClientError as e:
+        # Ulanish xatolari (reset, DNS va h.k.) - qayta urinish mumkin
+        error_msg = f"Error sending message to telegram_id {telegram_id}: {str(e)}"
+        logger.error(error_msg)
+        return False, type(e).__name__, str(e), None, True
     except Exception as e:
         error_msg = f"Error sending message to telegram_id {telegram_id}: {str(e)}"
         logger.error(error_msg, exc_info=True)
-        return False, type(e).__name__, str(e)
+        return False, type(e).__name__, str(e), None, False
+
+
+async def send_telegram_message_async(telegram_id, message_text, parse_mode='HTML', session=None):
+    """
+    Send message to Telegram user asynchronously
+    session berilsa o'sha ulanishlar pool'i ishlatiladi (aks holda bitta so'rov uchun yangi session)
+    Returns: (success: bool, error_type: str, error_message: str)
+    """
+    if not TELEGRAM_BOT_TOKEN:
+        error_msg = "TELEGRAM_BOT_TOKEN is not set. Please set it in backend/.env file or environment variables."
+        logger.error(error_msg)
+        return False, "TELEGRAM_BOT_TOKEN_MISSING", error_msg
+    
+    if not telegram_id:
+        error_msg = f"Invalid telegram_id: {telegram_id}"
+        logger.warning(error_msg)
+        return False, "INVALID_TELEGRAM_ID", error_msg
+    
+    url = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    # Uzun xabar 4096 belgilik bo'laklarga bo'linadi (teglar har bir bo'lakda yopiq)
+    if parse_mode == 'HTML':
+        chunks = render_telegram_chunks(message_text) or [message_text]
+    else:
+        chunks = [message_text[i:i + TELEGRAM_MESSAGE_LIMIT] for i in range(0, len(message_text), TELEGRAM_MESSAGE_LIMIT)] or [message_text]
+    
+    async def send_chunks(session):
+        for chunk in chunks:
+            result = await post_telegram_message(session, url, telegram_id, chunk, parse_mode)
+            if not result[0]:
+                return result[:3]
+        return True, None, None
+    
+    if session is not None:
+        return await send_chunks(session)
+    
+    async with aiohttp.ClientSession() as session:
+        return await send_chunks(session)
 
 
 def send_telegram_message_sync(telegram_id, message_text, parse_mode='HTML'):
@@ -155,138 +138,121 @@ def send_telegram_message_sync(telegram_id, message_text, parse_mode='HTML'):
     Synchronous wrapper for send_telegram_message_async
     Returns: (success: bool, error_type: str, error_message: str)
     """
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    from .dispatcher import dispatcher
     
-    return loop.run_until_complete(send_telegram_message_async(telegram_id, message_text, parse_mode))
+    # Jarayon bo'yicha bitta fon event loop va pool'langan session (har chaqiruvda yangi loop ochilmaydi)
+    try:
+        return dispatcher.call(
+            lambda session: send_telegram_message_async(telegram_id, message_text, parse_mode, session=session)
+        )
+    except TimeoutError as e:
+        logger.error(f"Timeout sending message to telegram_id {telegram_id}: {e}")
+        return False, "TimeoutError", str(e)
+
+
+# Doimiy xatolar - foydalanuvchi botni bloklagan, akkaunt o'chirilgan yoki chat mavjud emas
+UNREACHABLE_ERROR_PATTERNS = (
+    'bot was blocked by the user',
+    'user is deactivated',
+    'chat not found',
+    'user not found',
+    'peer_id_invalid',
+    "bot can't initiate conversation",
+    'bot was kicked',
+)
+
+
+def classify_unreachable_error(error_type, error_message):
+    """
+    Xato foydalanuvchiga endi yetib bo'lmasligini bildiradimi
+    Returns: sabab (str) yoki None (vaqtinchalik/boshqa xato)
+    """
+    message = (error_message or '').lower()
+    for pattern in UNREACHABLE_ERROR_PATTERNS:
+        if pattern in message:
+            return pattern
+    if error_type == 'Telegram API Error 403':
+        return 'forbidden'
+    return None
+
+
+def get_notification_recipients(notification):
+    """Notification qabul qiluvchilari (Telegram'ga ulangan, xabarlar yoqilgan, aktiv)"""
+    from .models import User
+    
+    if notification.send_to_all:
+        queryset = User.objects.all()
+    else:
+        queryset = notification.recipients.all()
+    return queryset.filter(
+        telegram_id__isnull=False,
+        telegram_unreachable_at__isnull=True,
+        notification_enabled=True,
+        is_active=True
+    ).exclude(telegram_id=0)
+
+
+def iter_notification_recipients(notification, batch_size=1000):
+    """
+    Qabul qiluvchilarni (id, telegram_id) juftliklari sifatida keyset pagination bilan batch'lab qaytarish.
+    To'liq User obyektlari yuklanmaydi - xotira auditoriya hajmiga bog'liq emas.
+    """
+    queryset = get_notification_recipients(notification).order_by('id').values_list('id', 'telegram_id')
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+@lru_cache(maxsize=64)
+def _render_notification_messages(title, message):
+    html_text = message or ''
+    # Add title if exists
+    if title:
+        html_text = f"<b>{escape(title, quote=False)}</b><br><br>{html_text}"
+    return tuple(render_telegram_chunks(html_text))
+
+
+def build_notification_messages(notification):
+    """
+    Notification matnini Telegram HTML bo'laklariga o'tkazish (har biri <= 4096 belgi)
+    Natija sarlavha va matn bo'yicha keshlanadi - har bir batch/worker qayta render qilmaydi
+    Returns: tuple[str]
+    """
+    return _render_notification_messages(notification.title, notification.message)
 
 
 async def send_notification_to_users(notification):
     """
     Send notification to selected users or all users
+    Xabar outbox'ga navbatga qo'yiladi va shu jarayonning o'zida yuboriladi
+    (natija NotificationDelivery yozuvlarida saqlanadi - qayta yuborishda faqat yuborilmaganlar ketadi)
     """
-    from .models import User, NotificationError
+    from .broadcast import BroadcastEngine
+    from .outbox import iter_enqueue_notification, process_outbox
     
-    # Async wrapper for Django ORM queries
-    @sync_to_async
-    def get_recipients():
-        if notification.send_to_all:
-            return list(User.objects.filter(
-                telegram_id__isnull=False,
-                notification_enabled=True,
-                is_active=True
-            ).exclude(telegram_id=0))
-        else:
-            return list(notification.recipients.filter(
-                telegram_id__isnull=False,
-                notification_enabled=True,
-                is_active=True
-            ).exclude(telegram_id=0))
+    # Qabul qiluvchilar batch'lab navbatga qo'yiladi va har bir batch darhol yuboriladi
+    batches = iter_enqueue_notification(notification)
+    next_batch = sync_to_async(lambda: next(batches, None))
     
-    @sync_to_async
-    def create_error(notification_obj, user_obj, telegram_id, error_type, error_message):
-        return NotificationError.objects.create(
-            notification=notification_obj,
-            user=user_obj,
-            telegram_id=telegram_id,
-            error_message=error_message,
-            error_type=error_type
-        )
+    async with BroadcastEngine() as engine:
+        while await next_batch() is not None:
+            await process_outbox(engine, notification_id=notification.id)
+        # Qayta yuborishda navbatga qaytgan (avval xatolik bo'lgan) yozuvlar
+        await process_outbox(engine, notification_id=notification.id)
+        logger.info(f"Notification {notification.id} broadcast finished: {dict(engine.stats)}")
     
     @sync_to_async
-    def get_errors_count(notification_obj):
-        return NotificationError.objects.filter(notification=notification_obj).count()
-    
-    @sync_to_async
-    def save_notification_stats(notification_obj, total, successful, failed):
-        notification_obj.total_recipients = total
-        notification_obj.successful_sends = successful
-        notification_obj.failed_sends = failed
-        notification_obj.save(update_fields=['total_recipients', 'successful_sends', 'failed_sends'])
-    
-    # Get recipients asynchronously
-    recipients = await get_recipients()
-    total_recipients = len(recipients)
-    successful = 0
-    failed = 0
-    
-    # Convert HTML to Telegram format
-    telegram_message = html_to_telegram_html(notification.message)
-    
-    # Add title if exists
-    if notification.title:
-        telegram_message = f"<b>{notification.title}</b>\n\n{telegram_message}"
-    
-    # Send messages
-    # Always save errors - don't check for duplicates, save each attempt separately
-    for user in recipients:
-        try:
-            result, error_type, error_message = await send_telegram_message_async(user.telegram_id, telegram_message)
-            if result:
-                successful += 1
-            else:
-                # Save error if send failed - always save, don't check duplicates
-                failed += 1
-                # Use detailed error information from send_telegram_message_async
-                if not error_type:
-                    error_type = "Send Failed"
-                if not error_message:
-                    # Check if TELEGRAM_BOT_TOKEN is missing
-                    if not TELEGRAM_BOT_TOKEN:
-                        error_message = "TELEGRAM_BOT_TOKEN o'rnatilmagan. Iltimos, backend/.env faylida TELEGRAM_BOT_TOKEN ni o'rnating."
-                    else:
-                        error_message = "Xabar yuborish muvaffaqiyatsiz tugadi (Telegram API False qaytardi). Tafsilotlar log faylida."
-                # Always create error - each attempt is saved separately
-                await create_error(
-                    notification,
-                    user,
-                    user.telegram_id,
-                    error_type,
-                    error_message
-                )
-        except Exception as e:
-            logger.error(f"Error sending notification to user {user.id}: {e}", exc_info=True)
-            failed += 1
-            # Save error details - always save, each attempt separately
-            error_type = type(e).__name__
-            error_message = str(e)
-            await create_error(
-                notification,
-                user,
-                user.telegram_id,
-                error_type,
-                error_message
-            )
-    
-    # Update notification statistics (accumulate, don't reset)
-    # Get current stats
-    @sync_to_async
-    def get_current_stats(notification_obj):
+    def get_stats(notification_obj):
+        notification_obj.refresh_from_db(fields=['total_recipients', 'successful_sends', 'failed_sends', 'errors_count'])
         return {
-            'total': notification_obj.total_recipients or 0,
-            'successful': notification_obj.successful_sends or 0,
-            'failed': notification_obj.failed_sends or 0
+            'total': notification_obj.total_recipients,
+            'successful': notification_obj.successful_sends,
+            'failed': notification_obj.failed_sends,
+            'errors': notification_obj.errors_count
         }
     
-    current_stats = await get_current_stats(notification)
-    
-    # Accumulate statistics
-    new_total = max(total_recipients, current_stats['total'])  # Use max of current and new
-    new_successful = current_stats['successful'] + successful
-    new_failed = current_stats['failed'] + failed
-    
-    await save_notification_stats(notification, new_total, new_successful, new_failed)
-    
-    # Get errors count
-    errors_count = await get_errors_count(notification)
-    
-    return {
-        'total': total_recipients,
-        'successful': successful,
-        'failed': failed,
-        'errors': errors_count
-    }
-
+    return await get_stats(notification)
@@ -0,0 +1,42 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from tests.models import Test, TestResult
+from .models import CV, User
+from .cv_storage import release_blob
+from .result_summary import refresh_result_summaries
+
+
+@receiver(post_delete, sender=CV)
+def release_cv_blob(sender, instance, **kwargs):
+    """CV o'chirilganda blob reference'ini bo'shatish"""
+    if instance.blob_id:
+        release_blob(instance.blob_id)
+
+
+@receiver(post_save, sender=TestResult)
+@receiver(post_delete, sender=TestResult)
+def refresh_user_result_summary(sender, instance, **kwargs):
+    """Yakunlangan natija saqlanganda/o'chirilganda foydalanuvchi xulosasini yangilash"""
+    if instance.is_completed:
+        refresh_result_summaries([instance.user_id])
+
+
+@receiver(pre_save, sender=Test)
+def remember_test_passing_score(sender, instance, update_fields=None, **kwargs):
+    """Saqlashdan oldingi o'tish bali (post_save'da o'zgarganini aniqlash uchun)"""
+    instance._previous_passing_score = None
+    if instance.pk is None or (update_fields is not None and 'passing_score' not in update_fields):
+        return
+    instance._previous_passing_score = (
+        Test.objects.filter(pk=instance.pk).values_list('passing_score', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Test)
+def refresh_test_result_summaries(sender, instance, created, **kwargs):
+    """O'tish bali o'zgarganda - shu testni ishlagan foydalanuvchilar xulosasini yangilash"""
+    previous = getattr(instance, '_previous_passing_score', None)
+    if created or previous is None or previous == instance.passing_score:
+        return
+    refresh_result_summaries(User.objects.filter(pk__in=TestResult.objects.filter(test=instance).values('user')))
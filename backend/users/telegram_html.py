@@ -0,0 +1,275 @@
+"""
+Telegram HTML renderer - ixtiyoriy HTML'ni (CKEditor, xato sahifalari va h.k.)
+bitta o'tishda Telegram qo'llab-quvvatlaydigan HTML'ga aylantirish.
+
+Faqat whitelist'dagi teglar qoladi, qolganlari olib tashlanadi (matni saqlanadi),
+matn escape qilinadi va teglar doim to'g'ri yopiladi. Uzun matn 4096 belgidan
+oshmaydigan bo'laklarga teg chegarasida bo'linadi (ochiq teglar yopilib,
+keyingi bo'lakda qayta ochiladi).
+
+Eslatma: Telegram bot ham aynan shu modulni import qiladi (yagona manba) - shuning uchun
+faqat standart kutubxonadan foydalanadi (Django/users importlari yo'q). Repo checkout'da bot
+uni backend/users'dan oladi, Docker image'ga esa build paytida /shared ga ko'chiriladi
+(docker-compose.yml, telegram_bot/Dockerfile).
+"""
+import re
+from html import escape
+from html.parser import HTMLParser
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+# HTML teg -> Telegram teg
+TAG_ALIASES = {
+    'b': 'b', 'strong': 'b',
+    'i': 'i', 'em': 'i',
+    'u': 'u', 'ins': 'u',
+    's': 's', 'strike': 's', 'del': 's',
+    'code': 'code',
+    'pre': 'pre',
+    'a': 'a',
+    'blockquote': 'blockquote',
+    'tg-spoiler': 'tg-spoiler',
+}
+# Yangi qatorga o'tkazadigan blok teglar
+BLOCK_TAGS = {'p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'table', 'tr', 'section', 'article', 'header', 'footer'}
+# Matni bilan birga tashlab yuboriladigan teglar
+SKIP_CONTENT_TAGS = {'script', 'style', 'head', 'title', 'noscript'}
+ALLOWED_URL_SCHEMES = ('http://', 'https://', 'tg://', 'mailto:')
+EXTRA_NEWLINES_RE = re.compile(r'\n{3,}')
+# Notification shablonlaridagi {{placeholder}} - bo'laklar chegarasi uning ichiga tushmaydi
+PLACEHOLDER_RE = re.compile(r'\{\{\s*\w+\s*\}\}')
+
+
+class _TelegramHTMLParser(HTMLParser):
+    """HTML -> atomlar ro'yxati: ('text', str) | ('open', tag, attrs) | ('close', tag)"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.atoms = []
+        self.stack = []  # ochiq Telegram teglari
+        self.skip_depth = 0
+
+    def _text(self, text):
+        if self.atoms and self.atoms[-1][0] == 'text':
+            self.atoms[-1] = ('text', self.atoms[-1][1] + text)
+        else:
+            self.atoms.append(('text', text))
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_CONTENT_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth:
+            return
+        if tag == 'br':
+            self._text('\n')
+        elif tag == 'li':
+            self._text('\n• ')
+        elif tag in BLOCK_TAGS:
+            self._text('\n')
+        elif tag == 'span':
+            if ('class', 'tg-spoiler') in attrs:
+                self._open('tg-spoiler', '', source_tag='span')
+            else:
+                # Oddiy <span> ham stack'da turadi - uning </span>'i spoiler'ni yopib qo'ymaydi
+                self.stack.append((None, None, 'span'))
+
+        telegram_tag = TAG_ALIASES.get(tag)
+        if telegram_tag is None:
+            return
+        attrs = dict(attrs)
+        attr_text = ''
+        if telegram_tag == 'a':
+            href = (attrs.get('href') or '').strip()
+            if not href.lower().startswith(ALLOWED_URL_SCHEMES):
+                # Havolasiz <a> - faqat matni qoladi
+                self.stack.append(('a', None, tag))
+                return
+            attr_text = f' href="{escape(href, quote=True)}"'
+        elif telegram_tag == 'code':
+            language = attrs.get('class') or ''
+            if language.startswith('language-'):
+                attr_text = f' class="{escape(language, quote=True)}"'
+        self._open(telegram_tag, attr_text, source_tag=tag)
+
+    def _open(self, telegram_tag, attr_text, source_tag):
+        # <pre>/<code> ichida boshqa teglarga ruxsat yo'q - faqat <pre><code class="language-x"> (til ko'rsatkichi)
+        open_tags = [open_tag for open_tag, _, _ in self.stack if open_tag]
+        code_in_pre = telegram_tag == 'code' and open_tags and open_tags[-1] == 'pre'
+        if 'code' in open_tags or ('pre' in open_tags and not code_in_pre):
+            self.stack.append((None, None, source_tag))
+            return
+        self.stack.append((telegram_tag, attr_text, source_tag))
+        self.atoms.append(('open', telegram_tag, attr_text))
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == 'br':
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_CONTENT_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if self.skip_depth:
+            return
+        if tag == 'li':
+            return
+        if tag in BLOCK_TAGS:
+            self._text('\n')
+            return
+        # Mos ochiq tegni topib, undan keyin ochilganlarini ham yopamiz (noto'g'ri ichma-ich joylashuv)
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][2] == tag:
+                for telegram_tag, attr_text, _ in reversed(self.stack[index:]):
+                    if telegram_tag and attr_text is not None:
+                        self.atoms.append(('close', telegram_tag))
+                del self.stack[index:]
+                return
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        self._text(data.replace('\xa0', ' '))
+
+    def close(self):
+        super().close()
+        for telegram_tag, attr_text, _ in reversed(self.stack):
+            if telegram_tag and attr_text is not None:
+                self.atoms.append(('close', telegram_tag))
+        self.stack = []
+        return self.atoms
+
+
+def _parse(html_text):
+    parser = _TelegramHTMLParser()
+    parser.feed(html_text or '')
+    atoms = parser.close()
+
+    # Ortiqcha bo'sh qatorlarni qisqartirish va chetlardagi bo'shliqlarni olib tashlash
+    atoms = [
+        ('text', EXTRA_NEWLINES_RE.sub('\n\n', atom[1])) if atom[0] == 'text' else atom
+        for atom in atoms
+    ]
+    text_indexes = [index for index, atom in enumerate(atoms) if atom[0] == 'text']
+    if text_indexes:
+        first, last = text_indexes[0], text_indexes[-1]
+        atoms[first] = ('text', atoms[first][1].lstrip())
+        atoms[last] = ('text', atoms[last][1].rstrip())
+    return atoms
+
+
+def _tag_markup(atom):
+    if atom[0] == 'open':
+        return f"<{atom[1]}{atom[2]}>"
+    return f"</{atom[1]}>"
+
+
+def _split_point(text, room, allow_empty=True):
+    """
+    text'ning escape qilingandan keyin room'ga sig'adigan eng uzun bo'lagi - iloji bo'lsa qator/so'z chegarasida.
+    {{placeholder}} bo'linmaydi: kesish uning boshiga suriladi. allow_empty=True bo'lsa bu 0 bo'lishi mumkin
+    (butun matn keyingi bo'lakka o'tadi); bo'sh bo'lakda (allow_empty=False) placeholder ham bo'linadi.
+    """
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if len(escape(text[:middle], quote=False)) <= room:
+            low = middle
+        else:
+            high = middle - 1
+    if low == len(text):
+        return low
+    cut = low
+    for separator in ('\n', ' '):
+        position = text.rfind(separator, 0, low)
+        if position > low // 2:
+            cut = position + 1
+            break
+    # {{placeholder}} o'rtasidan kesilsa - uning boshidan kesamiz (butunligicha keyingi bo'lakka o'tadi)
+    start = text.rfind('{{', 0, cut + 1)
+    if start >= 0 and (start > 0 or allow_empty):
+        match = PLACEHOLDER_RE.match(text, start)
+        if match and match.end() > cut:
+            return start
+    return cut
+
+
+def render_telegram_chunks(html_text, limit=TELEGRAM_MESSAGE_LIMIT):
+    """
+    HTML -> Telegram HTML bo'laklari (har biri limit'dan oshmaydi, teglar har bir bo'lakda yopiq)
+    Returns: list[str]
+    """
+    chunks = []
+    parts = []
+    length = 0
+    stack = []  # joriy bo'lakdagi ochiq teglar (open atomlar)
+    has_text = False  # joriy bo'lakda matn bormi (faqat qayta ochilgan teglar emas)
+
+    def closing_length():
+        return sum(len(atom[1]) + 3 for atom in stack)
+
+    def finish_chunk():
+        nonlocal parts, length, has_text
+        # Oxirida ochilib, hali matni bo'lmagan teglar bu bo'lakka kirmaydi (keyingisida ochiladi)
+        trailing = 0
+        while trailing < min(len(stack), len(parts)) and parts[-1 - trailing] == _tag_markup(stack[-1 - trailing]):
+            trailing += 1
+        kept = stack[:len(stack) - trailing]
+        chunk = ''.join(parts[:len(parts) - trailing] + [_tag_markup(('close', atom[1])) for atom in reversed(kept)]).strip()
+        if chunk:
+            chunks.append(chunk)
+        parts = [_tag_markup(atom) for atom in stack]
+        length = sum(len(part) for part in parts)
+        has_text = False
+
+    for atom in _parse(html_text):
+        if atom[0] == 'open':
+            markup = _tag_markup(atom)
+            if length + len(markup) + closing_length() + len(atom[1]) + 3 > limit:
+                finish_chunk()
+            parts.append(markup)
+            length += len(markup)
+            stack.append(atom)
+        elif atom[0] == 'close':
+            # Bo'sh qolgan teg juftligini tashlab yuboramiz
+            if parts and parts[-1] == _tag_markup(stack[-1]):
+                parts.pop()
+                length -= len(_tag_markup(stack[-1]))
+            else:
+                markup = _tag_markup(atom)
+                parts.append(markup)
+                length += len(markup)
+            stack.pop()
+        else:
+            text = atom[1]
+            while text:
+                room = limit - length - closing_length()
+                escaped = escape(text, quote=False)
+                if len(escaped) <= room:
+                    parts.append(escaped)
+                    length += len(escaped)
+                    has_text = True
+                    break
+                # Bo'sh bo'lakda placeholder ham bo'linadi - aks holda matn hech qayerga sig'maydi
+                cut = _split_point(text, room, allow_empty=has_text) if room > 0 else 0
+                if not cut and not has_text:
+                    # Qayta ochilgan teglarning o'zi joyni egallagan - cheksiz siklga tushmaslik uchun
+                    # kamida bitta belgi shu bo'lakka yoziladi
+                    cut = 1
+                if cut:
+                    parts.append(escape(text[:cut], quote=False))
+                finish_chunk()
+                text = text[cut:].lstrip('\n ') if cut else text
+
+    finish_chunk()
+    return chunks
+
+
+def render_telegram_html(html_text):
+    """HTML -> bitta Telegram HTML satr (bo'linmaydi)"""
+    return ''.join(render_telegram_chunks(html_text, limit=float('inf')))
+
+
+def html_to_plain_text(html_text):
+    """Teglarsiz matn (HTML parse xatosida oxirgi chora sifatida)"""
+    return ''.join(atom[1] for atom in _parse(html_text) if atom[0] == 'text')
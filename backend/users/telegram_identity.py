@@ -0,0 +1,101 @@
+"""
+Telegram orqali identifikatsiya (/api/users/telegram_auth/) - idempotent.
+
+Bot har /start, /info, test boshlash va yakunlashda shu endpoint'ni chaqiradi. Ma'lumot
+odatda o'zgarmaydi, shuning uchun:
+- foydalanuvchi va uning TelegramProfile'i bitta so'rov bilan olinadi (select_related);
+- TelegramProfile faqat kelgan qiymatlar farq qilsa yoziladi (update_fields bilan);
+- parallel birinchi so'rovlar (ikki marta /start) IntegrityError bermaydi - mavjud yozuv olinadi.
+"""
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+
+from .models import TelegramProfile
+
+User = get_user_model()
+
+# So'rov kaliti -> TelegramProfile maydoni (User'ning first_name/last_name'i emas - ularni nomzod o'zi to'ldiradi)
+PROFILE_FIELDS = {
+    'first_name': 'telegram_first_name',
+    'last_name': 'telegram_last_name',
+    'telegram_username': 'telegram_username',
+    'telegram_language_code': 'telegram_language_code',
+    'telegram_is_premium': 'telegram_is_premium',
+}
+
+
+def profile_values(data):
+    """So'rovda kelgan TelegramProfile qiymatlari (kelmagan maydonlar o'zgartirilmaydi)"""
+    values = {}
+    for key, field in PROFILE_FIELDS.items():
+        if key not in data:
+            continue
+        value = data.get(key)
+        if field == 'telegram_is_premium':
+            value = bool(value)
+        elif field in ('telegram_first_name', 'telegram_last_name'):
+            value = value or ''
+        values[field] = value
+    return values
+
+
+def new_profile_values(data):
+    return {'telegram_first_name': '', 'telegram_last_name': '', **profile_values(data)}
+
+
+def sync_telegram_profile(user, telegram_id, data):
+    """TelegramProfile'ni so'rov ma'lumotlari bilan moslash - faqat o'zgargan maydonlar yoziladi"""
+    try:
+        profile = user.telegram_profile
+    except TelegramProfile.DoesNotExist:
+        profile = None
+    if profile is None or profile.telegram_id != telegram_id:
+        profile = TelegramProfile.objects.filter(telegram_id=telegram_id).first()
+    if profile is None:
+        TelegramProfile.objects.create(user=user, telegram_id=telegram_id, **new_profile_values(data))
+        return
+
+    changed = []
+    for field, value in profile_values(data).items():
+        if getattr(profile, field) != value:
+            setattr(profile, field, value)
+            changed.append(field)
+    if profile.user_id != user.pk:
+        changed.append('user')
+    # profile.user = user va user.telegram_profile keshi (serializer qayta so'rov yubormaydi)
+    user.telegram_profile = profile
+    if changed:
+        profile.save(update_fields=changed + ['updated_at'])
+
+
+def get_or_create_telegram_user(queryset, telegram_id, data):
+    """
+    (user, created) - queryset (masalan, serializer uchun annotatsiya qilingan) dan telegram_id bo'yicha.
+    Mavjud foydalanuvchida TelegramProfile sinxronlanadi, yangisi profil bilan birga yaratiladi.
+    """
+    user = queryset.filter(telegram_id=telegram_id).first()
+    if user is None:
+        try:
+            with transaction.atomic():
+                # Telegram ism/familiyasi User'ga yozilmaydi - nomzod ro'yxatdan o'tishda o'zi to'ldiradi
+                user = User.objects.create_user(
+                    username=f'user_{telegram_id}',
+                    telegram_id=telegram_id,
+                    first_name='',
+                    last_name=''
+                )
+                TelegramProfile.objects.create(user=user, telegram_id=telegram_id, **new_profile_values(data))
+            return user, True
+        except IntegrityError:
+            # Parallel so'rov foydalanuvchini allaqachon yaratgan
+            user = queryset.filter(telegram_id=telegram_id).first()
+            if user is None:
+                raise
+
+    sync_telegram_profile(user, telegram_id, data)
+
+    # Foydalanuvchi botga qaytdi (/start) - xabarlar yana yuboriladi
+    if user.telegram_unreachable_at:
+        User.objects.filter(pk=user.pk).update(telegram_unreachable_at=None, telegram_unreachable_reason=None)
+        user.telegram_unreachable_at = user.telegram_unreachable_reason = None
+    return user, False
@@ -0,0 +1,45 @@
+"""
+users ilovasi testlari
+
+    python manage.py test users
+"""
+from django.test import SimpleTestCase
+
+from .notification_templates import compile_template, render_template, template_placeholders
+from .telegram_html import TELEGRAM_MESSAGE_LIMIT, render_telegram_chunks
+
+
+class TemplateChunkBoundaryTests(SimpleTestCase):
+    """Bo'laklar chegarasi {{placeholder}} ichiga tushmasligi kerak"""
+
+    def render(self, html_text, context):
+        chunks = tuple(render_telegram_chunks(html_text))
+        self.assertTrue(all(len(chunk) <= TELEGRAM_MESSAGE_LIMIT for chunk in chunks))
+        compiled = compile_template(chunks)
+        return compiled, render_template(compiled, context)
+
+    def test_placeholder_at_tag_start(self):
+        # Placeholder matn atomining boshida (<b> dan keyin) chegaraga to'g'ri keladi
+        for padding in range(4075, 4095):
+            with self.subTest(padding=padding):
+                compiled, messages = self.render('a' * padding + '<b>{{first_name}}</b> rest', {'first_name': 'Ali'})
+                self.assertEqual(template_placeholders(compiled), {'first_name'})
+                self.assertIn('<b>Ali</b>', ''.join(messages))
+                self.assertNotIn('{', ''.join(messages))
+
+    def test_placeholder_inside_text(self):
+        for padding in range(4075, 4095):
+            with self.subTest(padding=padding):
+                compiled, messages = self.render('a' * padding + ' {{ first_name }} tail {{score}}', {'first_name': 'Ali', 'score': 0})
+                self.assertEqual(template_placeholders(compiled), {'first_name', 'score'})
+                self.assertIn('Ali', ''.join(messages))
+                self.assertNotIn('{', ''.join(messages))
+
+    def test_no_empty_tag_at_chunk_end(self):
+        chunks = render_telegram_chunks('a' * 4085 + '<b>{{first_name}}</b> rest')
+        self.assertFalse(chunks[0].endswith('<b></b>'))
+
+    def test_nested_tags_wider_than_limit_terminate(self):
+        # Qayta ochiladigan teglar limitdan uzun bo'lsa ham bo'lish tugashi (cheksiz sikl bo'lmasligi) kerak
+        chunks = render_telegram_chunks('<b><i><u>' * 5 + 'x' * 200, limit=50)
+        self.assertEqual(''.join(chunks).count('x'), 200)
@@ -1,14 +1,28 @@
 import React from 'react'
+import axios from 'axios'
 import './Dashboard.css'
 
 function CVDetail({ cv, apiBaseUrl, onBack }) {
-  const downloadCV = () => {
-    if (cv.file) {
-      // Full URL yaratish
-      const fileUrl = cv.file.startsWith('http') 
-        ? cv.file 
-        : `${apiBaseUrl.replace('/api', '')}${cv.file}`
-      window.open(fileUrl, '_blank')
+  const downloadCV = async () => {
+    if (!cv.download_url) return
+    try {
+      // Himoyalangan endpoint - ruxsat backend'da tekshiriladi, faylni nginx uzatadi
+      const token = localStorage.getItem('access_token')
+      const response = await axios.get(cv.download_url, {
+        headers: { 'Authorization': `Bearer ${token}` },
+        responseType: 'blob'
+      })
+      const url = window.URL.createObjectURL(response.data)
+      const link = document.createElement('a')
+      link.href = url
+      link.download = cv.file_name || `cv_${cv.id}`
+      document.body.appendChild(link)
+      link.click()
+      document.body.removeChild(link)
+      window.URL.revokeObjectURL(url)
+    } catch (err) {
+      console.error('Error downloading CV:', err)
+      alert('CV\'ni yuklab olishda xatolik yuz berdi')
     }
   }
 
@@ -39,7 +53,7 @@ function CVDetail({ cv, apiBaseUrl, onBack }) {
             <strong>Lavozim:</strong> {cv.user?.position?.name || '-'}
           </div>
           <div>
-            <strong>Fayl nomi:</strong> {cv.file_name || (cv.file ? cv.file.split('/').pop() : '-')}
+            <strong>Fayl nomi:</strong> {cv.file_name || '-'}
           </div>
           <div>
             <strong>Fayl hajmi:</strong> {cv.file_size ? `${(cv.file_size / 1024).toFixed(2)} KB` : '-'}
@@ -53,7 +67,7 @@ function CVDetail({ cv, apiBaseUrl, onBack }) {
       {/* Download Section */}
       <div className="table-card">
         <h3 style={{ marginBottom: '20px' }}>CV fayli</h3>
-        {cv.file ? (
+        {cv.download_url ? (
           <div style={{ textAlign: 'center', padding: '40px' }}>
             <p style={{ marginBottom: '20px', fontSize: '18px', color: '#666' }}>
               CV faylini yuklab olish uchun quyidagi tugmani bosing
@@ -3,6 +3,7 @@ import axios from 'axios'
 import CVDetail from './CVDetail'
 import { Icon } from './Icons'
 import Pagination from './Pagination'
+import ProtectedImage from './ProtectedImage'
 import './Dashboard.css'
 
 function CVsList({ apiBaseUrl }) {
@@ -25,6 +26,7 @@ function CVsList({ apiBaseUrl }) {
   // Column visibility state
   const [visibleColumns, setVisibleColumns] = useState({
     id: true,
+    preview: true,
     user: true,
     phone: true,
     email: true,
@@ -349,6 +351,7 @@ function CVsList({ apiBaseUrl }) {
           </div>
           {Object.entries({
             id: 'ID',
+            preview: 'Ko\'rinish',
             user: 'Foydalanuvchi',
             phone: 'Telefon',
             email: 'Email',
@@ -413,6 +416,7 @@ function CVsList({ apiBaseUrl }) {
                     />
                   </th>
                   {visibleColumns.id && <th>ID</th>}
+                  {visibleColumns.preview && <th>Ko'rinish</th>}
                   {visibleColumns.user && <th>Foydalanuvchi</th>}
                   {visibleColumns.phone && <th>Telefon</th>}
                   {visibleColumns.email && <th>Email</th>}
@@ -433,10 +437,23 @@ function CVsList({ apiBaseUrl }) {
                       />
                     </td>
                     {visibleColumns.id && <td>{cv.id}</td>}
+                    {visibleColumns.preview && (
+                      <td>
+                        {cv.preview_url ? (
+                          <ProtectedImage
+                            src={cv.preview_url}
+                            alt={cv.file_name || 'CV'}
+                            title={cv.snippet || ''}
+                            loading="lazy"
+                            style={{ width: '40px', height: '56px', objectFit: 'cover', border: '1px solid var(--border)', borderRadius: '4px' }}
+                          />
+                        ) : '-'}
+                      </td>
+                    )}
                     {visibleColumns.user && <td>{cv.user?.first_name} {cv.user?.last_name}</td>}
                     {visibleColumns.phone && <td>{cv.user?.phone || '-'}</td>}
                     {visibleColumns.email && <td>{cv.user?.email || '-'}</td>}
-                    {visibleColumns.fileName && <td>{cv.file_name || (cv.file ? cv.file.split('/').pop() : '-')}</td>}
+                    {visibleColumns.fileName && <td>{cv.file_name || '-'}</td>}
                     {visibleColumns.fileSize && <td>{cv.file_size ? `${(cv.file_size / 1024).toFixed(2)} KB` : '-'}</td>}
                     {visibleColumns.uploadedAt && <td>{cv.uploaded_at ? new Date(cv.uploaded_at).toLocaleDateString('uz-UZ') : '-'}</td>}
                     <td>
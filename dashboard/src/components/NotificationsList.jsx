@@ -4,6 +4,148 @@ import { Icon } from './Icons'
 import Pagination from './Pagination'
 import './Dashboard.css'
 
+const PROGRESS_STATES = {
+  scheduled: 'Rejalashtirilgan',
+  sending: 'Yuborilmoqda',
+  done: 'Yakunlandi',
+  draft: 'Kutilmoqda'
+}
+
+// Yuborish jarayoni - JSON short-poll (sync gunicorn worker'larni SSE ulanishi band qilmaydi).
+// Server keyingi so'rov vaqtini poll_after'da beradi (rejalashtirilgan xabar uchun - scheduled_at'gacha)
+function BroadcastProgress({ apiBaseUrl, notificationId, onDone }) {
+  const [progress, setProgress] = useState(null)
+
+  useEffect(() => {
+    let timer = null
+    let cancelled = false
+    let previous = null
+
+    const poll = async () => {
+      try {
+        const token = localStorage.getItem('access_token')
+        const headers = token ? { Authorization: `Bearer ${token}` } : {}
+        const response = await axios.get(`${apiBaseUrl}/notifications/${notificationId}/progress/`, {
+          params: { format: 'json' },
+          headers
+        })
+        if (cancelled) return
+        const data = response.data
+        const now = Date.now()
+        const processed = data.sent + data.failed
+        // msg/s - ketma-ket ikki so'rov orasidagi o'zgarishdan
+        const rate = previous && now > previous.at ? (processed - previous.processed) * 1000 / (now - previous.at) : 0
+        previous = { at: now, processed }
+        setProgress({ ...data, rate: Math.round(rate * 10) / 10 })
+        if (data.poll_after) {
+          timer = setTimeout(poll, data.poll_after * 1000)
+        } else if (onDone) {
+          onDone(data)
+        }
+      } catch (err) {
+        console.error('Progress error:', err)
+      }
+    }
+
+    poll()
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [apiBaseUrl, notificationId])
+
+  if (!progress) return null
+  const processed = progress.sent + progress.failed
+  const percent = progress.total ? Math.round(processed * 100 / progress.total) : 100
+
+  return (
+    <div style={{ marginTop: '10px', padding: '15px', background: '#f8f9fa', borderRadius: '8px' }}>
+      <div style={{ marginBottom: '8px', fontWeight: 600 }}>
+        {PROGRESS_STATES[progress.state] || progress.state} — {percent}%
+      </div>
+      <div style={{ background: '#e9ecef', borderRadius: '4px', height: '10px', overflow: 'hidden', marginBottom: '8px' }}>
+        <div style={{ background: '#229ED9', height: '100%', width: `${percent}%`, transition: 'width 0.5s' }} />
+      </div>
+      <div style={{ display: 'flex', gap: '16px', flexWrap: 'wrap', fontSize: '14px' }}>
+        <span>Jami: {progress.total}</span>
+        <span style={{ color: '#28a745' }}>Yuborildi: {progress.sent}</span>
+        <span style={{ color: '#dc3545' }}>Xatolik: {progress.failed}</span>
+        <span>Navbatda: {progress.pending}</span>
+        <span>{progress.rate} msg/s</span>
+        {progress.state === 'scheduled' && progress.scheduled_at && (
+          <span>Boshlanish: {new Date(progress.scheduled_at).toLocaleString('uz-UZ')}</span>
+        )}
+        {progress.projected_completion && progress.state !== 'done' && (
+          <span>Taxminiy tugash: {new Date(progress.projected_completion).toLocaleTimeString('uz-UZ')}</span>
+        )}
+      </div>
+    </div>
+  )
+}
+
+// Xatoliklar - /notifications/{id}/errors/ (cursor pagination, "Ko'proq" tugmasi bilan)
+function NotificationErrors({ apiBaseUrl, notificationId, total, formatDate }) {
+  const [errors, setErrors] = useState([])
+  const [next, setNext] = useState(null)
+  const [loading, setLoading] = useState(false)
+
+  const loadErrors = async (url) => {
+    try {
+      setLoading(true)
+      const token = localStorage.getItem('access_token')
+      const headers = token ? { Authorization: `Bearer ${token}` } : {}
+      const response = await axios.get(url, { headers })
+      setErrors((prev) => (url === next ? [...prev, ...response.data.results] : response.data.results))
+      setNext(response.data.next)
+    } catch (err) {
+      console.error('Error loading notification errors:', err)
+    } finally {
+      setLoading(false)
+    }
+  }
+
+  useEffect(() => {
+    setErrors([])
+    setNext(null)
+    loadErrors(`${apiBaseUrl}/notifications/${notificationId}/errors/`)
+  }, [apiBaseUrl, notificationId])
+
+  return (
+    <div style={{ marginBottom: '20px' }}>
+      <strong>Xatoliklar ({total}):</strong>
+      <div style={{ marginTop: '10px' }}>
+        <table>
+          <thead>
+            <tr>
+              <th>Foydalanuvchi</th>
+              <th>Telegram ID</th>
+              <th>Xatolik turi</th>
+              <th>Xatolik xabari</th>
+              <th>Vaqt</th>
+            </tr>
+          </thead>
+          <tbody>
+            {errors.map((error) => (
+              <tr key={error.id}>
+                <td>{error.user ? `${error.user.first_name} ${error.user.last_name}` : '-'}</td>
+                <td>{error.telegram_id || '-'}</td>
+                <td>{error.error_type || '-'}</td>
+                <td style={{ maxWidth: '300px', wordBreak: 'break-word' }}>{error.error_message || '-'}</td>
+                <td>{formatDate(error.created_at)}</td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+        {next && (
+          <button className="btn" onClick={() => loadErrors(next)} disabled={loading} style={{ marginTop: '10px' }}>
+            {loading ? 'Yuklanmoqda...' : "Ko'proq ko'rsatish"}
+          </button>
+        )}
+      </div>
+    </div>
+  )
+}
+
 function NotificationsList({ apiBaseUrl }) {
   const [notifications, setNotifications] = useState([])
   const [loading, setLoading] = useState(true)
@@ -182,35 +324,30 @@ function NotificationsList({ apiBaseUrl }) {
           </div>
         </div>
         
-        {selectedNotification.errors && selectedNotification.errors.length > 0 && (
+        {selectedNotification.sent_at && (selectedNotification.successful_sends || 0) + (selectedNotification.failed_sends || 0) < (selectedNotification.total_recipients || 0) && (
           <div style={{ marginBottom: '20px' }}>
-            <strong>Xatoliklar ({selectedNotification.errors.length}):</strong>
-            <div style={{ marginTop: '10px' }}>
-              <table>
-                <thead>
-                  <tr>
-                    <th>Foydalanuvchi</th>
-                    <th>Telegram ID</th>
-                    <th>Xatolik turi</th>
-                    <th>Xatolik xabari</th>
-                    <th>Vaqt</th>
-                  </tr>
-                </thead>
-                <tbody>
-                  {selectedNotification.errors.map((error) => (
-                    <tr key={error.id}>
-                      <td>{error.user ? `${error.user.first_name} ${error.user.last_name}` : '-'}</td>
-                      <td>{error.telegram_id || '-'}</td>
-                      <td>{error.error_type || '-'}</td>
-                      <td style={{ maxWidth: '300px', wordBreak: 'break-word' }}>{error.error_message || '-'}</td>
-                      <td>{formatDate(error.created_at)}</td>
-                    </tr>
-                  ))}
-                </tbody>
-              </table>
-            </div>
+            <strong>Yuborish jarayoni:</strong>
+            <BroadcastProgress
+              apiBaseUrl={apiBaseUrl}
+              notificationId={selectedNotification.id}
+              onDone={(data) => setSelectedNotification({
+                ...selectedNotification,
+                successful_sends: data.sent,
+                failed_sends: data.failed,
+                errors_count: data.errors
+              })}
+            />
           </div>
         )}
+        
+        {selectedNotification.errors_count > 0 && (
+          <NotificationErrors
+            apiBaseUrl={apiBaseUrl}
+            notificationId={selectedNotification.id}
+            total={selectedNotification.errors_count}
+            formatDate={formatDate}
+          />
+        )}
       </div>
     )
   }
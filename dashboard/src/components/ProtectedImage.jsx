@@ -0,0 +1,39 @@
+import React, { useState, useEffect } from 'react'
+import axios from 'axios'
+
+// JWT bilan himoyalangan rasm - <img src> Authorization header yubora olmaydi,
+// shuning uchun rasm axios orqali olinadi va object URL sifatida ko'rsatiladi
+function ProtectedImage({ src, ...props }) {
+  const [objectUrl, setObjectUrl] = useState(null)
+
+  useEffect(() => {
+    if (!src) return undefined
+    let cancelled = false
+    let url = null
+    const token = localStorage.getItem('access_token')
+    axios.get(src, {
+      headers: token ? { 'Authorization': `Bearer ${token}` } : {},
+      responseType: 'blob'
+    })
+      .then((response) => {
+        if (cancelled) return
+        url = window.URL.createObjectURL(response.data)
+        setObjectUrl(url)
+      })
+      .catch(() => {
+        if (!cancelled) setObjectUrl(null)
+      })
+    return () => {
+      cancelled = true
+      if (url) window.URL.revokeObjectURL(url)
+    }
+  }, [src])
+
+  if (!objectUrl) {
+    return null
+  }
+
+  return <img src={objectUrl} {...props} />
+}
+
+export default ProtectedImage
@@ -389,10 +389,9 @@ function ResultsTable({ apiBaseUrl }) {
 
       if (response.data.success) {
         alert(
-          `✅ Xabar muvaffaqiyatli yuborildi!\n` +
+          `✅ Xabar yuborish navbatiga qo'yildi!\n` +
           `📊 Jami: ${response.data.total}\n` +
-          `✅ Muvaffaqiyatli: ${response.data.successful}\n` +
-          `❌ Xatolik: ${response.data.failed}`
+          `⏳ Navbatda: ${response.data.queued}`
         )
         setShowNotificationModal(false)
         setSelectedCandidates(new Set())
@@ -52,9 +52,26 @@ function UserDetail({ user, apiBaseUrl, onBack }) {
     }
   }
 
-  const downloadCV = (cv) => {
-    if (cv.file) {
-      window.open(cv.file, '_blank')
+  const downloadCV = async (cv) => {
+    if (!cv.download_url) return
+    try {
+      // Himoyalangan endpoint - /media/ orqali CV ochiq emas
+      const token = localStorage.getItem('access_token')
+      const response = await axios.get(cv.download_url, {
+        headers: { 'Authorization': `Bearer ${token}` },
+        responseType: 'blob'
+      })
+      const url = window.URL.createObjectURL(response.data)
+      const link = document.createElement('a')
+      link.href = url
+      link.download = cv.file_name || `cv_${cv.id}`
+      document.body.appendChild(link)
+      link.click()
+      document.body.removeChild(link)
+      window.URL.revokeObjectURL(url)
+    } catch (err) {
+      console.error('Error downloading CV:', err)
+      alert('CV\'ni yuklab olishda xatolik yuz berdi')
     }
   }
 
@@ -119,10 +136,9 @@ function UserDetail({ user, apiBaseUrl, onBack }) {
 
       if (response.data.success) {
         alert(
-          `✅ Xabar muvaffaqiyatli yuborildi!\n` +
+          `✅ Xabar yuborish navbatiga qo'yildi!\n` +
           `📊 Jami: ${response.data.total}\n` +
-          `✅ Muvaffaqiyatli: ${response.data.successful}\n` +
-          `❌ Xatolik: ${response.data.failed}`
+          `⏳ Navbatda: ${response.data.queued}`
         )
         setShowNotificationModal(false)
         setNotificationTitle('')
@@ -303,10 +319,10 @@ function UserDetail({ user, apiBaseUrl, onBack }) {
             <tbody>
               {cvs.map((cv) => (
                 <tr key={cv.id}>
-                  <td>{cv.file ? cv.file.split('/').pop() : '-'}</td>
+                  <td>{cv.file_name || '-'}</td>
                   <td>{cv.uploaded_at ? new Date(cv.uploaded_at).toLocaleDateString('uz-UZ') : '-'}</td>
                   <td>
-                    {cv.file && (
+                    {cv.download_url && (
                       <button 
                         className="btn" 
                         onClick={() => downloadCV(cv)}
@@ -298,10 +298,9 @@ function UsersList({ apiBaseUrl }) {
 
       if (response.data.success) {
         alert(
-          `✅ Xabar muvaffaqiyatli yuborildi!\n` +
+          `✅ Xabar yuborish navbatiga qo'yildi!\n` +
           `📊 Jami: ${response.data.total}\n` +
-          `✅ Muvaffaqiyatli: ${response.data.successful}\n` +
-          `❌ Xatolik: ${response.data.failed}`
+          `⏳ Navbatda: ${response.data.queued}`
         )
         setShowNotificationModal(false)
         setSelectedUsers(new Set())
@@ -189,6 +189,7 @@ cd "$PROJECT_DIR"
 # Copy service files
 sudo cp deployment/hr-bot-backend.service /etc/systemd/system/
 sudo cp deployment/hr-bot-telegram.service /etc/systemd/system/
+sudo cp deployment/hr-bot-notifications.service /etc/systemd/system/
 
 # Reload systemd
 sudo systemctl daemon-reload
@@ -196,6 +197,7 @@ sudo systemctl daemon-reload
 # Enable services
 sudo systemctl enable hr-bot-backend.service
 sudo systemctl enable hr-bot-telegram.service
+sudo systemctl enable hr-bot-notifications.service
 
 echo -e "${GREEN}Systemd services installed and enabled${NC}"
 
@@ -235,16 +237,19 @@ echo ""
 echo -e "${GREEN}To start services:${NC}"
 echo "  sudo systemctl start hr-bot-backend"
 echo "  sudo systemctl start hr-bot-telegram"
+echo "  sudo systemctl start hr-bot-notifications"
 echo "  sudo systemctl reload nginx"
 echo ""
 echo -e "${GREEN}To check service status:${NC}"
 echo "  sudo systemctl status hr-bot-backend"
 echo "  sudo systemctl status hr-bot-telegram"
+echo "  sudo systemctl status hr-bot-notifications"
 echo "  sudo systemctl status nginx"
 echo ""
 echo -e "${GREEN}To view logs:${NC}"
 echo "  sudo journalctl -u hr-bot-backend -f"
 echo "  sudo journalctl -u hr-bot-telegram -f"
+echo "  sudo journalctl -u hr-bot-notifications -f"
 echo "  tail -f /var/log/hr_bot/gunicorn_error.log"
 echo ""
 echo -e "${GREEN}Production URL: http://178.218.200.120:8523${NC}"
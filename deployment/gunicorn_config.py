@@ -10,6 +10,8 @@ backlog = 2048
 
 # Worker processes
 workers = multiprocessing.cpu_count() * 2 + 1
+# sync worker'lar uzun ulanishlarni ushlab turmaydi: broadcast progress dashboard/admin'da
+# /api/notifications/{id}/progress/?format=json short-poll orqali olinadi (SSE - async/gthread worker'lar uchun)
 worker_class = "sync"
 worker_connections = 1000
 timeout = 30
@@ -46,3 +48,11 @@ graceful_timeout = 30
 max_requests = 1000
 max_requests_jitter = 50
 
+
+def worker_exit(server, worker):
+    """Telegram dispatcher fon loop'i va HTTP session'ini toza yopish"""
+    try:
+        from users.dispatcher import dispatcher
+        dispatcher.shutdown()
+    except Exception as e:
+        server.log.warning(f"Telegram dispatcher shutdown failed: {e}")
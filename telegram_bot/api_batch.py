@@ -0,0 +1,43 @@
+"""
+Backend /api/batch/ uchun yordamchi - bir nechta API chaqiruvini bitta HTTP so'rovda yuborish.
+
+Foydalanish:
+    results = await api_batch(session, [
+        {'id': 'auth', 'method': 'POST', 'path': 'users/telegram_auth/', 'body': {...}},
+        {'method': 'POST', 'path': 'results/', 'body': {...}},
+    ])
+    if results is not None:
+        status, body = results[1]
+
+path - API_BASE_URL ga nisbatan (masalan 'users/telegram_auth/'). Oldingi natijaga havola:
+"{auth.body.user.id}" (batch.py docstring'iga qarang).
+"""
+import logging
+import os
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000/api')
+API_PATH = urlsplit(API_BASE_URL).path.rstrip('/')
+
+
+async def api_batch(session, requests, atomic=False):
+    """[(status, body), ...] - so'rovlar tartibida; batch'ning o'zi bajarilmasa None"""
+    payload = {
+        'atomic': atomic,
+        'requests': [
+            dict(item, path=f"{API_PATH}/{item['path'].lstrip('/')}")
+            for item in requests
+        ],
+    }
+    async with session.post(f"{API_BASE_URL}/batch/", json=payload) as resp:
+        if resp.status != 200:
+            logger.error(f"Batch request failed: {resp.status} {await resp.text()}")
+            return None
+        data = await resp.json()
+    return [(item['status'], item['body']) for item in data['results']]
@@ -1,6 +1,8 @@
 import os
+import sys
 import asyncio
 import logging
+from pathlib import Path
 from datetime import datetime
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
@@ -13,6 +15,15 @@ import redis.asyncio as redis
 from dotenv import load_dotenv
 import aiohttp
 
+# Telegram HTML renderer backend bilan umumiy (backend/users/telegram_html.py) - Docker'da PYTHONPATH=/shared,
+# repo checkout'da (systemd, start_*.sh) backend papkasidan olinadi
+SHARED_MODULES_DIR = Path(__file__).resolve().parent.parent / 'backend' / 'users'
+if SHARED_MODULES_DIR.is_dir():
+    sys.path.append(str(SHARED_MODULES_DIR))
+from telegram_html import TELEGRAM_MESSAGE_LIMIT, html_to_plain_text, render_telegram_chunks
+from http_cache import cached_get
+from api_batch import api_batch
+
 # Configure logging first
 try:
     from logging_config import setup_logging
@@ -45,6 +56,8 @@ BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000/api')
 WEBAPP_URL = os.getenv('TELEGRAM_WEBAPP_URL', 'https://unfunereal-matilda-frenular.ngrok-free.dev')
 ADMIN_CHAT_ID = os.getenv('ADMIN_CHAT_ID', '')  # Admin guruh yoki kanal ID
+CV_UPLOAD_CHUNK_SIZE = int(os.getenv('CV_UPLOAD_CHUNK_SIZE', 512 * 1024))
+CV_UPLOAD_MAX_RETRIES = int(os.getenv('CV_UPLOAD_MAX_RETRIES', 3))
 
 # Initialize bot and dispatcher
 bot = Bot(token=BOT_TOKEN)
@@ -80,37 +93,22 @@ async def send_to_admin(message_text: str, parse_mode: str = "HTML"):
     try:
         chat_id = int(ADMIN_CHAT_ID) if ADMIN_CHAT_ID.lstrip('-').isdigit() else ADMIN_CHAT_ID
         
-        # Clean message text - remove HTML tags if parse_mode is HTML but text contains invalid HTML
-        # Sometimes error messages contain HTML from Django error pages
+        # Clean message text - sometimes error messages contain HTML from Django error pages.
+        # Renderer faqat Telegram teglarini qoldiradi, matnni escape qiladi va 4096 belgilik bo'laklarga bo'ladi
         if parse_mode == "HTML":
-            # Remove HTML doctype and other invalid tags
-            import re
-            # Remove HTML doctype and html/head/body tags
-            message_text = re.sub(r'<!DOCTYPE[^>]*>', '', message_text, flags=re.IGNORECASE)
-            message_text = re.sub(r'<html[^>]*>', '', message_text, flags=re.IGNORECASE)
-            message_text = re.sub(r'</html>', '', message_text, flags=re.IGNORECASE)
-            message_text = re.sub(r'<head[^>]*>.*?</head>', '', message_text, flags=re.IGNORECASE | re.DOTALL)
-            message_text = re.sub(r'<body[^>]*>', '', message_text, flags=re.IGNORECASE)
-            message_text = re.sub(r'</body>', '', message_text, flags=re.IGNORECASE)
-            # Remove script and style tags
-            message_text = re.sub(r'<script[^>]*>.*?</script>', '', message_text, flags=re.IGNORECASE | re.DOTALL)
-            message_text = re.sub(r'<style[^>]*>.*?</style>', '', message_text, flags=re.IGNORECASE | re.DOTALL)
-            # Clean up extra whitespace
-            message_text = re.sub(r'\s+', ' ', message_text).strip()
-            # Limit message length (Telegram allows max 4096 chars)
-            if len(message_text) > 4000:
-                message_text = message_text[:4000] + "... (xabar qisqartirildi)"
+            chunks = render_telegram_chunks(message_text)
+        else:
+            chunks = [message_text[i:i + TELEGRAM_MESSAGE_LIMIT] for i in range(0, len(message_text), TELEGRAM_MESSAGE_LIMIT)]
         
-        await bot.send_message(chat_id=chat_id, text=message_text, parse_mode=parse_mode)
+        for chunk in chunks:
+            await bot.send_message(chat_id=chat_id, text=chunk, parse_mode=parse_mode)
         logger.info(f"Message sent to admin chat: {chat_id}")
     except Exception as e:
         logger.error(f"Error sending message to admin: {e}", exc_info=True)
         # Try sending without parse_mode if HTML parsing fails
         try:
             # Remove HTML tags completely and send as plain text
-            import re
-            plain_text = re.sub(r'<[^>]+>', '', message_text)
-            plain_text = plain_text[:4000] if len(plain_text) > 4000 else plain_text
+            plain_text = html_to_plain_text(message_text)[:TELEGRAM_MESSAGE_LIMIT]
             await bot.send_message(chat_id=chat_id, text=plain_text, parse_mode=None)
             logger.info(f"Message sent to admin chat as plain text: {chat_id}")
         except Exception as e2:
@@ -320,7 +318,8 @@ async def get_or_create_user(telegram_id: int, first_name: str, last_name: str =
                             'last_name': last_name or '',
                             'telegram_username': telegram_username,
                             'telegram_language_code': language_code,
-                            'telegram_is_premium': is_premium
+                            'telegram_is_premium': is_premium,
+                            'issue_tokens': False
                         }
                     ) as resp:
                         if resp.status in [200, 201]:
@@ -523,8 +522,8 @@ async def show_positions(message: types.Message, state: FSMContext):
             is_premium = getattr(message.from_user, 'is_premium', False)
             
             # Premium userlar uchun barcha lavozimlarni olish, oddiy userlar uchun faqat ochiq lavozimlar
-            url = f"{API_BASE_URL}/positions/" if is_premium else f"{API_BASE_URL}/positions/?is_open=true"
-            async with session.get(url) as resp:
+            url = f"{API_BASE_URL}/positions/?fields=id,name,is_open" if is_premium else f"{API_BASE_URL}/positions/?is_open=true&fields=id,name,is_open"
+            async with cached_get(session, url) as resp:
                 if resp.status == 200:
                     data = await resp.json()
                     
@@ -600,7 +599,7 @@ async def process_position_selection(callback: types.CallbackQuery, state: FSMCo
         
         # Get position details to verify it's open
         async with aiohttp.ClientSession() as session:
-            async with session.get(f"{API_BASE_URL}/positions/{position_id}/") as pos_resp:
+            async with cached_get(session, f"{API_BASE_URL}/positions/{position_id}/?fields=id,name,is_open") as pos_resp:
                 if pos_resp.status != 200:
                     await callback.answer("❌ Lavozim topilmadi", show_alert=True)
                     return
@@ -633,35 +632,34 @@ async def process_position_selection(callback: types.CallbackQuery, state: FSMCo
                     'telegram_is_premium': getattr(callback.from_user, 'is_premium', False),
                 }
                 
-                # Try to update existing user or create new one
-                async with session.post(
-                    f"{API_BASE_URL}/users/create_telegram_user/",
-                    json=user_data
-                ) as resp:
-                    if resp.status in [200, 201]:
-                        response_data = await resp.json()
-                        user = response_data.get('user', {})
-                        
-                        await callback.message.edit_text(
-                            f"✅ Profilingiz muvaffaqiyatli to'ldirildi!\n\n"
-                            f"💼 Lavozim: {position_name}\n\n"
-                            f"Endi testni boshlashingiz mumkin."
-                        )
-                        
-                        # Notify admin about new candidate
-                        try:
-                            await notify_new_candidate(user, position_name)
-                        except Exception as e:
-                            logger.error(f"Error notifying admin about new candidate: {e}", exc_info=True)
-                        
-                        # Show tests for selected position
-                        await show_tests_for_position(callback.message, position_id, user)
-                    else:
-                        error_text = await resp.text()
-                        logger.error(f"Error creating user: {error_text}")
-                        await callback.message.edit_text(
-                            f"❌ Xatolik yuz berdi. Iltimos, qayta urinib ko'ring."
-                        )
+                # Foydalanuvchini yangilash/yaratish va lavozim testlari - bitta round-trip (/api/batch/)
+                batch_results = await api_batch(session, [
+                    {'method': 'POST', 'path': 'users/create_telegram_user/', 'body': user_data},
+                    {'method': 'GET', 'path': f'tests/?position_id={position_id}'},
+                ]) or [(None, None), (None, None)]
+                (user_status, response_data), tests_response = batch_results
+                if user_status in [200, 201]:
+                    user = response_data.get('user', {})
+                    
+                    await callback.message.edit_text(
+                        f"✅ Profilingiz muvaffaqiyatli to'ldirildi!\n\n"
+                        f"💼 Lavozim: {position_name}\n\n"
+                        f"Endi testni boshlashingiz mumkin."
+                    )
+                    
+                    # Notify admin about new candidate
+                    try:
+                        await notify_new_candidate(user, position_name)
+                    except Exception as e:
+                        logger.error(f"Error notifying admin about new candidate: {e}", exc_info=True)
+                    
+                    # Show tests for selected position
+                    await show_tests_for_position(callback.message, position_id, user, tests_response=tests_response)
+                else:
+                    logger.error(f"Error creating user: {response_data}")
+                    await callback.message.edit_text(
+                        f"❌ Xatolik yuz berdi. Iltimos, qayta urinib ko'ring."
+                    )
     except Exception as e:
         logger.error(f"Error in process_position_selection: {e}", exc_info=True)
         await notify_error("Position tanlash xatoligi", str(e), user_id=callback.from_user.id, context={'function': 'process_position_selection'})
@@ -671,71 +669,75 @@ async def process_position_selection(callback: types.CallbackQuery, state: FSMCo
         await callback.answer()
 
 
-async def show_tests_for_position(message: types.Message, position_id: int, user_data: dict = None):
-    """Show tests for selected position - faqat ochiq positionlar uchun"""
-    async with aiohttp.ClientSession() as session:
-        try:
+async def show_tests_for_position(message: types.Message, position_id: int, user_data: dict = None, tests_response: tuple = None):
+    """
+    Show tests for selected position - faqat ochiq positionlar uchun.
+    tests_response - oldindan olingan (status, body) javob (masalan, /api/batch/ orqali); bo'lmasa API'dan olinadi.
+    """
+    try:
+        if tests_response is None:
             # Get tests for selected position
-            async with session.get(f"{API_BASE_URL}/tests/?position_id={position_id}") as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    
-                    # Handle pagination response
-                    tests = []
-                    if isinstance(data, dict):
-                        if 'results' in data:
-                            tests = data['results']
-                        elif 'count' in data:
-                            tests = data.get('results', [])
-                    elif isinstance(data, list):
-                        tests = data
-                    
-                    if not isinstance(tests, list):
-                        tests = []
-                    
-                    if tests and len(tests) > 0:
-                        # Create keyboard with tests
-                        keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-                        
-                        # Show first 5 tests
-                        for test in tests[:5]:
-                            if isinstance(test, dict):
-                                test_id = test.get('id')
-                                test_title = test.get('title', 'Test')
-                                if test_id:
-                                    keyboard.inline_keyboard.append([
-                                        InlineKeyboardButton(
-                                            text=f"📝 {test_title}",
-                                            callback_data=f"test_{test_id}"
-                                        )
-                                    ])
-                        
-                        await message.answer(
-                            "📋 Sizning lavozimingiz uchun mavjud testlar:\n\n"
-                            "Quyidagi testlardan birini tanlang:",
-                            reply_markup=keyboard
-                        )
-                    else:
-                        await message.answer(
-                            "ℹ️ Sizning lavozimingiz uchun hozircha testlar yo'q.\n"
-                            "Iltimos, keyinroq qayta urinib ko'ring."
-                        )
-                else:
-                    error_text = await resp.text()
-                    logger.error(f"Error loading tests: {error_text}")
-                    await message.answer(
-                        f"❌ Xatolik yuz berdi. Iltimos, qayta urinib ko'ring."
-                    )
-        except Exception as e:
-            logger.error(f"Error in show_tests_for_position: {e}", exc_info=True)
-            await notify_error("Testlar ro'yxatini yuklash xatoligi", str(e), user_id=message.from_user.id, context={'function': 'show_tests_for_position'})
-            await message.answer("❌ Xatolik yuz berdi. Iltimos, qayta urinib ko'ring.")
+            async with aiohttp.ClientSession() as session:
+                async with cached_get(session, f"{API_BASE_URL}/tests/?position_id={position_id}") as resp:
+                    tests_response = (resp.status, await resp.json() if resp.status == 200 else await resp.text())
+        status_code, data = tests_response
+        if status_code == 200:
+            # Handle pagination response
+            tests = []
+            if isinstance(data, dict):
+                if 'results' in data:
+                    tests = data['results']
+                elif 'count' in data:
+                    tests = data.get('results', [])
+            elif isinstance(data, list):
+                tests = data
+            
+            if not isinstance(tests, list):
+                tests = []
+            
+            if tests and len(tests) > 0:
+                # Create keyboard with tests
+                keyboard = InlineKeyboardMarkup(inline_keyboard=[])
+                
+                # Show first 5 tests
+                for test in tests[:5]:
+                    if isinstance(test, dict):
+                        test_id = test.get('id')
+                        test_title = test.get('title', 'Test')
+                        if test_id:
+                            keyboard.inline_keyboard.append([
+                                InlineKeyboardButton(
+                                    text=f"📝 {test_title}",
+                                    callback_data=f"test_{test_id}"
+                                )
+                            ])
+                
+                await message.answer(
+                    "📋 Sizning lavozimingiz uchun mavjud testlar:\n\n"
+                    "Quyidagi testlardan birini tanlang:",
+                    reply_markup=keyboard
+                )
+            else:
+                await message.answer(
+                    "ℹ️ Sizning lavozimingiz uchun hozircha testlar yo'q.\n"
+                    "Iltimos, keyinroq qayta urinib ko'ring."
+                )
+        else:
+            logger.error(f"Error loading tests: {data}")
+            await message.answer(
+                f"❌ Xatolik yuz berdi. Iltimos, qayta urinib ko'ring."
+            )
+    except Exception as e:
+        logger.error(f"Error in show_tests_for_position: {e}", exc_info=True)
+        await notify_error("Testlar ro'yxatini yuklash xatoligi", str(e), user_id=message.from_user.id, context={'function': 'show_tests_for_position'})
+        await message.answer("❌ Xatolik yuz berdi. Iltimos, qayta urinib ko'ring.")
 
 
 async def show_trial_tests(message: types.Message, position_id: int, user_data: dict):
     """Show trial tests for position - only Telegram mode"""
     async with aiohttp.ClientSession() as session:
-        async with session.get(
+        async with cached_get(
+            session,
             f"{API_BASE_URL}/tests/",
             params={'position_id': position_id, 'test_mode': 'telegram'}
         ) as resp:
@@ -866,7 +868,7 @@ async def process_test_selection(callback: types.CallbackQuery, state: FSMContex
     
     # Get test details
     async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/tests/{test_id}/") as resp:
+        async with cached_get(session, f"{API_BASE_URL}/tests/{test_id}/") as resp:
             logger.info(f"API response status: {resp.status} for test_id: {test_id}")
             if resp.status == 200:
                 test = await resp.json()
@@ -1022,7 +1024,7 @@ async def process_test_webapp(callback: types.CallbackQuery):
     
     # Get test details
     async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/tests/{test_id}/") as resp:
+        async with cached_get(session, f"{API_BASE_URL}/tests/{test_id}/") as resp:
             logger.info(f"API response status: {resp.status} for test_id: {test_id}")
             if resp.status == 200:
                 test = await resp.json()
@@ -1131,7 +1133,7 @@ async def process_test_telegram(callback: types.CallbackQuery, state: FSMContext
     
     # Get test details
     async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/tests/{test_id}/") as resp:
+        async with cached_get(session, f"{API_BASE_URL}/tests/{test_id}/") as resp:
             logger.info(f"API response status: {resp.status} for test_id: {test_id}")
             if resp.status == 200:
                 test = await resp.json()
@@ -1343,7 +1345,7 @@ async def cmd_results(message: types.Message):
         # Get user results
         async with session.get(
             f"{API_BASE_URL}/results/",
-            params={'user__telegram_id': telegram_id}
+            params={'user__telegram_id': telegram_id, 'fields': 'id,test,score,is_passed,time_taken,completed_at,is_trial'}
         ) as resp:
             if resp.status == 200:
                 data = await resp.json()
@@ -1476,7 +1478,7 @@ async def menu_results(message: types.Message):
     async with aiohttp.ClientSession() as session:
         async with session.get(
             f"{API_BASE_URL}/results/",
-            params={'user__telegram_id': telegram_id}
+            params={'user__telegram_id': telegram_id, 'fields': 'id,test,score,is_passed,time_taken,completed_at,is_trial'}
         ) as resp:
             if resp.status == 200:
                 data = await resp.json()
@@ -1621,7 +1623,7 @@ async def handle_trial_test(callback: types.CallbackQuery, state: FSMContext):
     
     # Get test details
     async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/tests/{test_id}/") as resp:
+        async with cached_get(session, f"{API_BASE_URL}/tests/{test_id}/") as resp:
             if resp.status == 200:
                 test = await resp.json()
                 test_title = test.get('title', 'Test')
@@ -1735,7 +1737,7 @@ async def menu_upload_cv(message: types.Message):
         # Get user's test results
         async with session.get(
             f"{API_BASE_URL}/results/",
-            params={'user__telegram_id': telegram_id, 'is_completed': 'true'}
+            params={'user__telegram_id': telegram_id, 'is_completed': 'true', 'fields': 'is_passed'}
         ) as resp:
             if resp.status == 200:
                 data = await resp.json()
@@ -1782,7 +1784,7 @@ async def cmd_upload_cv(message: types.Message):
         # Get user's test results
         async with session.get(
             f"{API_BASE_URL}/results/",
-            params={'user__telegram_id': telegram_id, 'is_completed': 'true'}
+            params={'user__telegram_id': telegram_id, 'is_completed': 'true', 'fields': 'is_passed'}
         ) as resp:
             if resp.status == 200:
                 data = await resp.json()
@@ -1820,6 +1822,80 @@ async def cmd_upload_cv(message: types.Message):
                 await message.answer("❌ Xatolik yuz berdi. Iltimos, qayta urinib ko'ring.")
 
 
+class CVUploadError(Exception):
+    """Chunked CV upload xatoligi"""
+
+
+async def _put_cv_chunk(session: aiohttp.ClientSession, upload_url: str, offset: int, chunk: bytes, telegram_id: int) -> int:
+    """
+    Send one chunk at the given offset, resuming by server offset on failure.
+    Returns new offset.
+    """
+    owner_headers = {'Telegram-Id': str(telegram_id)}
+    for attempt in range(1, CV_UPLOAD_MAX_RETRIES + 1):
+        try:
+            async with session.put(
+                upload_url,
+                data=chunk,
+                headers={**owner_headers, 'Upload-Offset': str(offset), 'Content-Type': 'application/offset+octet-stream'}
+            ) as resp:
+                if resp.status == 200:
+                    return (await resp.json())['offset']
+                if resp.status not in (409, 500, 502, 503, 504):
+                    raise CVUploadError(f"HTTP {resp.status}: {await resp.text()}")
+        except aiohttp.ClientError as e:
+            logger.warning(f"CV chunk upload failed (attempt {attempt}): {e}")
+        
+        # Server qaysi offset'da turganini so'raymiz - javob yo'qolgan bo'lsa chunk allaqachon yozilgan
+        try:
+            async with session.get(upload_url, headers=owner_headers) as status_resp:
+                if status_resp.status == 200:
+                    server_offset = (await status_resp.json())['offset']
+                    if server_offset == offset + len(chunk):
+                        return server_offset
+                    if server_offset != offset:
+                        raise CVUploadError(f"Unexpected server offset {server_offset}, expected {offset}")
+        except aiohttp.ClientError as e:
+            logger.warning(f"CV upload status check failed (attempt {attempt}): {e}")
+        await asyncio.sleep(attempt)
+    raise CVUploadError(f"Chunk at offset {offset} failed after {CV_UPLOAD_MAX_RETRIES} attempts")
+
+
+async def stream_cv_to_backend(session: aiohttp.ClientSession, document: types.Document, telegram_id: int, file_name: str):
+    """
+    Telegram'dan faylni chunk'lab o'qib, backend chunked upload'ga to'g'ridan-to'g'ri uzatish.
+    Xotirada bir vaqtning o'zida faqat bitta chunk turadi.
+    Returns: (status, response_data)
+    """
+    async with session.post(
+        f"{API_BASE_URL}/cvs/uploads/",
+        json={'telegram_id': telegram_id, 'file_name': file_name, 'file_size': document.file_size}
+    ) as init_resp:
+        init_data = await init_resp.json(content_type=None)
+        if init_resp.status != 201:
+            return init_resp.status, init_data
+    
+    upload_url = f"{API_BASE_URL}/cvs/uploads/{init_data['upload_id']}/"
+    chunk_size = init_data.get('chunk_size') or CV_UPLOAD_CHUNK_SIZE
+    
+    file_info = await bot.get_file(document.file_id)
+    file_url = bot.session.api.file_url(bot.token, file_info.file_path)
+    
+    offset = 0
+    buffer = bytearray()
+    async for data in bot.session.stream_content(file_url, chunk_size=min(chunk_size, 64 * 1024)):
+        buffer.extend(data)
+        if len(buffer) >= chunk_size:
+            offset = await _put_cv_chunk(session, upload_url, offset, bytes(buffer[:chunk_size]), telegram_id)
+            del buffer[:chunk_size]
+    if buffer:
+        offset = await _put_cv_chunk(session, upload_url, offset, bytes(buffer), telegram_id)
+    
+    # Upload faqat uni boshlagan foydalanuvchiga tegishli (backend Telegram-Id'ni tekshiradi)
+    async with session.post(f"{upload_url}complete/", headers={'Telegram-Id': str(telegram_id)}) as complete_resp:
+        return complete_resp.status, await complete_resp.json(content_type=None)
+
+
 @dp.message(lambda m: m.document is not None)
 async def handle_document(message: types.Message):
     """Handle document upload (CV)"""
@@ -1851,7 +1927,7 @@ async def handle_document(message: types.Message):
         # Get user's test results
         async with session.get(
             f"{API_BASE_URL}/results/",
-            params={'user__telegram_id': telegram_id, 'is_completed': 'true'}
+            params={'user__telegram_id': telegram_id, 'is_completed': 'true', 'fields': 'is_passed'}
         ) as resp:
             if resp.status == 200:
                 data = await resp.json()
@@ -1879,54 +1955,22 @@ async def handle_document(message: types.Message):
                     )
                     return
                 
-                # Download file from Telegram
+                # Stream file from Telegram straight into backend chunked upload
                 try:
-                    file_info = await bot.get_file(document.file_id)
-                    file_path = file_info.file_path
-                    
-                    # Download file content - bot.download_file() returns bytes or file-like object
-                    file_content = await bot.download_file(file_path)
-                    
-                    # Convert to bytes if needed
-                    if isinstance(file_content, bytes):
-                        file_bytes = file_content
-                    elif hasattr(file_content, 'read'):
-                        # It's a file-like object, read it
-                        if asyncio.iscoroutinefunction(file_content.read):
-                            file_bytes = await file_content.read()
-                        else:
-                            file_bytes = file_content.read()
+                    upload_status, upload_data = await stream_cv_to_backend(session, document, telegram_id, file_name)
+                    if upload_status == 201:
+                        await message.answer(
+                            "✅ <b>CV muvaffaqiyatli yuklandi!</b>\n\n"
+                            "🎉 Biz sizga tez orada aloqaga chiqamiz va siz bilan birinchi Zoom interview uchun maslahatlarimizni beramiz.\n\n"
+                            "📞 Biz siz bilan tez orada bog'lanamiz!\n\n"
+                            "Rahmat! 🙏",
+                            parse_mode="HTML"
+                        )
                     else:
-                        # Try to convert to bytes
-                        file_bytes = bytes(file_content)
-                    
-                    # Prepare form data for API
-                    form_data = aiohttp.FormData()
-                    form_data.add_field('file', file_bytes, filename=file_name, content_type=document.mime_type or 'application/octet-stream')
-                    form_data.add_field('telegram_id', str(telegram_id))
-                    form_data.add_field('file_name', file_name)
-                    form_data.add_field('file_size', str(document.file_size))
-                    
-                    # Upload CV to API
-                    async with session.post(
-                        f"{API_BASE_URL}/cvs/",
-                        data=form_data
-                    ) as upload_resp:
-                        if upload_resp.status == 201:
-                            upload_data = await upload_resp.json()
-                            await message.answer(
-                                "✅ <b>CV muvaffaqiyatli yuklandi!</b>\n\n"
-                                "🎉 Biz sizga tez orada aloqaga chiqamiz va siz bilan birinchi Zoom interview uchun maslahatlarimizni beramiz.\n\n"
-                                "📞 Biz siz bilan tez orada bog'lanamiz!\n\n"
-                                "Rahmat! 🙏",
-                                parse_mode="HTML"
-                            )
-                        else:
-                            error_text = await upload_resp.text()
-                            logger.error(f"CV upload error: {upload_resp.status}, {error_text}")
-                            await message.answer(
-                                "❌ CV yuklashda xatolik yuz berdi. Iltimos, qayta urinib ko'ring yoki admin bilan bog'laning."
-                            )
+                        logger.error(f"CV upload error: {upload_status}, {upload_data}")
+                        await message.answer(
+                            "❌ CV yuklashda xatolik yuz berdi. Iltimos, qayta urinib ko'ring yoki admin bilan bog'laning."
+                        )
                 except Exception as e:
                     logger.error(f"Error downloading/uploading CV: {e}", exc_info=True)
                     await message.answer(
@@ -1949,7 +1993,8 @@ async def cmd_info(message: types.Message):
                 json={
                     'telegram_id': telegram_id,
                     'first_name': message.from_user.first_name or '',
-                    'last_name': message.from_user.last_name or ''
+                    'last_name': message.from_user.last_name or '',
+                    'issue_tokens': False
                 }
             ) as resp:
                 if resp.status == 200:
@@ -2172,7 +2217,7 @@ async def process_edit_position_selection(callback: types.CallbackQuery, state:
         position_id = int(callback.data.split("_")[1])
         
         async with aiohttp.ClientSession() as session:
-            async with session.get(f"{API_BASE_URL}/positions/{position_id}/") as pos_resp:
+            async with cached_get(session, f"{API_BASE_URL}/positions/{position_id}/?fields=id,name,is_open") as pos_resp:
                 if pos_resp.status != 200:
                     await callback.answer("❌ Lavozim topilmadi", show_alert=True)
                     return
@@ -0,0 +1,74 @@
+"""
+Revalidatsiya qiluvchi HTTP kesh - backend'ning ETag / Last-Modified javoblari uchun.
+
+Lavozimlar, testlar va savollar faqat HR tahrirlaganda o'zgaradi. Takroriy so'rovda saqlangan
+ETag (If-None-Match) va Last-Modified (If-Modified-Since) yuboriladi; 304 kelsa saqlangan JSON
+qaytariladi - javob qayta yuklanmaydi va parse qilinmaydi.
+
+Foydalanish (session.get o'rniga):
+    async with cached_get(session, url, params=...) as resp:
+        if resp.status == 200:
+            data = await resp.json()
+"""
+import copy
+import json
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+MAX_ENTRIES = 256
+
+# (url, params) -> (etag, last_modified, data)
+_entries = OrderedDict()
+
+
+class CachedResponse:
+    """aiohttp javobining bot ishlatadigan qismi: status, json() va text()"""
+
+    def __init__(self, status, data, text='', revalidated=False):
+        self.status = status
+        self.revalidated = revalidated
+        self._data = data
+        self._text = text
+
+    async def json(self):
+        # Chaqiruvchi natijani o'zgartirishi mumkin - keshdagi nusxa buzilmasin
+        return copy.deepcopy(self._data)
+
+    async def text(self):
+        return self._text
+
+
+def _key(url, params):
+    return url, tuple(sorted((params or {}).items()))
+
+
+@asynccontextmanager
+async def cached_get(session, url, params=None):
+    key = _key(url, params)
+    entry = _entries.get(key)
+    headers = {}
+    if entry:
+        etag, last_modified, _ = entry
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+    async with session.get(url, params=params, headers=headers) as resp:
+        if resp.status == 304 and entry:
+            _entries.move_to_end(key)
+            yield CachedResponse(200, entry[2], revalidated=True)
+            return
+        text = await resp.text()
+        try:
+            data = json.loads(text) if text else None
+        except ValueError:
+            data = None
+        if resp.status == 200 and (resp.headers.get('ETag') or resp.headers.get('Last-Modified')):
+            _entries[key] = (resp.headers.get('ETag'), resp.headers.get('Last-Modified'), data)
+            _entries.move_to_end(key)
+            while len(_entries) > MAX_ENTRIES:
+                _entries.popitem(last=False)
+        elif resp.status in (404, 410):
+            _entries.pop(key, None)
+        yield CachedResponse(resp.status, data, text)
@@ -9,6 +9,8 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 import logging
 from dotenv import load_dotenv
 
+from api_batch import api_batch
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -172,7 +174,8 @@ async def start_telegram_test(callback: types.CallbackQuery, state: FSMContext,
                         json={
                             'telegram_id': callback.from_user.id,
                             'first_name': callback.from_user.first_name or '',
-                            'last_name': callback.from_user.last_name or ''
+                            'last_name': callback.from_user.last_name or '',
+                            'issue_tokens': False
                         }
                     ) as user_resp:
                         if user_resp.status in [200, 201]:
@@ -623,39 +626,56 @@ async def complete_test(message: types.Message, state: FSMContext, notify_callba
     # Get user data from API (to ensure we have correct user info)
     user_data = None
     async with aiohttp.ClientSession() as session:
-        # First, get user data from API
-        async with session.post(
-            f"{API_BASE_URL}/users/telegram_auth/",
-            json={
-                'telegram_id': telegram_id,
-                'first_name': message.from_user.first_name or '',
-                'last_name': message.from_user.last_name or ''
-            }
-        ) as user_resp:
-            if user_resp.status in [200, 201]:
-                user_response = await user_resp.json()
-                user_data = user_response.get('user', {})
-                # Ensure we have correct user data
-                if user_data:
-                    # TelegramProfile'dan ism/familiyani olish (User table'dan emas)
-                    telegram_profile = user_data.get('telegram_profile', {})
-                    if telegram_profile:
-                        telegram_first_name = telegram_profile.get('telegram_first_name', '')
-                        telegram_last_name = telegram_profile.get('telegram_last_name', '')
-                        # Agar telegram_profile'da ism bo'lsa, user_data'ga qo'shish
-                        if telegram_first_name:
-                            user_data['telegram_first_name'] = telegram_first_name
-                        if telegram_last_name:
-                            user_data['telegram_last_name'] = telegram_last_name
-                    
-                    # Fallback: agar telegram_profile bo'sh bo'lsa, message'dan olish
-                    if not telegram_profile or not telegram_profile.get('telegram_first_name'):
-                        if message.from_user.first_name:
-                            user_data['telegram_first_name'] = message.from_user.first_name
-                        if message.from_user.last_name:
-                            user_data['telegram_last_name'] = message.from_user.last_name
-                    logger.info(f"Retrieved user data from API: {user_data.get('telegram_profile', {}).get('telegram_first_name', 'N/A')} (telegram_id: {telegram_id})")
-        
+        # telegram_auth va natijani yuborish - bitta round-trip (/api/batch/, ketma-ket bajariladi)
+        batch_results = await api_batch(session, [
+            {
+                'id': 'auth',
+                'method': 'POST',
+                'path': 'users/telegram_auth/',
+                'body': {
+                    'telegram_id': telegram_id,
+                    'first_name': message.from_user.first_name or '',
+                    'last_name': message.from_user.last_name or '',
+                    'issue_tokens': False
+                },
+            },
+            {
+                'method': 'POST',
+                'path': 'results/',
+                'body': {
+                    'test_id': test_id,
+                    'answers': answers,
+                    'time_taken': time_taken,
+                    'telegram_id': telegram_id,
+                    'is_trial': is_trial
+                },
+            },
+        ]) or [(None, None), (None, None)]
+        (user_status, user_response), (result_status, result_body) = batch_results
+
+        if user_status in [200, 201] and isinstance(user_response, dict):
+            user_data = user_response.get('user', {})
+            # Ensure we have correct user data
+            if user_data:
+                # TelegramProfile'dan ism/familiyani olish (User table'dan emas)
+                telegram_profile = user_data.get('telegram_profile', {})
+                if telegram_profile:
+                    telegram_first_name = telegram_profile.get('telegram_first_name', '')
+                    telegram_last_name = telegram_profile.get('telegram_last_name', '')
+                    # Agar telegram_profile'da ism bo'lsa, user_data'ga qo'shish
+                    if telegram_first_name:
+                        user_data['telegram_first_name'] = telegram_first_name
+                    if telegram_last_name:
+                        user_data['telegram_last_name'] = telegram_last_name
+                
+                # Fallback: agar telegram_profile bo'sh bo'lsa, message'dan olish
+                if not telegram_profile or not telegram_profile.get('telegram_first_name'):
+                    if message.from_user.first_name:
+                        user_data['telegram_first_name'] = message.from_user.first_name
+                    if message.from_user.last_name:
+                        user_data['telegram_last_name'] = message.from_user.last_name
+                logger.info(f"Retrieved user data from API: {user_data.get('telegram_profile', {}).get('telegram_first_name', 'N/A')} (telegram_id: {telegram_id})")
+    
         # If user_data not found or invalid, use fallback
         if not user_data or not user_data.get('telegram_profile'):
             user_data = {
@@ -669,195 +689,185 @@ async def complete_test(message: types.Message, state: FSMContext, notify_callba
             }
             logger.warning(f"User data not found or invalid in API, using fallback: {user_data}")
         
-        # Send test result to API
-        async with session.post(
-            f"{API_BASE_URL}/results/",
-            json={
-                'test_id': test_id,
-                'answers': answers,
-                'time_taken': time_taken,
-                'telegram_id': telegram_id,
-                'is_trial': is_trial
-            }
-        ) as resp:
-            if resp.status == 201:
-                result = await resp.json()
-                score = result.get('score', 0)
-                total_questions = result.get('total_questions', 0)
-                correct_answers = result.get('correct_answers', 0)
-                is_passed = result.get('is_passed', False)
-                requires_cv = result.get('requires_cv', False)
-                
-                # Notify admin about test result (use user_data from API)
-                if notify_callback:
-                    try:
-                        await notify_callback(user_data, test_title, result)
-                    except Exception as e:
-                        logger.error(f"Error notifying admin about test result: {e}", exc_info=True)
-                
-                # Show results - send all answers, split into multiple messages if needed
-                # Telegram allows max 4096 characters per message
-                trial_prefix = "🧪 " if is_trial else ""
-                
-                # First message: Summary
-                summary_text = f"{trial_prefix}📊 <b>Test natijalari</b>\n\n"
-                summary_text += f"📝 Jami: {total_questions} | ✅ To'g'ri: {correct_answers} | 📈 Ball: {score}%\n\n"
-                
-                # Get passing score from test_data
-                passing_score = test_data.get('passing_score', 60) if test_data else 60
-                
-                if is_passed:
-                    summary_text += "✅ <b>Tabriklaymiz! Testdan o'tdingiz!</b>"
-                    if requires_cv and not is_trial:
-                        summary_text += "\n\n📄 CV yuklash: /upload_cv yoki Menu'dan CV yuklash tugmasini bosing"
-                else:
-                    # Check if score is low but not zero
-                    if score > 0 and score < passing_score:
-                        summary_text += "❌ Testdan o'ta olmadingiz.\n\n"
-                        summary_text += "💡 Iltimos, malakangizni oshirib bizni keyingi vakansiyalarimiz uchun ariza qoldirasiz deb umid qilamiz!"
-                    else:
-                        summary_text += "❌ Testdan o'ta olmadingiz."
-                        if not is_trial:
-                            summary_text += " Keyingi safar yanada yaxshi natija olishga harakat qiling!"
-                
-                keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="🔙 Asosiy menyu", callback_data="menu_back")]
-                ])
-                
-                # Send summary message first
+        # Test natijasi (batch'dagi ikkinchi so'rov)
+        if result_status == 201:
+            result = result_body
+            score = result.get('score', 0)
+            total_questions = result.get('total_questions', 0)
+            correct_answers = result.get('correct_answers', 0)
+            is_passed = result.get('is_passed', False)
+            requires_cv = result.get('requires_cv', False)
+            
+            # Notify admin about test result (use user_data from API)
+            if notify_callback:
                 try:
-                    await message.edit_text(summary_text, reply_markup=keyboard, parse_mode="HTML")
+                    await notify_callback(user_data, test_title, result)
                 except Exception as e:
-                    error_msg = str(e)
-                    if "message is not modified" not in error_msg.lower():
-                        logger.error(f"Error displaying summary: {e}", exc_info=True)
-                        try:
-                            await message.answer(summary_text, reply_markup=keyboard, parse_mode="HTML")
-                        except Exception as e2:
-                            logger.error(f"Error sending summary as new message: {e2}", exc_info=True)
+                    logger.error(f"Error notifying admin about test result: {e}", exc_info=True)
+            
+            # Show results - send all answers, split into multiple messages if needed
+            # Telegram allows max 4096 characters per message
+            trial_prefix = "🧪 " if is_trial else ""
+            
+            # First message: Summary
+            summary_text = f"{trial_prefix}📊 <b>Test natijalari</b>\n\n"
+            summary_text += f"📝 Jami: {total_questions} | ✅ To'g'ri: {correct_answers} | 📈 Ball: {score}%\n\n"
+            
+            # Get passing score from test_data
+            passing_score = test_data.get('passing_score', 60) if test_data else 60
+            
+            if is_passed:
+                summary_text += "✅ <b>Tabriklaymiz! Testdan o'tdingiz!</b>"
+                if requires_cv and not is_trial:
+                    summary_text += "\n\n📄 CV yuklash: /upload_cv yoki Menu'dan CV yuklash tugmasini bosing"
+            else:
+                # Check if score is low but not zero
+                if score > 0 and score < passing_score:
+                    summary_text += "❌ Testdan o'ta olmadingiz.\n\n"
+                    summary_text += "💡 Iltimos, malakangizni oshirib bizni keyingi vakansiyalarimiz uchun ariza qoldirasiz deb umid qilamiz!"
+                else:
+                    summary_text += "❌ Testdan o'ta olmadingiz."
+                    if not is_trial:
+                        summary_text += " Keyingi safar yanada yaxshi natija olishga harakat qiling!"
+            
+            keyboard = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="🔙 Asosiy menyu", callback_data="menu_back")]
+            ])
+            
+            # Send summary message first
+            try:
+                await message.edit_text(summary_text, reply_markup=keyboard, parse_mode="HTML")
+            except Exception as e:
+                error_msg = str(e)
+                if "message is not modified" not in error_msg.lower():
+                    logger.error(f"Error displaying summary: {e}", exc_info=True)
+                    try:
+                        await message.answer(summary_text, reply_markup=keyboard, parse_mode="HTML")
+                    except Exception as e2:
+                        logger.error(f"Error sending summary as new message: {e2}", exc_info=True)
+            
+            # Send detailed answers in separate messages
+            result_answers = result.get('answers', [])
+            if result_answers and len(result_answers) > 0:
+                # Group answers into messages (max 4000 chars per message to be safe)
+                current_message = "<b>📋 Savollar va javoblar:</b>\n\n"
+                message_count = 0
+                max_message_length = 4000
                 
-                # Send detailed answers in separate messages
-                result_answers = result.get('answers', [])
-                if result_answers and len(result_answers) > 0:
-                    # Group answers into messages (max 4000 chars per message to be safe)
-                    current_message = "<b>📋 Savollar va javoblar:</b>\n\n"
-                    message_count = 0
-                    max_message_length = 4000
+                for idx, answer_data in enumerate(result_answers, 1):
+                    question_data = answer_data.get('question', {})
+                    selected_option = answer_data.get('selected_option', {})
+                    is_correct = answer_data.get('is_correct', False)
                     
-                    for idx, answer_data in enumerate(result_answers, 1):
-                        question_data = answer_data.get('question', {})
-                        selected_option = answer_data.get('selected_option', {})
-                        is_correct = answer_data.get('is_correct', False)
-                        
-                        question_text = question_data.get('text', 'Savol')
-                        option_text = selected_option.get('text', 'Javob topilmadi')
-                        
-                        # Format answer line
-                        status_icon = "✅" if is_correct else "❌"
-                        answer_line = f"{idx}. {status_icon} <b>{question_text}</b>\n"
-                        answer_line += f"   Javob: {option_text}\n\n"
-                        
-                        # Check if adding this answer would exceed message limit
-                        if len(current_message) + len(answer_line) > max_message_length:
-                            # Send current message and start new one
-                            try:
-                                await message.answer(current_message, parse_mode="HTML")
-                                message_count += 1
-                            except Exception as e:
-                                logger.error(f"Error sending answer message {message_count + 1}: {e}", exc_info=True)
-                            
-                            # Start new message
-                            current_message = f"<b>📋 Savollar va javoblar (davomi):</b>\n\n"
-                            current_message += answer_line
-                        else:
-                            current_message += answer_line
+                    question_text = question_data.get('text', 'Savol')
+                    option_text = selected_option.get('text', 'Javob topilmadi')
                     
-                    # Send remaining answers if any
-                    if len(current_message) > len("<b>📋 Savollar va javoblar (davomi):</b>\n\n"):
+                    # Format answer line
+                    status_icon = "✅" if is_correct else "❌"
+                    answer_line = f"{idx}. {status_icon} <b>{question_text}</b>\n"
+                    answer_line += f"   Javob: {option_text}\n\n"
+                    
+                    # Check if adding this answer would exceed message limit
+                    if len(current_message) + len(answer_line) > max_message_length:
+                        # Send current message and start new one
                         try:
                             await message.answer(current_message, parse_mode="HTML")
                             message_count += 1
                         except Exception as e:
-                            logger.error(f"Error sending final answer message: {e}", exc_info=True)
-                    
-                    logger.info(f"Sent {message_count} detailed answer messages")
-                
-                # Send additional message after answers (for both passed and failed tests)
-                await asyncio.sleep(1)  # Small delay before sending additional message
+                            logger.error(f"Error sending answer message {message_count + 1}: {e}", exc_info=True)
+                        
+                        # Start new message
+                        current_message = f"<b>📋 Savollar va javoblar (davomi):</b>\n\n"
+                        current_message += answer_line
+                    else:
+                        current_message += answer_line
                 
-                if is_passed:
-                    # Success message with CV upload request
-                    success_message = (
-                        "🎉 <b>Tabriklaymiz!</b>\n\n"
-                        "Siz testdan muvaffaqiyatli o'tdingiz!\n\n"
-                        "📄 Iltimos, bizga CV yingizni yuboring.\n\n"
-                        "CV yuklash uchun:\n"
-                        "• Menu'dan \"📄 CV yuklash\" tugmasini bosing\n"
-                        "• Yoki <code>/upload_cv</code> buyrug'ini yuboring\n"
-                        "• Yoki CV faylini to'g'ridan-to'g'ri yuboring"
-                    )
-                    
-                    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                        [InlineKeyboardButton(text="📄 CV yuklash", callback_data="upload_cv")],
-                        [InlineKeyboardButton(text="🔙 Asosiy menyu", callback_data="menu_back")]
-                    ])
-                    
-                    try:
-                        await message.answer(success_message, reply_markup=keyboard, parse_mode="HTML")
-                    except Exception as e:
-                        logger.error(f"Error sending success message: {e}", exc_info=True)
-                else:
-                    # Motivational message for failed tests
-                    motivational_message = (
-                        "💪 <b>Sizga katta rahmat!</b>\n\n"
-                        "Hozircha tajriba biroz yetishmasligi tabiiy holat — har bir muvaffaqiyat yo'li aynan shunday boshlanadi.\n\n"
-                        "Muhimi, sizda o'sishga bo'lgan ishtiyoq va qat'iyat bor.\n\n"
-                        "Ishonamizki, yaqin kelajakda siz yanada kuchli mutaxassis sifatida qayta uchrashamiz.\n\n"
-                        "🎯 Malakangizni oshirishda davom eting — keyingi safar albatta yanada yuqori natijaga erishasiz!"
-                    )
-                    
-                    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                        [InlineKeyboardButton(text="🔙 Asosiy menyu", callback_data="menu_back")]
-                    ])
-                    
+                # Send remaining answers if any
+                if len(current_message) > len("<b>📋 Savollar va javoblar (davomi):</b>\n\n"):
                     try:
-                        await message.answer(motivational_message, reply_markup=keyboard, parse_mode="HTML")
+                        await message.answer(current_message, parse_mode="HTML")
+                        message_count += 1
                     except Exception as e:
-                        logger.error(f"Error sending motivational message: {e}", exc_info=True)
+                        logger.error(f"Error sending final answer message: {e}", exc_info=True)
                 
-                # Old CV upload request (keep for backward compatibility, but now we send it above)
-                # This is now redundant but kept for safety
-                if is_passed and requires_cv and not is_trial:
-                    # Already sent above, skip
-                    pass
-            else:
-                error_text = await resp.text()
-                error_data = await resp.json() if resp.content_type == 'application/json' else {}
-                error_message = error_data.get('error', error_data.get('detail', error_text))
-                logger.error(f"Error submitting test: {error_text}, status: {resp.status}")
+                logger.info(f"Sent {message_count} detailed answer messages")
+            
+            # Send additional message after answers (for both passed and failed tests)
+            await asyncio.sleep(1)  # Small delay before sending additional message
+            
+            if is_passed:
+                # Success message with CV upload request
+                success_message = (
+                    "🎉 <b>Tabriklaymiz!</b>\n\n"
+                    "Siz testdan muvaffaqiyatli o'tdingiz!\n\n"
+                    "📄 Iltimos, bizga CV yingizni yuboring.\n\n"
+                    "CV yuklash uchun:\n"
+                    "• Menu'dan \"📄 CV yuklash\" tugmasini bosing\n"
+                    "• Yoki <code>/upload_cv</code> buyrug'ini yuboring\n"
+                    "• Yoki CV faylini to'g'ridan-to'g'ri yuboring"
+                )
                 
-                # Notify admin about error
-                if notify_error_callback:
-                    try:
-                        await notify_error_callback(
-                            "Test natijasini yuborish xatoligi",
-                            str(error_message),
-                            user_id=telegram_id,
-                            context={
-                                'test_id': test_id,
-                                'test_title': test_title,
-                                'status_code': resp.status,
-                                'function': 'complete_test'
-                            }
-                        )
-                    except Exception as e:
-                        logger.error(f"Error notifying admin about test submission error: {e}", exc_info=True)
+                keyboard = InlineKeyboardMarkup(inline_keyboard=[
+                    [InlineKeyboardButton(text="📄 CV yuklash", callback_data="upload_cv")],
+                    [InlineKeyboardButton(text="🔙 Asosiy menyu", callback_data="menu_back")]
+                ])
                 
-                await message.edit_text(
-                    f"❌ Xatolik yuz berdi: {error_message}\n\nIltimos, keyinroq urinib ko'ring.",
-                    parse_mode="HTML"
+                try:
+                    await message.answer(success_message, reply_markup=keyboard, parse_mode="HTML")
+                except Exception as e:
+                    logger.error(f"Error sending success message: {e}", exc_info=True)
+            else:
+                # Motivational message for failed tests
+                motivational_message = (
+                    "💪 <b>Sizga katta rahmat!</b>\n\n"
+                    "Hozircha tajriba biroz yetishmasligi tabiiy holat — har bir muvaffaqiyat yo'li aynan shunday boshlanadi.\n\n"
+                    "Muhimi, sizda o'sishga bo'lgan ishtiyoq va qat'iyat bor.\n\n"
+                    "Ishonamizki, yaqin kelajakda siz yanada kuchli mutaxassis sifatida qayta uchrashamiz.\n\n"
+                    "🎯 Malakangizni oshirishda davom eting — keyingi safar albatta yanada yuqori natijaga erishasiz!"
                 )
-    
+                
+                keyboard = InlineKeyboardMarkup(inline_keyboard=[
+                    [InlineKeyboardButton(text="🔙 Asosiy menyu", callback_data="menu_back")]
+                ])
+                
+                try:
+                    await message.answer(motivational_message, reply_markup=keyboard, parse_mode="HTML")
+                except Exception as e:
+                    logger.error(f"Error sending motivational message: {e}", exc_info=True)
+            
+            # Old CV upload request (keep for backward compatibility, but now we send it above)
+            # This is now redundant but kept for safety
+            if is_passed and requires_cv and not is_trial:
+                # Already sent above, skip
+                pass
+        else:
+            error_text = str(result_body) if result_body is not None else "API bilan bog'lanib bo'lmadi"
+            error_data = result_body if isinstance(result_body, dict) else {}
+            error_message = error_data.get('error', error_data.get('detail', error_text))
+            logger.error(f"Error submitting test: {error_text}, status: {result_status}")
+            
+            # Notify admin about error
+            if notify_error_callback:
+                try:
+                    await notify_error_callback(
+                        "Test natijasini yuborish xatoligi",
+                        str(error_message),
+                        user_id=telegram_id,
+                        context={
+                            'test_id': test_id,
+                            'test_title': test_title,
+                            'status_code': result_status,
+                            'function': 'complete_test'
+                        }
+                    )
+                except Exception as e:
+                    logger.error(f"Error notifying admin about test submission error: {e}", exc_info=True)
+            
+            await message.edit_text(
+                f"❌ Xatolik yuz berdi: {error_message}\n\nIltimos, keyinroq urinib ko'ring.",
+                parse_mode="HTML"
+            )
+
     # Clear state
     await state.clear()
 